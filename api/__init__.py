@@ -0,0 +1,4 @@
+"""
+Python tooling for the Insurance Management API
+Mirrors the storage layer of the Next.js app and hosts benchmarks and clients
+"""
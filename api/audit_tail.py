@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Incremental audit-trail reader
+Tails /api/audit-trail from a durable high-water mark so each poll transfers
+only entries appended since the last one, optionally archiving them to
+rotated, compressed NDJSON segments
+
+Usage:
+    python -m api.audit_tail --state audit.state.json --out audit-segments
+    python -m api.audit_tail --state audit.state.json --follow --interval 5
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from api.client import InsuranceClient
+from api.storage import get_current_timestamp
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+def _write_atomic(path: Path, data: dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SegmentWriter:
+    """
+    Appends records to numbered NDJSON segments in a directory
+    The active segment is plain text; once it reaches max_bytes and its
+    contents are committed it is compressed (gzip or zstd) and the next begins
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str = "audit",
+        max_bytes: int = DEFAULT_SEGMENT_BYTES,
+        compression: Optional[str] = "gzip",
+    ):
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self.sequence = 0
+        self.offset = 0
+
+    def _path(self, sequence: int) -> Path:
+        return self.directory / f"{self.prefix}-{sequence:06d}.ndjson"
+
+    def open(self, sequence: Optional[int] = None, offset: Optional[int] = None):
+        """
+        Resume the active segment; truncating to the last committed offset drops
+        records written after the previous run last saved its high-water mark
+        """
+        if sequence is None:
+            existing = sorted(self.directory.glob(f"{self.prefix}-*.ndjson*"))
+            sequence = (
+                int(existing[-1].name[len(self.prefix) + 1 :].split(".")[0]) + 1
+                if existing
+                else 1
+            )
+        path = self._path(sequence)
+        if not path.exists() and any(self.directory.glob(path.name + ".*")):
+            # Sealed after its last commit; nothing in it is uncommitted
+            sequence, offset = sequence + 1, None
+            path = self._path(sequence)
+        self.sequence = sequence
+        self._file = path.open("ab")
+        if offset is not None and offset < self._file.tell():
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        self.offset = self._file.tell()
+        return self
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        if self._file is None:
+            self.open()
+        for record in records:
+            line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+            self._file.write(line)
+            self.offset += len(line)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def rotate_if_full(self) -> None:
+        if self._file is not None and self.offset >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self) -> None:
+        """Seal the active segment and start the next one"""
+        self.flush()
+        self._file.close()
+        self._file = None
+        self._compress(self._path(self.sequence))
+        self.open(self.sequence + 1)
+
+    def _compress(self, path: Path) -> None:
+        if self.compression is None or path.stat().st_size == 0:
+            return
+        if self.compression == "gzip":
+            target = path.with_name(path.name + ".gz")
+            with (
+                path.open("rb") as src,
+                gzip.open(target, "wb", compresslevel=6) as dst,
+            ):
+                shutil.copyfileobj(src, dst)
+        else:
+            target = path.with_name(path.name + ".zst")
+            with path.open("rb") as src, target.open("wb") as dst:
+                zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+        path.unlink()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+class IncrementalReadsUnsupported(RuntimeError):
+    """The backend answered without a highWaterMark, so it cannot be tailed"""
+
+
+class AuditTrailTailer:
+    """
+    Yields audit log entries appended since the last committed high-water mark
+
+    The mark (and the segment position, when archiving) is saved after each
+    page has been handed to the caller, so a crash replays at most one page
+    and never skips an entry.
+    """
+
+    def __init__(
+        self,
+        client: InsuranceClient,
+        state_path: Optional[Path] = None,
+        page_size: int = 500,
+        segments: Optional[SegmentWriter] = None,
+        since: Optional[str] = None,
+        **filters: Any,
+    ):
+        self.client = client
+        self.state_path = Path(state_path) if state_path else None
+        self.page_size = page_size
+        self.segments = segments
+        self.filters = filters
+        self.high_water_mark: Optional[str] = None
+        self.since = since
+        self.entries_read = 0
+
+        state = self._load_state()
+        if state.get("filters", filters) != filters:
+            raise ValueError(
+                f"{self.state_path} was written for filters {state['filters']}"
+            )
+        self.high_water_mark = state.get("highWaterMark")
+        if segments is not None:
+            segment = state.get("segment") or {}
+            segments.open(segment.get("sequence"), segment.get("offset"))
+
+    def _load_state(self) -> dict[str, Any]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        return json.loads(self.state_path.read_text())
+
+    def _commit(self, high_water_mark: str) -> None:
+        self.high_water_mark = high_water_mark
+        if self.state_path is None:
+            return
+        state: dict[str, Any] = {
+            "highWaterMark": high_water_mark,
+            "filters": self.filters,
+            "updatedAt": get_current_timestamp(),
+        }
+        if self.segments is not None:
+            self.segments.flush()
+            self.segments.rotate_if_full()
+            state["segment"] = {
+                "sequence": self.segments.sequence,
+                "offset": self.segments.offset,
+            }
+        _write_atomic(self.state_path, state)
+
+    def poll(self) -> Iterator[dict[str, Any]]:
+        """Stream every entry appended since the last poll, then stop"""
+        while True:
+            params: dict[str, Any] = {"limit": self.page_size, **self.filters}
+            if self.high_water_mark:
+                params["cursor"] = self.high_water_mark
+            elif self.since:
+                params["since"] = self.since
+            page = self.client.list_audit_trail(**params)
+            if not isinstance(page, dict) or "highWaterMark" not in page:
+                # The Next.js route returns the whole log and ignores since/cursor
+                raise IncrementalReadsUnsupported(
+                    f"{self.client.base_url}/api/audit-trail does not support "
+                    "incremental reads (no highWaterMark); run against the "
+                    "stand-in API (python -m api.standin)"
+                )
+
+            items = page["items"]
+            if self.segments is not None and items:
+                self.segments.write(items)
+            yield from items
+            self.entries_read += len(items)
+            self._commit(page["highWaterMark"])
+            if not page.get("nextCursor"):
+                return
+
+    def follow(self, interval: float = 5.0) -> Iterator[dict[str, Any]]:
+        """poll() forever, sleeping between rounds once caught up"""
+        while True:
+            yield from self.poll()
+            time.sleep(interval)
+
+    def close(self) -> None:
+        if self.segments is not None:
+            self.segments.close()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--state", type=Path, required=True, help="High-water mark file"
+    )
+    parser.add_argument(
+        "--out", type=Path, help="Write NDJSON segments here instead of stdout"
+    )
+    parser.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES)
+    parser.add_argument(
+        "--compression", choices=("gzip", "zstd", "none"), default="gzip"
+    )
+    parser.add_argument("--since", help="ISO timestamp to start from on the first run")
+    parser.add_argument("--entity-type")
+    parser.add_argument("--entity-id")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--follow", action="store_true")
+    parser.add_argument("--interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    filters = {
+        k: v
+        for k, v in (("entityType", args.entity_type), ("entityId", args.entity_id))
+        if v
+    }
+    segments = None
+    if args.out:
+        segments = SegmentWriter(
+            args.out,
+            max_bytes=args.segment_bytes,
+            compression=None if args.compression == "none" else args.compression,
+        )
+
+    with InsuranceClient() as client:
+        tailer = AuditTrailTailer(
+            client, args.state, args.page_size, segments, args.since, **filters
+        )
+        entries = tailer.follow(args.interval) if args.follow else tailer.poll()
+        try:
+            for entry in entries:
+                if segments is None:
+                    sys.stdout.write(json.dumps(entry) + "\n")
+        except KeyboardInterrupt:
+            pass
+        except IncrementalReadsUnsupported as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        finally:
+            tailer.close()
+    print(f"Read {tailer.entries_read} new audit entries", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
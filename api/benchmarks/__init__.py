@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Insurance API storage, transport and client layers
+Each module is runnable with `python -m api.benchmarks.<name>`
+"""
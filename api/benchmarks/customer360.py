@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Customer 360 benchmark
+Builds customer views against the stand-in server the hand-joined way (full
+collection downloads plus per-policy lookups, one after another) and through
+Customer360Service cold, warm, and right after a write invalidates the view
+
+Usage:
+    python -m api.benchmarks.customer360 --customers 20 --policies-per-customer 300
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import time
+from dataclasses import asdict
+from typing import Any
+
+from api.benchmarks.fixtures import make_policy, seed_data_dir
+from api.client import APIError, AsyncInsuranceClient
+from api.customer360 import Customer360Service
+from api.standin import start_in_thread
+from api.storage import write_json_file
+
+CREATED_AT = "2024-01-01T00:00:00.000Z"
+
+
+def seed(customers: int, per_customer: int):
+    """Stand-in data where every customer holds per_customer policies"""
+    policies = customers * per_customer
+    data_dir = seed_data_dir(policies)
+    customer_records = [
+        {
+            "id": f"CUS-{c:05d}",
+            "firstName": "Customer",
+            "lastName": str(c),
+            "email": f"customer{c}@example.com",
+            "phone": "+1-555-0100",
+            "createdAt": CREATED_AT,
+        }
+        for c in range(customers)
+    ]
+    policy_records = []
+    for i in range(policies):
+        policy = make_policy(i)
+        policy["holderEmail"] = customer_records[i % customers]["email"]
+        policy_records.append(policy)
+    payments = [
+        {
+            "id": f"PAY-{i:07d}-{n}",
+            "policyId": policy["id"],
+            "amount": round(policy["premium"] / 2, 2),
+            "paymentDate": policy["startDate"],
+            "paymentMethod": "bank_transfer",
+            "status": "completed",
+            "createdAt": policy["startDate"],
+        }
+        for i, policy in enumerate(policy_records)
+        for n in range(2)
+    ]
+    beneficiaries = [
+        {
+            "id": f"BEN-{i:07d}",
+            "policyId": policy["id"],
+            "firstName": "Beneficiary",
+            "lastName": str(i),
+            "relationship": "spouse",
+            "percentage": 100,
+            "createdAt": policy["startDate"],
+        }
+        for i, policy in enumerate(policy_records)
+        if policy["policyType"] in ("life", "health")
+    ]
+    assessments = [
+        {
+            "id": f"RISK-{i:07d}",
+            "policyId": policy["id"],
+            "riskScore": i % 100,
+            "riskLevel": ("low", "medium", "high", "critical")[i % 4],
+            "factors": ["Synthetic"],
+            "assessmentDate": policy["startDate"],
+            "assessedBy": "benchmark",
+            "createdAt": policy["startDate"],
+        }
+        for i, policy in enumerate(policy_records)
+        if i % 2
+    ]
+    write_json_file("customers.json", customer_records, data_dir)
+    write_json_file("policies.json", policy_records, data_dir)
+    write_json_file("payments.json", payments, data_dir)
+    write_json_file("beneficiaries.json", beneficiaries, data_dir)
+    write_json_file("risk-assessments.json", assessments, data_dir)
+    return data_dir
+
+
+async def hand_joined(client: AsyncInsuranceClient, customer_id: str) -> int:
+    """The N+1 sequence a caller writes today; returns the policy count"""
+    customer = await client.get_customer(customer_id)
+    policies = [
+        p
+        for p in await client.get("/api/policies")
+        if p["holderEmail"] == customer["email"]
+    ]
+    claims = await client.get("/api/claims")
+    beneficiaries = await client.get("/api/beneficiaries")
+    for policy in policies:
+        policy["claims"] = [c for c in claims if c["policyId"] == policy["id"]]
+        policy["beneficiaries"] = [
+            b for b in beneficiaries if b["policyId"] == policy["id"]
+        ]
+        policy["payments"] = await client.get_policy_payments(policy["id"])
+        try:
+            policy["riskAssessment"] = await client.get_risk_assessment(policy["id"])
+        except APIError:
+            policy["riskAssessment"] = None
+    return len(policies)
+
+
+async def timed(client: AsyncInsuranceClient, coroutine) -> dict[str, Any]:
+    requests, received = client.stats.requests, client.stats.bytes_received
+    start = time.perf_counter()
+    await coroutine
+    return {
+        "ms": (time.perf_counter() - start) * 1000,
+        "requests": client.stats.requests - requests,
+        "kb": (client.stats.bytes_received - received) / 1024,
+    }
+
+
+async def run(base_url: str, customers: int, rtt_ms: float) -> dict[str, Any]:
+    async def delay(request):
+        await asyncio.sleep(rtt_ms / 1000)
+
+    async with AsyncInsuranceClient(
+        base_url, event_hooks={"request": [delay]}, page_size=1000
+    ) as client:
+        service = Customer360Service(client)
+        results: dict[str, Any] = {
+            "hand-joined": await timed(client, hand_joined(client, "CUS-00000")),
+            "service, cold": await timed(client, service.view("CUS-00000")),
+            "service, cached view": await timed(client, service.view("CUS-00000")),
+        }
+        view = await service.view("CUS-00000")
+        policy_id = view["policies"][0]["policy"]["id"]
+        await client.create_claim(
+            {
+                "claimNumber": "CLM-360-0001",
+                "policyId": policy_id,
+                "claimType": "theft",
+                "description": "Benchmark claim",
+                "claimAmount": 1200,
+                "status": "pending",
+                "filedDate": CREATED_AT,
+            }
+        )
+        results["service, after claim write"] = await timed(
+            client, service.view("CUS-00000")
+        )
+        results["service, other customer"] = await timed(
+            client, service.view(f"CUS-{customers - 1:05d}")
+        )
+        results["_stats"] = asdict(service.stats)
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--policies-per-customer", type=int, default=300)
+    parser.add_argument(
+        "--rtt-ms", type=float, default=5.0, help="Simulated client-API round trip"
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    data_dir = seed(args.customers, args.policies_per_customer)
+    server = start_in_thread(data_dir)
+    try:
+        results = asyncio.run(run(server.base_url, args.customers, args.rtt_ms))
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    stats = results.pop("_stats")
+    if args.json:
+        print(json.dumps({**results, "stats": stats}, indent=2))
+        return
+
+    print(f"{'mode':<28} {'ms':>9} {'requests':>9} {'KiB':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<28} {r['ms']:>9.1f} {r['requests']:>9} {r['kb']:>9.0f}")
+    print(f"\n{args.policies_per_customer} policies per customer, {stats}")
+
+
+if __name__ == "__main__":
+    main()
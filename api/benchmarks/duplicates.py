@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index benchmark
+Generates a claim book with injected reworded duplicates and reports recall,
+candidates examined per lookup, incremental add+query latency and batch scan
+time against an all-pairs comparison of the same claims
+
+Usage:
+    python -m api.benchmarks.duplicates --claims 200000 --duplicates 2000 --workers 8
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from api.duplicates import ClaimIndex, _filed_day, scan
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+EVENTS = (
+    "rear-ended at a red light",
+    "hail damage to the roof and windshield",
+    "water leak from the upstairs bathroom",
+    "laptop stolen from the parked car",
+    "slipped on ice outside the front door",
+    "kitchen fire started by the stove",
+    "side mirror knocked off in a parking garage",
+    "tree branch fell onto the garage",
+    "emergency room visit after a cycling accident",
+    "burst pipe flooded the basement",
+)
+PLACES = (
+    "Main St",
+    "Oak Ave",
+    "the mall",
+    "Highway 9",
+    "the office",
+    "Elm Rd",
+    "downtown",
+    "the school",
+)
+DETAILS = (
+    "photos attached",
+    "police report filed",
+    "witness statement available",
+    "repair estimate pending",
+    "receipts provided",
+    "no injuries reported",
+)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def make_claim(index: int, policies: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "id": f"CLM-{index:08d}",
+        "policyId": f"POL-{rng.randrange(policies):07d}",
+        "description": (
+            f"{rng.choice(EVENTS)} near {rng.choice(PLACES)} "
+            f"{rng.randrange(1, 999)}, {rng.choice(DETAILS)}"
+        ),
+        "claimAmount": round(rng.uniform(100, 50_000), 2),
+        "filedDate": _iso(EPOCH + timedelta(minutes=rng.randrange(730 * 24 * 60))),
+    }
+
+
+def reword(claim: dict[str, Any], index: int, rng: random.Random) -> dict[str, Any]:
+    """A resubmission: small edits to the text, amount and date"""
+    words = claim["description"].split()
+    if rng.random() < 0.5:
+        words.insert(rng.randrange(len(words)), rng.choice(("the", "our", "my", "a")))
+    else:
+        words[rng.randrange(len(words))] = words[rng.randrange(len(words))]
+    filed = datetime.fromisoformat(claim["filedDate"].replace("Z", "+00:00"))
+    return {
+        **claim,
+        "id": f"CLM-DUP-{index:06d}",
+        "description": " ".join(words),
+        "claimAmount": round(claim["claimAmount"] * rng.uniform(0.96, 1.04), 2),
+        "filedDate": _iso(filed + timedelta(days=rng.uniform(0, 7))),
+    }
+
+
+def brute_force(claims: list[dict[str, Any]], index: ClaimIndex) -> int:
+    """Compare every same-scope pair with the same rules the index verifies"""
+    entries = [index._entry(claim) for claim in claims]
+    found = 0
+    for i, entry in enumerate(entries):
+        for other in entries[:i]:
+            if entry.scope == other.scope and index._match(entry, other):
+                found += 1
+    return found
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--claims", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=int, default=1_000)
+    parser.add_argument("--policies", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--brute-force-sample", type=int, default=3_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    claims = [make_claim(i, args.policies, rng) for i in range(args.claims)]
+    originals = rng.sample(claims, args.duplicates)
+    duplicates = [reword(original, i, rng) for i, original in enumerate(originals)]
+    injected = {
+        dup["id"]: original["id"] for dup, original in zip(duplicates, originals)
+    }
+    claims += duplicates
+    claims.sort(key=lambda c: _filed_day(c["filedDate"]))
+
+    results: dict[str, Any] = {"claims": len(claims)}
+
+    index = ClaimIndex()
+    latencies = []
+    candidates = []
+    found = set()
+    start = time.perf_counter()
+    for claim in claims:
+        candidates.append(len(index._candidates(index._entry(claim))))
+        began = time.perf_counter_ns()
+        matches = index.add_and_query(claim, limit=None)
+        latencies.append(time.perf_counter_ns() - began)
+        for match in matches:
+            found.add(frozenset((match.claimId, match.duplicateOf)))
+    results["incremental"] = {
+        "seconds": time.perf_counter() - start,
+        "p50_us": statistics.median(latencies) / 1000,
+        "p99_us": statistics.quantiles(latencies, n=100)[-1] / 1000,
+        "mean_candidates": statistics.fmean(candidates),
+        "max_candidates": max(candidates),
+        "pairs": len(found),
+        "recall": sum(
+            1 for dup, original in injected.items() if {dup, original} in found
+        )
+        / len(injected),
+    }
+
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        pairs = scan(claims, workers)
+        results[f"scan x{workers}"] = {
+            "seconds": time.perf_counter() - start,
+            "pairs": len(pairs),
+        }
+
+    sample = claims[: args.brute_force_sample]
+    start = time.perf_counter()
+    brute_force(sample, ClaimIndex())
+    sample_seconds = time.perf_counter() - start
+    results["all-pairs"] = {
+        "sample": len(sample),
+        "seconds": sample_seconds,
+        # Pair count grows quadratically with the book
+        "projected_seconds": sample_seconds * (len(claims) / len(sample)) ** 2,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    inc = results["incremental"]
+    print(f"{results['claims']} claims, {len(injected)} injected duplicates")
+    print(
+        f"incremental add+query: {inc['seconds']:.1f}s total, p50 {inc['p50_us']:.0f} us, "
+        f"p99 {inc['p99_us']:.0f} us"
+    )
+    print(
+        f"  candidates per lookup: mean {inc['mean_candidates']:.2f}, "
+        f"max {inc['max_candidates']}"
+    )
+    print(f"  pairs found {inc['pairs']}, recall of injected {inc['recall']:.1%}")
+    for name, r in results.items():
+        if name.startswith("scan"):
+            print(f"{name}: {r['seconds']:.1f}s, {r['pairs']} pairs")
+    brute = results["all-pairs"]
+    print(
+        f"all-pairs on {brute['sample']} claims: {brute['seconds']:.1f}s, "
+        f"projected {brute['projected_seconds'] / 3600:.1f} h for the full book"
+    )
+
+
+if __name__ == "__main__":
+    main()
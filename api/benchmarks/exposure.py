@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Exposure cube benchmark
+Builds the cube over a synthetic policy book with a quota share and an
+excess-of-loss layer, then times drill-down queries, incremental policy
+updates, and the same questions answered by scanning every policy
+
+Usage:
+    python -m api.benchmarks.exposure --policies 500000 --updates 1000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Any
+
+from api.benchmarks.fixtures import make_policy
+from api.exposure import ExposureCube, Treaty, _day, _period
+
+TREATIES = [
+    Treaty(
+        "RI-QS",
+        "Property quota share",
+        "quota_share",
+        share=0.4,
+        limit=200_000,
+        policy_types=("home", "auto"),
+    ),
+    Treaty(
+        "RI-XL",
+        "Per-risk excess of loss",
+        "excess_of_loss",
+        retention=100_000,
+        limit=300_000,
+        effective="2024-07-01T00:00:00.000Z",
+    ),
+]
+QUERIES = [
+    ({}, ["policyType"]),
+    ({"status": "active"}, ["period"]),
+    ({"policyType": ["home", "auto"]}, ["status", "period"]),
+    ({"period": "2025-Q2", "policyType": "life"}, []),
+]
+
+
+def scan(policies: list[dict[str, Any]], where: dict[str, Any], by: list[str]) -> int:
+    """One pass over the book per question, ceding each matching policy"""
+    groups: dict[tuple, list[float]] = {}
+    for policy in policies:
+        values = {
+            "policyType": policy["policyType"],
+            "status": policy["status"],
+            "period": _period(policy["startDate"], "quarter"),
+        }
+        if any(
+            values[d] not in ([v] if isinstance(v, str) else v)
+            for d, v in where.items()
+        ):
+            continue
+        net, start, ceded = policy["coverageAmount"], _day(policy["startDate"]), 0.0
+        for treaty in TREATIES:
+            if (
+                treaty.policy_types and policy["policyType"] not in treaty.policy_types
+            ) or (treaty.effective and start < _day(treaty.effective)):
+                continue
+            above = max(net - treaty.retention, 0.0)
+            if treaty.kind == "excess_of_loss":
+                part = treaty.share * min(above, treaty.limit)
+            else:
+                part = min(treaty.share * above, treaty.limit)
+            ceded += part
+            net -= part
+        total = groups.setdefault(tuple(values[d] for d in by), [0, 0.0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += policy["coverageAmount"]
+        total[2] += policy["premium"]
+        total[3] += ceded
+    return len(groups)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--policies", type=int, default=200_000)
+    parser.add_argument("--updates", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policies = [make_policy(i) for i in range(args.policies)]
+    results: dict[str, Any] = {"policies": len(policies)}
+
+    start = time.perf_counter()
+    cube = ExposureCube(TREATIES)
+    cube.upsert(policies)
+    results["build_seconds"] = time.perf_counter() - start
+    results["cells"] = len(cube.cells)
+
+    results["queries"] = []
+    for where, by in QUERIES:
+        latencies = []
+        for _ in range(args.repeat):
+            began = time.perf_counter_ns()
+            rows = cube.query(where, by)
+            latencies.append(time.perf_counter_ns() - began)
+        start = time.perf_counter()
+        scan(policies, where, by)
+        results["queries"].append(
+            {
+                "where": where,
+                "by": by,
+                "rows": len(rows),
+                "cube_p50_ms": statistics.median(latencies) / 1e6,
+                "scan_ms": (time.perf_counter() - start) * 1000,
+            }
+        )
+
+    batch = [
+        {
+            **policies[rng.randrange(len(policies))],
+            "status": "cancelled",
+            "coverageAmount": 750_000.0,
+        }
+        for _ in range(args.updates)
+    ]
+    start = time.perf_counter()
+    cube.upsert(batch)
+    results["update_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    cube.upsert([policies[0]])
+    results["single_update_ms"] = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{results['policies']} policies into {results['cells']} cells in "
+        f"{results['build_seconds']:.2f}s"
+    )
+    print(f"{'query':<58} {'rows':>5} {'cube ms':>9} {'scan ms':>9}")
+    for q in results["queries"]:
+        label = f"where {q['where'] or '-'} by {','.join(q['by']) or '-'}"
+        print(
+            f"{label:<58} {q['rows']:>5} {q['cube_p50_ms']:>9.3f} {q['scan_ms']:>9.0f}"
+        )
+    print(
+        f"upsert {args.updates} changed policies: {results['update_ms']:.1f} ms, "
+        f"one policy: {results['single_update_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Synthetic collections for benchmarks
+Builds a throwaway data directory shaped like data/ at an arbitrary scale
+"""
+
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from api.benchmarks.storage_layouts import make_record as make_claim
+from api.storage import DATA_DIR, write_json_file
+
+POLICY_TYPES = ("auto", "home", "life", "health")
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def make_policy(index: int) -> dict[str, Any]:
+    rng = random.Random(index)
+    start = EPOCH + timedelta(days=rng.randrange(730))
+    return {
+        "id": f"POL-{index:07d}",
+        "policyNumber": f"INS-2024-{index:06d}",
+        "policyType": POLICY_TYPES[index % len(POLICY_TYPES)],
+        "holderName": f"Holder {index}",
+        "holderEmail": f"holder{index}@example.com",
+        "premium": round(rng.uniform(300, 5000), 2),
+        "coverageAmount": float(rng.choice((25_000, 50_000, 100_000, 250_000, 500_000))),
+        "startDate": _iso(start),
+        "endDate": _iso(start + timedelta(days=365)),
+        "status": "active" if index % 10 else "expired",
+        "createdAt": _iso(start),
+        "updatedAt": _iso(start),
+    }
+
+
+def make_audit_log(index: int) -> dict[str, Any]:
+    return {
+        "id": f"AUD-{index:08d}",
+        "entityType": ("policy", "claim", "payment")[index % 3],
+        "entityId": f"POL-{index % 1000:07d}",
+        "action": ("create", "update", "approve")[index % 3],
+        "performedBy": "benchmark",
+        "timestamp": _iso(EPOCH + timedelta(seconds=index)),
+    }
+
+
+def seed_data_dir(
+    policies: int, claims_per_policy: int = 2, audit_logs: int = 0, target: Optional[Path] = None
+) -> Path:
+    """Copy data/ into a temp dir and replace the hot collections with synthetic ones"""
+    data_dir = target or Path(tempfile.mkdtemp(prefix="insurance-bench-"))
+    shutil.copytree(DATA_DIR, data_dir, dirs_exist_ok=True)
+    write_json_file("policies.json", [make_policy(i) for i in range(policies)], data_dir)
+    write_json_file(
+        "claims.json",
+        [make_claim(i, policies) for i in range(policies * claims_per_policy)],
+        data_dir,
+    )
+    write_json_file("audit-logs.json", [make_audit_log(i) for i in range(audit_logs)], data_dir)
+    return data_dir
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Conditional-request cache benchmark
+Polls /api/policies, /api/claims and /api/audit-trail against the stand-in
+server with and without the client HTTPCache and reports bytes and latency
+
+Usage:
+    python -m api.benchmarks.http_cache --policies 5000 --rounds 50 --write-every 10
+"""
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from api.benchmarks.fixtures import make_policy, seed_data_dir
+from api.client import InsuranceClient
+from api.http_cache import HTTPCache
+from api.standin import start_in_thread
+
+ENDPOINTS = ("/api/policies", "/api/claims", "/api/audit-trail")
+
+
+def poll(
+    base_url: str, rounds: int, write_every: int, cache: Optional[HTTPCache]
+) -> dict[str, Any]:
+    samples = []
+    with InsuranceClient(base_url, cache=cache) as client:
+        for round_number in range(1, rounds + 1):
+            if write_every and round_number % write_every == 0:
+                # Any write bumps the collection version and invalidates its ETag
+                policy = make_policy(round_number)
+                for server_field in ("id", "createdAt", "updatedAt"):
+                    policy.pop(server_field)
+                client.create_policy(policy)
+            for endpoint in ENDPOINTS:
+                start = time.perf_counter()
+                client.get(endpoint)
+                samples.append(time.perf_counter() - start)
+        return {
+            "requests": client.stats.requests,
+            "bytes_received": client.stats.bytes_received,
+            "p50_ms": statistics.median(samples) * 1000,
+            "total_s": sum(samples),
+            "not_modified": cache.stats.hits if cache else 0,
+        }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--policies", type=int, default=5000)
+    parser.add_argument("--audit-logs", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--write-every", type=int, default=10, help="0 disables writes")
+    parser.add_argument("--memory-threshold", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    data_dir = seed_data_dir(args.policies, audit_logs=args.audit_logs)
+    cache_dir = Path(tempfile.mkdtemp(prefix="insurance-cache-"))
+    server = start_in_thread(data_dir)
+    try:
+        results = {
+            "no cache": poll(server.base_url, args.rounds, args.write_every, None),
+            "etag cache": poll(
+                server.base_url,
+                args.rounds,
+                args.write_every,
+                HTTPCache(cache_dir, memory_threshold=args.memory_threshold),
+            ),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{'mode':<12} {'requests':>9} {'304s':>6} {'MB received':>12} {'p50 ms':>8} {'total s':>8}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<12} {r['requests']:>9} {r['not_modified']:>6} "
+            f"{r['bytes_received'] / 1e6:>12.2f} {r['p50_ms']:>8.2f} {r['total_s']:>8.2f}"
+        )
+    baseline, cached = results["no cache"], results["etag cache"]
+    if baseline["bytes_received"]:
+        saved = 1 - cached["bytes_received"] / baseline["bytes_received"]
+        print(f"\nBytes saved: {saved:.1%}, wall time {baseline['total_s']:.2f}s -> {cached['total_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Premium reconciliation benchmark
+Generates a policy book with monthly payment histories and times a full
+reconciliation, an incremental re-run after a batch of new payments, and a
+per-policy loop that filters the payment list for every policy
+
+Usage:
+    python -m api.benchmarks.reconciliation --policies 200000 --new-payments 1000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from api import reconciliation
+from api.benchmarks.fixtures import make_policy
+from api.reconciliation import Reconciler
+
+AS_OF = "2025-06-30T00:00:00.000Z"
+
+
+def make_payments(
+    policies: list[dict[str, Any]], rng: random.Random
+) -> list[dict[str, Any]]:
+    """Monthly installments, some missed, late, failed or doubled up"""
+    payments = []
+    for policy in policies:
+        start = datetime.fromisoformat(policy["startDate"].replace("Z", "+00:00"))
+        installment = round(policy["premium"] / 12, 2)
+        for month in range(rng.choice((12, 12, 12, 11, 9, 6, 3))):
+            paid = start + timedelta(days=month * 30.4 + rng.uniform(-3, 20))
+            payments.append(
+                {
+                    "id": f"PAY-{len(payments):09d}",
+                    "policyId": policy["id"],
+                    "amount": installment * (2 if rng.random() < 0.01 else 1),
+                    "paymentDate": paid.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                    "paymentMethod": "bank_transfer",
+                    "status": "failed" if rng.random() < 0.02 else "completed",
+                    "createdAt": paid.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                }
+            )
+    return payments
+
+
+def per_policy(policies: list[dict[str, Any]], payments: list[dict[str, Any]]) -> int:
+    """Paid-to-date the way an ad-hoc report computes it; returns the underpaid count"""
+    underpaid = 0
+    for policy in policies:
+        paid = sum(
+            p["amount"]
+            for p in payments
+            if p["policyId"] == policy["id"]
+            and p["status"] == "completed"
+            and p["paymentDate"] <= AS_OF
+        )
+        underpaid += paid < policy["premium"]
+    return underpaid
+
+
+def _as_dicts(results: dict[str, Any]) -> dict[str, Any]:
+    return {policy_id: r.as_dict() for policy_id, r in sorted(results.items())}
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--policies", type=int, default=100_000)
+    parser.add_argument("--new-payments", type=int, default=1_000)
+    parser.add_argument("--per-policy-sample", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policies = [make_policy(i) for i in range(args.policies)]
+    payments = make_payments(policies, rng)
+    results: dict[str, Any] = {"policies": len(policies), "payments": len(payments)}
+
+    # One batch for every backend, so their summaries are comparable
+    batch = [
+        {
+            **payments[rng.randrange(len(payments))],
+            "id": f"PAY-NEW-{i:06d}",
+            "paymentDate": "2025-06-15T00:00:00.000Z",
+        }
+        for i in range(args.new_payments)
+    ]
+    outputs = {}
+    backends = [("numpy", reconciliation.numpy), ("pure python", None)]
+    for name, module in backends if reconciliation.numpy is not None else backends[1:]:
+        reconciliation.numpy = module
+        reconciler = Reconciler(policies, payments)
+        full = timed(reconciler.reconcile, AS_OF)
+        cached = timed(reconciler.reconcile, AS_OF)
+        reconciler.apply_payments(batch)
+        incremental = timed(reconciler.reconcile, AS_OF)
+        outputs[name] = _as_dicts(reconciler.results)
+        recomputed = Reconciler(policies, payments + batch).reconcile(AS_OF)
+        results[name] = {
+            "full_seconds": full,
+            "unchanged_seconds": cached,
+            "incremental_seconds": incremental,
+            "incremental_evaluated": reconciler.evaluated,
+            "incremental_matches_full": outputs[name] == _as_dicts(recomputed),
+            **reconciler.summary(),
+        }
+    if len(outputs) > 1:
+        results["backends_agree"] = len({json.dumps(o) for o in outputs.values()}) == 1
+    reconciliation.numpy = backends[0][1]
+
+    sample = policies[: args.per_policy_sample]
+    seconds = timed(per_policy, sample, payments)
+    results["per-policy loop"] = {
+        "sample": len(sample),
+        "seconds": seconds,
+        "projected_seconds": seconds * len(policies) / len(sample),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['policies']} policies, {results['payments']} payments")
+    for name, _ in backends:
+        if name not in results:
+            continue
+        r = results[name]
+        print(
+            f"{name}: full {r['full_seconds']:.2f}s, unchanged re-run "
+            f"{r['unchanged_seconds'] * 1000:.1f} ms, {args.new_payments} new payments "
+            f"{r['incremental_seconds'] * 1000:.1f} ms "
+            f"({r['incremental_evaluated']} policies evaluated)"
+        )
+        print(
+            f"  current {r['current']}, underpaid {r['underpaid']}, lapsed "
+            f"{r['lapsed']}, overpaid {r['overpaid']}, not started {r['not_started']}"
+        )
+        print(
+            f"  incremental output equals a full recompute: {r['incremental_matches_full']}"
+        )
+    if "backends_agree" in results:
+        print(f"backends agree: {results['backends_agree']}")
+    loop = results["per-policy loop"]
+    print(
+        f"per-policy loop on {loop['sample']} policies: {loop['seconds']:.1f}s, "
+        f"projected {loop['projected_seconds'] / 60:.1f} min for the full book"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+Storage backend microbenchmarks
+Reproduces the lib/storage.ts access patterns and compares them with alternative layouts
+
+Layouts:
+    json-file      pretty-printed JSON array per collection (development path)
+    ndjson-log     append-only NDJSON log with an in-process offset index
+    ndjson-segments  api.segments store: rolled segments, sidecar index, mmap reads
+    redis-string   one Redis string per collection filename (production path)
+    redis-hash     one Redis hash per record plus an ID set
+    redis-zset     records in one hash, sorted sets keyed by policyId
+
+Usage:
+    python -m api.benchmarks.storage_layouts --sizes 1000,10000,100000
+    python -m api.benchmarks.storage_layouts --sizes 1000000 --layouts redis-hash,redis-zset
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import textwrap
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from api.segments import SegmentStore
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+OPERATIONS = ("get", "list", "list-by-policy", "append", "update")
+CLAIM_TYPES = ("accident", "theft", "damage", "medical", "other")
+CLAIM_STATUSES = ("pending", "approved", "rejected", "processing")
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def record_id(index: int) -> str:
+    return f"CLM-{index:08d}"
+
+
+def policy_id(index: int, policies: int) -> str:
+    return f"POL-{index % policies:07d}"
+
+
+def make_record(index: int, policies: int) -> dict[str, Any]:
+    """Build a claim shaped like ClaimSchema; deterministic for a given index"""
+    rng = random.Random(index)
+    filed = (EPOCH + timedelta(minutes=index)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return {
+        "id": record_id(index),
+        "claimNumber": f"CLM-2024-{index:08d}",
+        "policyId": policy_id(index, policies),
+        "claimType": CLAIM_TYPES[index % len(CLAIM_TYPES)],
+        "description": "Minor fender bender in parking lot, driver side door dent",
+        "claimAmount": round(rng.uniform(100, 50000), 2),
+        "status": CLAIM_STATUSES[index % len(CLAIM_STATUSES)],
+        "filedDate": filed,
+        "notes": "Generated by storage_layouts benchmark",
+        "createdAt": filed,
+        "updatedAt": filed,
+    }
+
+
+def generate_records(count: int, policies: int) -> Iterator[dict[str, Any]]:
+    for index in range(count):
+        yield make_record(index, policies)
+
+
+def filed_score(record: dict[str, Any]) -> float:
+    filed = datetime.strptime(record["filedDate"], "%Y-%m-%dT%H:%M:%S.%fZ")
+    return filed.replace(tzinfo=timezone.utc).timestamp()
+
+
+class Layout:
+    """Base class for a storage layout; subclasses count every byte they move"""
+
+    name = ""
+
+    def __init__(self):
+        self.bytes_moved = 0
+
+    def load(self, records: Iterable[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def get(self, item_id: str) -> Optional[dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_all(self) -> list[dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_by_policy(self, policy: str) -> list[dict[str, Any]]:
+        return [r for r in self.list_all() if r["policyId"] == policy]
+
+    def append(self, record: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update(self, item_id: str, changes: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonFileLayout(Layout):
+    """readJsonFile/writeJsonFile against the local file system"""
+
+    name = "json-file"
+
+    def __init__(self, workdir: Path):
+        super().__init__()
+        self.path = workdir / "claims.json"
+
+    def load(self, records):
+        # Streams the same bytes as JSON.stringify(data, null, 2)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("[")
+            first = True
+            for record in records:
+                f.write("\n" if first else ",\n")
+                f.write(textwrap.indent(json.dumps(record, indent=2), "  "))
+                first = False
+            f.write("\n]" if not first else "]")
+
+    def _read(self) -> list[dict[str, Any]]:
+        data = self.path.read_bytes()
+        self.bytes_moved += len(data)
+        return json.loads(data)
+
+    def _write(self, items: list[dict[str, Any]]) -> None:
+        data = json.dumps(items, indent=2).encode("utf-8")
+        self.bytes_moved += len(data)
+        self.path.write_bytes(data)
+
+    def get(self, item_id):
+        return next((r for r in self._read() if r["id"] == item_id), None)
+
+    def list_all(self):
+        return self._read()
+
+    def append(self, record):
+        items = self._read()
+        items.append(record)
+        self._write(items)
+
+    def update(self, item_id, changes):
+        items = self._read()
+        for index, item in enumerate(items):
+            if item["id"] == item_id:
+                items[index] = {**item, **changes}
+                break
+        self._write(items)
+
+
+class NdjsonLogLayout(Layout):
+    """Append-only NDJSON log; updates append a new version of the record"""
+
+    name = "ndjson-log"
+
+    def __init__(self, workdir: Path):
+        super().__init__()
+        self.path = workdir / "claims.ndjson"
+        self.offsets: dict[str, tuple[int, int]] = {}
+        self.handle = None
+
+    def load(self, records):
+        offset = 0
+        with open(self.path, "wb") as f:
+            for record in records:
+                line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+                f.write(line)
+                self.offsets[record["id"]] = (offset, len(line))
+                offset += len(line)
+        self.handle = open(self.path, "r+b")
+
+    def _read_at(self, offset: int, length: int) -> dict[str, Any]:
+        self.handle.seek(offset)
+        data = self.handle.read(length)
+        self.bytes_moved += len(data)
+        return json.loads(data)
+
+    def _append_line(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        offset = self.handle.seek(0, os.SEEK_END)
+        self.handle.write(line)
+        self.handle.flush()
+        self.bytes_moved += len(line)
+        self.offsets[record["id"]] = (offset, len(line))
+
+    def get(self, item_id):
+        location = self.offsets.get(item_id)
+        return self._read_at(*location) if location else None
+
+    def list_all(self):
+        # Full scan folding superseded versions, as a reader without the index would
+        self.handle.seek(0)
+        data = self.handle.read()
+        self.bytes_moved += len(data)
+        latest: dict[str, dict[str, Any]] = {}
+        for line in data.splitlines():
+            record = json.loads(line)
+            latest[record["id"]] = record
+        return list(latest.values())
+
+    def append(self, record):
+        self._append_line(record)
+
+    def update(self, item_id, changes):
+        current = self.get(item_id)
+        if current is not None:
+            self._append_line({**current, **changes})
+
+    def close(self):
+        if self.handle:
+            self.handle.close()
+
+
+class SegmentStoreLayout(Layout):
+    """api.segments.SegmentStore, rolling segments at 4 MiB"""
+
+    name = "ndjson-segments"
+
+    def __init__(self, workdir: Path):
+        super().__init__()
+        self.store = SegmentStore(workdir / "claims", max_segment_bytes=4 * 1024 * 1024)
+
+    @staticmethod
+    def _size(record: dict[str, Any]) -> int:
+        return len(json.dumps(record, separators=(",", ":"))) + 1
+
+    def load(self, records):
+        self.store.put_many(records)
+
+    def get(self, item_id):
+        record = self.store.get(item_id)
+        if record is not None:
+            self.bytes_moved += self._size(record)
+        return record
+
+    def list_all(self):
+        records = list(self.store)
+        self.bytes_moved += sum(self._size(r) for r in records)
+        return records
+
+    def append(self, record):
+        self.bytes_moved += self._size(record)
+        self.store.put(record)
+
+    def update(self, item_id, changes):
+        updated = self.store.update(item_id, changes)
+        if updated is not None:
+            self.bytes_moved += self._size(updated)
+
+    def close(self):
+        self.store.close()
+
+
+class RedisLayout(Layout):
+    """Shared connection handling; every key lives under a disposable prefix"""
+
+    def __init__(self, client: "redis.Redis", prefix: str):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+
+    def key(self, *parts: str) -> str:
+        return ":".join((self.prefix, *parts))
+
+    def close(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*", count=10000))
+        for start in range(0, len(keys), 10000):
+            self.client.delete(*keys[start : start + 10000])
+
+
+class RedisStringLayout(RedisLayout):
+    """client.get/client.set of the whole collection, as in production"""
+
+    name = "redis-string"
+
+    def load(self, records):
+        self.client.set(self.key("claims.json"), json.dumps(list(records)))
+
+    def _read(self) -> list[dict[str, Any]]:
+        data = self.client.get(self.key("claims.json")) or b"[]"
+        self.bytes_moved += len(data)
+        return json.loads(data)
+
+    def _write(self, items: list[dict[str, Any]]) -> None:
+        data = json.dumps(items)
+        self.bytes_moved += len(data)
+        self.client.set(self.key("claims.json"), data)
+
+    def get(self, item_id):
+        return next((r for r in self._read() if r["id"] == item_id), None)
+
+    def list_all(self):
+        return self._read()
+
+    def append(self, record):
+        items = self._read()
+        items.append(record)
+        self._write(items)
+
+    def update(self, item_id, changes):
+        items = self._read()
+        for index, item in enumerate(items):
+            if item["id"] == item_id:
+                items[index] = {**item, **changes}
+                break
+        self._write(items)
+
+
+class RedisHashLayout(RedisLayout):
+    """One hash per record with JSON-encoded field values and a set of IDs"""
+
+    name = "redis-hash"
+    batch_size = 1000
+
+    @staticmethod
+    def encode(record: dict[str, Any]) -> dict[str, str]:
+        return {field: json.dumps(value) for field, value in record.items()}
+
+    def decode(self, fields: dict[bytes, bytes]) -> dict[str, Any]:
+        self.bytes_moved += sum(len(k) + len(v) for k, v in fields.items())
+        return {k.decode(): json.loads(v) for k, v in fields.items()}
+
+    def _write(self, pipe, record: dict[str, Any]) -> None:
+        mapping = self.encode(record)
+        self.bytes_moved += sum(len(k) + len(v) for k, v in mapping.items())
+        pipe.hset(self.key("rec", record["id"]), mapping=mapping)
+
+    def load(self, records):
+        pipe = self.client.pipeline(transaction=False)
+        for count, record in enumerate(records, 1):
+            pipe.hset(self.key("rec", record["id"]), mapping=self.encode(record))
+            pipe.sadd(self.key("ids"), record["id"])
+            if count % self.batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+
+    def _fetch(self, ids: list[bytes]) -> list[dict[str, Any]]:
+        items = []
+        for start in range(0, len(ids), self.batch_size):
+            pipe = self.client.pipeline(transaction=False)
+            for item_id in ids[start : start + self.batch_size]:
+                pipe.hgetall(self.key("rec", item_id.decode()))
+            items.extend(self.decode(fields) for fields in pipe.execute() if fields)
+        return items
+
+    def get(self, item_id):
+        fields = self.client.hgetall(self.key("rec", item_id))
+        return self.decode(fields) if fields else None
+
+    def list_all(self):
+        ids = list(self.client.smembers(self.key("ids")))
+        self.bytes_moved += sum(len(i) for i in ids)
+        return self._fetch(ids)
+
+    def append(self, record):
+        pipe = self.client.pipeline(transaction=False)
+        self._write(pipe, record)
+        pipe.sadd(self.key("ids"), record["id"])
+        pipe.execute()
+
+    def update(self, item_id, changes):
+        # Only the changed fields cross the wire
+        pipe = self.client.pipeline(transaction=False)
+        self._write(pipe, {"id": item_id, **changes})
+        pipe.execute()
+
+
+class RedisSortedSetLayout(RedisLayout):
+    """Records in one hash; per-policy sorted sets scored by filedDate"""
+
+    name = "redis-zset"
+    batch_size = 1000
+
+    def _index(self, pipe, record: dict[str, Any], data: str) -> None:
+        pipe.hset(self.key("records"), record["id"], data)
+        pipe.zadd(
+            self.key("by-policy", record["policyId"]),
+            {record["id"]: filed_score(record)},
+        )
+
+    def load(self, records):
+        pipe = self.client.pipeline(transaction=False)
+        for count, record in enumerate(records, 1):
+            self._index(pipe, record, json.dumps(record))
+            if count % self.batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+
+    def get(self, item_id):
+        data = self.client.hget(self.key("records"), item_id)
+        if data is None:
+            return None
+        self.bytes_moved += len(data)
+        return json.loads(data)
+
+    def list_all(self):
+        items = []
+        for _, data in self.client.hscan_iter(self.key("records"), count=self.batch_size):
+            self.bytes_moved += len(data)
+            items.append(json.loads(data))
+        return items
+
+    def list_by_policy(self, policy):
+        ids = self.client.zrange(self.key("by-policy", policy), 0, -1)
+        if not ids:
+            return []
+        values = self.client.hmget(self.key("records"), ids)
+        self.bytes_moved += sum(len(i) for i in ids) + sum(len(v) for v in values if v)
+        return [json.loads(v) for v in values if v]
+
+    def append(self, record):
+        data = json.dumps(record)
+        self.bytes_moved += len(data)
+        pipe = self.client.pipeline(transaction=False)
+        self._index(pipe, record, data)
+        pipe.execute()
+
+    def update(self, item_id, changes):
+        current = self.get(item_id)
+        if current is None:
+            return
+        data = json.dumps({**current, **changes})
+        self.bytes_moved += len(data)
+        self.client.hset(self.key("records"), item_id, data)
+
+
+LAYOUTS = (
+    "json-file",
+    "ndjson-log",
+    "ndjson-segments",
+    "redis-string",
+    "redis-hash",
+    "redis-zset",
+)
+
+
+def build_layout(
+    name: str, workdir: Path, client: Optional["redis.Redis"]
+) -> Optional[Layout]:
+    if name == "json-file":
+        return JsonFileLayout(workdir)
+    if name == "ndjson-log":
+        return NdjsonLogLayout(workdir)
+    if name == "ndjson-segments":
+        return SegmentStoreLayout(workdir)
+    if client is None:
+        return None
+    prefix = f"bench:{os.getpid()}:{name}"
+    return {
+        "redis-string": RedisStringLayout,
+        "redis-hash": RedisHashLayout,
+        "redis-zset": RedisSortedSetLayout,
+    }[name](client, prefix)
+
+
+def connect_redis(url: str) -> Optional["redis.Redis"]:
+    if redis is None:
+        print("redis package not installed - skipping Redis layouts", file=sys.stderr)
+        return None
+    client = redis.Redis.from_url(url)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError as e:
+        print(f"Redis unavailable at {url} ({e}) - skipping Redis layouts", file=sys.stderr)
+        return None
+    return client
+
+
+def summarize(samples: list[int], bytes_moved: int) -> dict[str, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "ops": len(samples),
+        "p50_ms": statistics.median(ordered) / 1e6,
+        "p95_ms": p95 / 1e6,
+        "bytes_per_op": bytes_moved / len(samples),
+    }
+
+
+def run_operation(
+    layout: Layout, op: str, size: int, policies: int, iterations: int, rng: random.Random
+) -> dict[str, float]:
+    actions: dict[str, Callable[[int], Any]] = {
+        "get": lambda i: layout.get(record_id(rng.randrange(size))),
+        "list": lambda i: layout.list_all(),
+        "list-by-policy": lambda i: layout.list_by_policy(
+            policy_id(rng.randrange(policies), policies)
+        ),
+        "append": lambda i: layout.append(make_record(size + 10_000_000 + i, policies)),
+        "update": lambda i: layout.update(
+            record_id(rng.randrange(size)), {"status": "processing", "notes": f"rev {i}"}
+        ),
+    }
+    action = actions[op]
+    layout.bytes_moved = 0
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        action(i)
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples, layout.bytes_moved)
+
+
+def run_benchmark(args: argparse.Namespace) -> list[dict[str, Any]]:
+    client = None
+    if any(name.startswith("redis-") for name in args.layouts):
+        client = connect_redis(args.redis_url)
+
+    results = []
+    for size in args.sizes:
+        policies = max(1, size // args.claims_per_policy)
+        for name in args.layouts:
+            workdir = Path(tempfile.mkdtemp(prefix="storage-bench-"))
+            layout = build_layout(name, workdir, client)
+            if layout is None:
+                shutil.rmtree(workdir, ignore_errors=True)
+                continue
+            try:
+                start = time.perf_counter()
+                layout.load(generate_records(size, policies))
+                load_seconds = time.perf_counter() - start
+                print(f"{name:<15} n={size:<9} loaded in {load_seconds:.2f}s", file=sys.stderr)
+
+                for op in args.ops:
+                    # Whole-collection reads are O(n); cap their repetitions at scale
+                    iterations = args.iterations
+                    if op in ("list", "list-by-policy") and size >= 1_000_000:
+                        iterations = min(iterations, 3)
+                    rng = random.Random(args.seed)
+                    stats = run_operation(layout, op, size, policies, iterations, rng)
+                    results.append({"layout": name, "size": size, "op": op, **stats})
+            finally:
+                layout.close()
+                shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def print_report(results: list[dict[str, Any]]) -> None:
+    header = f"{'layout':<15} {'records':>10} {'op':<15} {'p50 ms':>10} {'p95 ms':>10} {'bytes/op':>14}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['layout']:<15} {r['size']:>10} {r['op']:<15} "
+            f"{r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['bytes_per_op']:>14,.0f}"
+        )
+
+
+def parse_list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=lambda v: [int(s) for s in parse_list(v)],
+        default=[1_000, 10_000, 100_000],
+        help="comma-separated record counts (up to 10000000)",
+    )
+    parser.add_argument("--layouts", type=parse_list, default=list(LAYOUTS))
+    parser.add_argument("--ops", type=parse_list, default=list(OPERATIONS))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--claims-per-policy", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379")
+    )
+    parser.add_argument("--json", dest="json_path", help="also write raw results here")
+    args = parser.parse_args()
+
+    unknown = set(args.layouts) - set(LAYOUTS) | set(args.ops) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown layouts/ops: {', '.join(sorted(unknown))}")
+
+    results = run_benchmark(args)
+    print_report(results)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
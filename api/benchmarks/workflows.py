@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Workflow tool benchmark
+Runs the quote-to-policy and claim adjudication chains against the stand-in
+server as separate MCP tool calls and as one workflow tool call each, and
+reports tool calls per flow plus measured and modeled end-to-end latency
+
+Usage:
+    python -m api.benchmarks.workflows --iterations 50 --rtt-ms 20 --turn-ms 800
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+
+from fastmcp import Client
+
+import api.mcp_server as mcp_server
+from api.benchmarks.fixtures import seed_data_dir
+from api.client import AsyncInsuranceClient
+from api.standin import start_in_thread
+from api.storage import get_current_timestamp
+
+QUOTE = {
+    "policyType": "auto",
+    "coverageAmount": 50000,
+    "customerEmail": "jane@example.com",
+    "customerName": "Jane Doe",
+}
+ASSESSMENT = {
+    "riskScore": 35,
+    "riskLevel": "medium",
+    "factors": ["Urban area", "Clean driving record"],
+    "assessedBy": "benchmark",
+}
+
+
+class CountingClient:
+    """Wraps a fastmcp Client and counts call_tool invocations"""
+
+    def __init__(self, client: Client):
+        self.client = client
+        self.calls = 0
+
+    async def tool(self, name: str, **arguments: Any) -> Any:
+        self.calls += 1
+        return (await self.client.call_tool(name, arguments)).data
+
+
+async def quote_chain(mcp: CountingClient, claim_id: str) -> None:
+    quote = await mcp.tool("createQuote", **QUOTE)
+    await mcp.tool("updateQuote", id=quote["id"], status="approved")
+    policy = await mcp.tool("convertQuoteToPolicy", id=quote["id"])
+    await mcp.tool(
+        "createRiskAssessment",
+        policyId=policy["id"],
+        assessmentDate=get_current_timestamp(),
+        **ASSESSMENT,
+    )
+
+
+async def quote_workflow(mcp: CountingClient, claim_id: str) -> None:
+    await mcp.tool("issuePolicyFromQuote", quote=QUOTE, **ASSESSMENT)
+
+
+async def claim_chain(mcp: CountingClient, claim_id: str) -> None:
+    claim = await mcp.tool("getClaimById", id=claim_id)
+    analysis = await mcp.tool("analyzeFraud", claimId=claim["id"])
+    if analysis["recommendation"] == "approve":
+        await mcp.tool("approveClaim", id=claim_id)
+    elif analysis["recommendation"] == "reject":
+        await mcp.tool("rejectClaim", id=claim_id)
+
+
+async def claim_workflow(mcp: CountingClient, claim_id: str) -> None:
+    await mcp.tool("adjudicateClaim", claimId=claim_id)
+
+
+FLOWS: dict[str, tuple[Callable, Callable]] = {
+    "quote -> policy -> risk": (quote_chain, quote_workflow),
+    "claim -> fraud -> decision": (claim_chain, claim_workflow),
+}
+
+
+async def make_claims(count: int) -> list[str]:
+    """Fresh pending claims so every iteration has something to adjudicate"""
+    client = mcp_server.get_client()
+    claims = await asyncio.gather(
+        *(
+            client.create_claim(
+                {
+                    "claimNumber": f"CLM-BENCH-{i:05d}",
+                    "policyId": "POL-001",
+                    "claimType": "accident",
+                    "description": "Benchmark claim",
+                    "claimAmount": 500 + (i % 3) * 7000,
+                    "status": "pending",
+                    "filedDate": get_current_timestamp(),
+                    "notes": None if i % 2 else "Photos attached",
+                }
+            )
+            for i in range(count)
+        )
+    )
+    return [claim["id"] for claim in claims]
+
+
+async def measure(
+    client: Client,
+    flow: Callable[[CountingClient, str], Awaitable[None]],
+    claim_ids: list[str],
+    turn_ms: float,
+) -> dict[str, Any]:
+    mcp = CountingClient(client)
+    samples = []
+    for claim_id in claim_ids:
+        start = time.perf_counter()
+        await flow(mcp, claim_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    calls = mcp.calls / len(claim_ids)
+    p50 = statistics.median(samples)
+    return {
+        "tool_calls": calls,
+        "p50_ms": p50,
+        "p95_ms": statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else p50,
+        # Every tool call is one more agent turn on top of the measured latency
+        "modeled_ms": p50 + calls * turn_ms,
+    }
+
+
+async def run(iterations: int, turn_ms: float) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    async with Client(mcp_server.mcp) as client:
+        for name, (chain, workflow) in FLOWS.items():
+            results[name] = {
+                "separate tools": await measure(
+                    client, chain, await make_claims(iterations), turn_ms
+                ),
+                "workflow tool": await measure(
+                    client, workflow, await make_claims(iterations), turn_ms
+                ),
+            }
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--policies", type=int, default=1000)
+    parser.add_argument(
+        "--rtt-ms",
+        type=float,
+        default=20.0,
+        help="Simulated round trip between the MCP server and the API",
+    )
+    parser.add_argument(
+        "--turn-ms",
+        type=float,
+        default=800.0,
+        help="Modeled agent/LLM turn latency charged per tool call",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    async def delay(request):
+        await asyncio.sleep(args.rtt_ms / 1000)
+
+    data_dir = seed_data_dir(args.policies)
+    server = start_in_thread(data_dir)
+    try:
+        mcp_server._client = AsyncInsuranceClient(
+            server.base_url, event_hooks={"request": [delay]}
+        )
+        results = asyncio.run(run(args.iterations, args.turn_ms))
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"{'flow':<28} {'mode':<15} {'tool calls':>10} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'modeled ms':>11}"
+    )
+    for name, modes in results.items():
+        for mode, r in modes.items():
+            print(
+                f"{name:<28} {mode:<15} {r['tool_calls']:>10.2f} {r['p50_ms']:>9.1f} "
+                f"{r['p95_ms']:>9.1f} {r['modeled_ms']:>11.1f}"
+            )
+    print(
+        f"\nmodeled = p50 + tool calls x {args.turn_ms:.0f} ms agent turn; "
+        f"API round trip simulated at {args.rtt_ms:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+"""
+Python client for the Insurance Management API
+Thin httpx wrapper mirroring apiRequest in app/mcp/route.ts, with an optional
+conditional-request cache for GETs and lazy paginated iterators for list routes
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+import httpx
+
+from api.http_cache import HTTPCache
+
+DEFAULT_BASE_URL = "http://localhost:3000"
+DEFAULT_API_KEY = "demo-key-12345"
+DEFAULT_PAGE_SIZE = 100
+
+
+class APIError(Exception):
+    """Non-2xx response from the API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+@dataclass
+class ClientStats:
+    requests: int = 0
+    bytes_received: int = 0
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        error = response.json()
+    except ValueError:
+        return response.reason_phrase or f"API request failed: {response.status_code}"
+    if isinstance(error, dict):
+        return (
+            error.get("error")
+            or error.get("message")
+            or f"API request failed: {response.status_code}"
+        )
+    return f"API request failed: {response.status_code}"
+
+
+def _page_params(
+    filters: dict[str, Any], page_size: int, cursor: Optional[str]
+) -> dict[str, Any]:
+    return {**filters, "limit": page_size, "cursor": cursor}
+
+
+# Record date that from/to/since bound on each list route, as in api.standin
+DATE_FIELDS = {
+    "/api/policies": "startDate",
+    "/api/claims": "filedDate",
+    "/api/payments": "paymentDate",
+    "/api/audit-trail": "timestamp",
+    "/api/documents": "uploadedAt",
+    "/api/renewals": "renewalDate",
+    "/api/risk-assessment": "assessmentDate",
+    "/api/fraud-detection/reports": "analyzedAt",
+}
+DATE_PARAMS = ("from", "to", "since")
+PAGING_PARAMS = ("limit", "cursor")
+
+
+def _moment(value: str) -> datetime:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _local_filter(
+    path: str, params: dict[str, Any]
+) -> Callable[[dict[str, Any]], bool]:
+    """Stand-in query semantics: date bounds, and equality on every other field"""
+    try:
+        since, until, after = (
+            _moment(params[name]) if params.get(name) else None for name in DATE_PARAMS
+        )
+    except ValueError as e:
+        raise APIError(400, f"Invalid date filter: {e}") from e
+    equal = {
+        name: value
+        for name, value in params.items()
+        if value is not None and name not in DATE_PARAMS + PAGING_PARAMS
+    }
+    date_field = DATE_FIELDS.get(path, "createdAt")
+
+    def matches(item: dict[str, Any]) -> bool:
+        if any(item.get(name) != value for name, value in equal.items()):
+            return False
+        if since or until or after:
+            value = item.get(date_field)
+            if not value:
+                return False
+            moment = _moment(value)
+            if (since and moment < since) or (until and moment > until):
+                return False
+            if after and moment <= after:
+                return False
+        return True
+
+    return matches
+
+
+def _as_page(path: str, body: Any, params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Normalise a list route's response to the {"items", "nextCursor"} envelope
+    The Next.js routes return the whole collection as a plain array whatever
+    the query, so filters, limit and cursor are applied here instead; the
+    cursor is then an offset into that array
+    """
+    if not isinstance(body, list):
+        return body
+    matches = _local_filter(path, params)
+    limit, cursor = params.get("limit"), params.get("cursor")
+    if limit is None and cursor is None:
+        return {"items": [item for item in body if matches(item)], "nextCursor": None}
+    try:
+        position = int(cursor) if cursor is not None else 0
+    except ValueError:
+        raise APIError(400, "Malformed cursor") from None
+    page = []
+    while position < len(body) and (limit is None or len(page) < limit):
+        item = body[position]
+        position += 1
+        if matches(item):
+            page.append(item)
+    return {
+        "items": page,
+        "nextCursor": str(position) if position < len(body) else None,
+    }
+
+
+class _Endpoints:
+    """
+    Named routes shared by both clients
+    Each helper returns whatever get/post/iterate return, so the same method is
+    a plain call on InsuranceClient and awaitable on AsyncInsuranceClient
+    """
+
+    # Policies
+    def list_policies(self, **params: Any):
+        return self.list_page("/api/policies", **params)
+
+    def iter_policies(self, **filters: Any):
+        return self.iterate("/api/policies", **filters)
+
+    def get_policy(self, policy_id: str):
+        return self.get(f"/api/policies/{policy_id}")
+
+    def create_policy(self, policy: dict[str, Any]):
+        return self.post("/api/policies", policy)
+
+    def update_policy(self, policy_id: str, updates: dict[str, Any]):
+        return self.put(f"/api/policies/{policy_id}", updates)
+
+    def delete_policy(self, policy_id: str):
+        return self.delete(f"/api/policies/{policy_id}")
+
+    # Claims
+    def list_claims(self, **params: Any):
+        return self.list_page("/api/claims", **params)
+
+    def iter_claims(self, **filters: Any):
+        return self.iterate("/api/claims", **filters)
+
+    def get_claim(self, claim_id: str):
+        return self.get(f"/api/claims/{claim_id}")
+
+    def create_claim(self, claim: dict[str, Any]):
+        return self.post("/api/claims", claim)
+
+    def update_claim(self, claim_id: str, updates: dict[str, Any]):
+        return self.put(f"/api/claims/{claim_id}", updates)
+
+    def delete_claim(self, claim_id: str):
+        return self.delete(f"/api/claims/{claim_id}")
+
+    def approve_claim(self, claim_id: str):
+        return self.post(f"/api/claims/{claim_id}/approve")
+
+    def reject_claim(self, claim_id: str):
+        return self.post(f"/api/claims/{claim_id}/reject")
+
+    # Risk assessment
+    def create_risk_assessment(self, assessment: dict[str, Any]):
+        return self.post("/api/risk-assessment", assessment)
+
+    def get_risk_assessment(self, policy_id: str):
+        return self.get(f"/api/risk-assessment/{policy_id}")
+
+    # Quotes
+    def list_quotes(self, **params: Any):
+        return self.get("/api/quotes", **params)
+
+    def get_quote(self, quote_id: str):
+        return self.get(f"/api/quotes/{quote_id}")
+
+    def create_quote(self, quote: dict[str, Any]):
+        return self.post("/api/quotes", quote)
+
+    def update_quote(self, quote_id: str, updates: dict[str, Any]):
+        return self.put(f"/api/quotes/{quote_id}", updates)
+
+    def convert_quote(self, quote_id: str):
+        return self.post(f"/api/quotes/{quote_id}/convert")
+
+    # Fraud detection
+    def analyze_fraud(self, claim_id: str):
+        return self.post("/api/fraud-detection/analyze", {"claimId": claim_id})
+
+    # Customers and beneficiaries
+    def get_customer(self, customer_id: str):
+        return self.get(f"/api/customers/{customer_id}")
+
+    def iter_customers(self, **filters: Any):
+        return self.iterate("/api/customers", **filters)
+
+    def iter_beneficiaries(self, **filters: Any):
+        return self.iterate("/api/beneficiaries", **filters)
+
+    # Payments
+    def list_payments(self, **params: Any):
+        return self.list_page("/api/payments", **params)
+
+    def iter_payments(self, **filters: Any):
+        return self.iterate("/api/payments", **filters)
+
+    def get_policy_payments(self, policy_id: str, **params: Any):
+        return self.get(f"/api/payments/policy/{policy_id}", **params)
+
+    # Audit trail
+    def list_audit_trail(self, **params: Any):
+        return self.list_page("/api/audit-trail", **params)
+
+    def iter_audit_trail(self, **filters: Any):
+        return self.iterate("/api/audit-trail", **filters)
+
+
+class _ClientBase(_Endpoints):
+    """Configuration, cache bookkeeping and response handling shared by both clients"""
+
+    def __init__(
+        self,
+        base_url: Optional[str],
+        api_key: Optional[str],
+        cache: Optional[HTTPCache],
+        page_size: int,
+    ):
+        self.base_url = (
+            base_url or os.getenv("API_BASE_URL", DEFAULT_BASE_URL)
+        ).rstrip("/")
+        self.headers = {
+            "X-API-Key": api_key or os.getenv("API_KEY", DEFAULT_API_KEY),
+            "Accept": "application/json",
+        }
+        self.cache = cache
+        self.page_size = page_size
+        self.stats = ClientStats()
+        self._stats_lock = threading.Lock()
+        # Called as listener(method, path, result) after every successful write
+        self.write_listeners: list[Callable[[str, str, Any], None]] = []
+
+    def _prepare(
+        self, method: str, params: Optional[dict[str, Any]]
+    ) -> tuple[str, dict[str, Any], bool]:
+        method = method.upper()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        return method, params, self.cache is not None and method == "GET"
+
+    def _conditional_headers(self, key: str, use_cache: bool) -> dict[str, str]:
+        return self.cache.conditional_headers(key) if use_cache else {}
+
+    def _record(self, response: httpx.Response) -> None:
+        with self._stats_lock:
+            self.stats.requests += 1
+            self.stats.bytes_received += response.num_bytes_downloaded
+
+    def _result(self, response: httpx.Response, key: str, use_cache: bool) -> Any:
+        if response.is_error:
+            raise APIError(response.status_code, _error_message(response))
+        result = response.json() if response.content else None
+        if use_cache:
+            self.cache.miss()
+            self.cache.store(key, response.headers, response.content, result)
+        if self.write_listeners and response.request.method != "GET":
+            for listener in self.write_listeners:
+                listener(response.request.method, response.request.url.path, result)
+        return result
+
+
+class InsuranceClient(_ClientBase):
+    """Synchronous client; pass an HTTPCache to revalidate GETs instead of re-downloading"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        cache: Optional[HTTPCache] = None,
+        timeout: float = 30.0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        **httpx_options: Any,
+    ):
+        super().__init__(base_url, api_key, cache, page_size)
+        self._http = httpx.Client(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=timeout,
+            **httpx_options,
+        )
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        if self._prefetcher:
+            self._prefetcher.shutdown(wait=True, cancel_futures=True)
+        self._http.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict[str, Any]] = None,
+        json: Any = None,
+    ) -> Any:
+        """Send a request and return the decoded JSON body; raises APIError on failure"""
+        method, params, use_cache = self._prepare(method, params)
+        key = str(self._http.build_request(method, path, params=params).url)
+
+        response = self._http.request(
+            method,
+            path,
+            params=params,
+            json=json,
+            headers=self._conditional_headers(key, use_cache),
+        )
+        self._record(response)
+
+        if use_cache and response.status_code == 304:
+            try:
+                return self.cache.revalidated(key, response.headers)
+            except KeyError:
+                # Evicted between the lookup and the response; fetch unconditionally
+                response = self._http.request(method, path, params=params)
+                self._record(response)
+
+        return self._result(response, key, use_cache)
+
+    def get(self, path: str, **params: Any) -> Any:
+        return self.request("GET", path, params=params)
+
+    def list_page(self, path: str, **params: Any) -> dict[str, Any]:
+        """One {"items", "nextCursor"} page of a list route, on either backend"""
+        return _as_page(path, self.get(path, **params), params)
+
+    def post(self, path: str, body: Any = None) -> Any:
+        return self.request("POST", path, json=body)
+
+    def put(self, path: str, body: Any) -> Any:
+        return self.request("PUT", path, json=body)
+
+    def delete(self, path: str) -> Any:
+        return self.request("DELETE", path)
+
+    def iter_pages(
+        self,
+        path: str,
+        page_size: Optional[int] = None,
+        prefetch: bool = True,
+        **filters: Any,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Lazily walk a cursor-paginated list route page by page
+        With prefetch, the next page is requested on a background thread while
+        the caller is still working through the current one
+        """
+        page_size = page_size or self.page_size
+        if prefetch and self._prefetcher is None:
+            self._prefetcher = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="insurance-prefetch"
+            )
+
+        def fetch(cursor: Optional[str]) -> dict[str, Any]:
+            # A plain-array body is the whole collection, so it is one page
+            body = self.get(path, **_page_params(filters, page_size, cursor))
+            return _as_page(path, body, filters)
+
+        page = fetch(None)
+        pending = None
+        try:
+            while True:
+                cursor = page.get("nextCursor")
+                if cursor and prefetch:
+                    pending = self._prefetcher.submit(fetch, cursor)
+                if page["items"]:
+                    yield page["items"]
+                if not cursor:
+                    return
+                page = pending.result() if pending else fetch(cursor)
+                pending = None
+        finally:
+            # Caller stopped early; don't leave a request in flight
+            if pending is not None:
+                pending.cancel()
+
+    def iterate(
+        self,
+        path: str,
+        page_size: Optional[int] = None,
+        prefetch: bool = True,
+        **filters: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """Lazily yield every record of a list route, one page in flight ahead"""
+        for page in self.iter_pages(path, page_size, prefetch, **filters):
+            yield from page
+
+
+class AsyncInsuranceClient(_ClientBase):
+    """asyncio counterpart of InsuranceClient for concurrent fan-out"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        cache: Optional[HTTPCache] = None,
+        timeout: float = 30.0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        **httpx_options: Any,
+    ):
+        super().__init__(base_url, api_key, cache, page_size)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=timeout,
+            **httpx_options,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict[str, Any]] = None,
+        json: Any = None,
+    ) -> Any:
+        """Send a request and return the decoded JSON body; raises APIError on failure"""
+        method, params, use_cache = self._prepare(method, params)
+        key = str(self._http.build_request(method, path, params=params).url)
+
+        response = await self._http.request(
+            method,
+            path,
+            params=params,
+            json=json,
+            headers=self._conditional_headers(key, use_cache),
+        )
+        self._record(response)
+
+        if use_cache and response.status_code == 304:
+            try:
+                return self.cache.revalidated(key, response.headers)
+            except KeyError:
+                response = await self._http.request(method, path, params=params)
+                self._record(response)
+
+        return self._result(response, key, use_cache)
+
+    async def get(self, path: str, **params: Any) -> Any:
+        return await self.request("GET", path, params=params)
+
+    async def list_page(self, path: str, **params: Any) -> dict[str, Any]:
+        return _as_page(path, await self.get(path, **params), params)
+
+    async def post(self, path: str, body: Any = None) -> Any:
+        return await self.request("POST", path, json=body)
+
+    async def put(self, path: str, body: Any) -> Any:
+        return await self.request("PUT", path, json=body)
+
+    async def delete(self, path: str) -> Any:
+        return await self.request("DELETE", path)
+
+    async def iter_pages(
+        self,
+        path: str,
+        page_size: Optional[int] = None,
+        prefetch: bool = True,
+        **filters: Any,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Async version of InsuranceClient.iter_pages; prefetches with a task"""
+        page_size = page_size or self.page_size
+
+        async def fetch(cursor: Optional[str]) -> dict[str, Any]:
+            body = await self.get(path, **_page_params(filters, page_size, cursor))
+            return _as_page(path, body, filters)
+
+        page = await fetch(None)
+        pending: Optional[asyncio.Task] = None
+        try:
+            while True:
+                cursor = page.get("nextCursor")
+                if cursor and prefetch:
+                    pending = asyncio.create_task(fetch(cursor))
+                if page["items"]:
+                    yield page["items"]
+                if not cursor:
+                    return
+                page = await pending if pending else await fetch(cursor)
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def iterate(
+        self,
+        path: str,
+        page_size: Optional[int] = None,
+        prefetch: bool = True,
+        **filters: Any,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Lazily yield every record of a list route, one page in flight ahead"""
+        async for page in self.iter_pages(path, page_size, prefetch, **filters):
+            for item in page:
+                yield item
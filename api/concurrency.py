@@ -0,0 +1,71 @@
+"""
+Bounded concurrent execution for bulk API work
+Runs one coroutine per item under a parallelism cap and reports per-item
+outcomes instead of failing the whole batch on the first error
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass
+class ItemResult:
+    """Outcome of one item in a bulk run, in input order"""
+
+    index: int
+    ok: bool
+    result: Any = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        if self.ok:
+            return {"index": self.index, "ok": True, "result": self.result}
+        return {"index": self.index, "ok": False, "error": self.error}
+
+
+async def gather_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[Any]],
+    concurrency: int,
+    on_progress: Optional[ProgressCallback] = None,
+) -> list[ItemResult]:
+    """
+    Apply worker to every item with at most `concurrency` calls in flight
+    on_progress(done, total) is awaited after each item completes
+    """
+    items = list(items)
+    total = len(items)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+    progress_lock = asyncio.Lock()
+
+    async def run(index: int, item: T) -> ItemResult:
+        nonlocal done
+        async with semaphore:
+            try:
+                outcome = ItemResult(index, True, result=await worker(item))
+            except Exception as e:
+                outcome = ItemResult(index, False, error=str(e) or type(e).__name__)
+        if on_progress is not None:
+            async with progress_lock:
+                done += 1
+                await on_progress(done, total)
+        return outcome
+
+    return await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+
+
+def summarize(results: list[ItemResult]) -> dict[str, Any]:
+    """Tool-friendly summary: counts plus per-item outcomes"""
+    succeeded = sum(1 for r in results if r.ok)
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": [r.as_dict() for r in results],
+    }
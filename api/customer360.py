@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Customer 360 aggregation
+Assembles a customer's policies, claims, payments, beneficiaries and risk
+assessments in one call: independent fetches fan out concurrently, results are
+joined through hash indexes keyed by email and policy ID, and assembled views
+are cached until a record they were built from changes
+
+Usage:
+    python -m api.customer360 CUS-001
+    python -m api.customer360 CUS-001 --json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from api.client import AsyncInsuranceClient
+from api.risk import get_assessment
+from api.storage import get_current_timestamp
+
+DEFAULT_TTL = 300.0
+
+# Collections pulled in one paginated scan each, and the field they join on.
+# Risk assessments have no list route, so they are fetched per policy instead.
+JOIN_KEYS = {
+    "policies": "holderEmail",
+    "claims": "policyId",
+    "payments": "policyId",
+    "beneficiaries": "policyId",
+}
+ID_PREFIXES = {
+    "CUS": "customers",
+    "POL": "policies",
+    "CLM": "claims",
+    "PAY": "payments",
+    "BEN": "beneficiaries",
+    "RISK": "risk-assessment",
+}
+RISK_ORDER = ("low", "medium", "high", "critical")
+OPEN_CLAIM_STATUSES = ("pending", "processing")
+
+
+def _email_key(value: Any) -> Optional[str]:
+    # Emails are matched case-insensitively; policy IDs are already canonical
+    return value.lower() if isinstance(value, str) else None
+
+
+def _id_key(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+
+class CollectionIndex:
+    """One collection hashed by ID and grouped by its join key"""
+
+    def __init__(
+        self,
+        key: str,
+        records: Iterable[dict[str, Any]] = (),
+        normalize: Callable[[Any], Optional[str]] = _id_key,
+    ):
+        self.key = key
+        self.normalize = normalize
+        self.by_id: dict[str, dict[str, Any]] = {}
+        self.groups: dict[str, dict[str, dict[str, Any]]] = {}
+        for record in records:
+            self.upsert(record)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, value: str) -> list[dict[str, Any]]:
+        return list(self.groups.get(self.normalize(value), {}).values())
+
+    def upsert(self, record: dict[str, Any]) -> set[str]:
+        """Insert or replace a record; returns the join values it left and entered"""
+        affected = self.remove(record["id"])
+        value = self.normalize(record.get(self.key))
+        self.by_id[record["id"]] = record
+        if value is not None:
+            self.groups.setdefault(value, {})[record["id"]] = record
+            affected.add(value)
+        return affected
+
+    def remove(self, record_id: str) -> set[str]:
+        record = self.by_id.pop(record_id, None)
+        value = self.normalize(record.get(self.key)) if record else None
+        if value is None:
+            return set()
+        group = self.groups[value]
+        del group[record_id]
+        if not group:
+            del self.groups[value]
+        return {value}
+
+
+@dataclass
+class Customer360Stats:
+    views_built: int = 0
+    cache_hits: int = 0
+    invalidations: int = 0
+    index_loads: int = 0
+    assessment_fetches: int = 0
+
+
+class Customer360Service:
+    """
+    Builds and caches customer views
+
+    A view depends on its customer, the customer's email (new policies join on
+    it) and each of its policies (claims, payments, beneficiaries and risk
+    assessments join on those). Writes made through the client are routed to
+    those dependencies, so only the affected views are dropped; changes made
+    by other processes are picked up once the ttl expires.
+    """
+
+    def __init__(
+        self,
+        client: AsyncInsuranceClient,
+        ttl: float = DEFAULT_TTL,
+        concurrency: int = 16,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.stats = Customer360Stats()
+        self._indexes: dict[str, CollectionIndex] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._loading: dict[str, asyncio.Future] = {}
+        # Writes seen while a scan is in flight, replayed onto its result
+        self._replay: dict[str, list[Callable[[CollectionIndex], Any]]] = {}
+        self._assessments: dict[str, tuple[float, Optional[dict[str, Any]]]] = {}
+        self._views: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._view_deps: dict[str, set[tuple[str, str]]] = {}
+        self._dependents: dict[tuple[str, str], set[str]] = {}
+        self._epoch = 0
+        client.write_listeners.append(self.on_write)
+
+    def _fresh(self, loaded_at: Optional[float]) -> bool:
+        return loaded_at is not None and time.monotonic() - loaded_at < self.ttl
+
+    # Invalidation
+
+    def _invalidate(self, *dependencies: tuple[str, str]) -> None:
+        self._epoch += 1
+        for dependency in dependencies:
+            for customer_id in self._dependents.pop(dependency, set()):
+                self._drop_view(customer_id)
+
+    def _drop_view(self, customer_id: str) -> None:
+        if self._views.pop(customer_id, None) is not None:
+            self.stats.invalidations += 1
+        for dependency in self._view_deps.pop(customer_id, ()):
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(customer_id)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def _apply(self, collection: str, change: Callable[[CollectionIndex], set]) -> set:
+        affected = set()
+        if collection in self._indexes:
+            affected = change(self._indexes[collection])
+        if collection in self._loading:
+            self._replay.setdefault(collection, []).append(change)
+        return affected
+
+    def record_changed(self, collection: str, record: dict[str, Any]) -> None:
+        """Fold a created or updated record into the indexes and drop stale views"""
+        record_id = record["id"]
+        if collection == "customers":
+            self._invalidate(("customer", record_id))
+        elif collection == "policies":
+            emails = self._apply(collection, lambda index: index.upsert(record))
+            emails.add(_email_key(record.get("holderEmail")))
+            self._invalidate(
+                ("policy", record_id), *(("email", e) for e in emails if e)
+            )
+        elif collection == "risk-assessment" and record.get("policyId"):
+            # The API serves a policy's first assessment, so a new one only
+            # changes the view when the policy had none cached
+            cached = self._assessments.get(record["policyId"])
+            if cached is not None and cached[1] is None:
+                self._assessments.pop(record["policyId"])
+                self._invalidate(("policy", record["policyId"]))
+        elif collection in JOIN_KEYS:
+            policy_ids = self._apply(collection, lambda index: index.upsert(record))
+            policy_ids.add(_id_key(record.get("policyId")))
+            self._invalidate(*(("policy", p) for p in policy_ids if p))
+
+    def record_deleted(self, collection: str, record_id: str) -> None:
+        if collection == "customers":
+            self._invalidate(("customer", record_id))
+            return
+        if collection not in JOIN_KEYS:
+            return
+        values = self._apply(collection, lambda index: index.remove(record_id))
+        if collection == "policies":
+            self._assessments.pop(record_id, None)
+            self._invalidate(("policy", record_id), *(("email", e) for e in values))
+        else:
+            self._invalidate(*(("policy", p) for p in values))
+
+    def on_write(self, method: str, path: str, result: Any) -> None:
+        """AsyncInsuranceClient write listener"""
+        parts = path.strip("/").split("/")
+        if method == "DELETE" and len(parts) == 3:
+            self.record_deleted(parts[1], parts[2])
+        elif isinstance(result, dict) and isinstance(result.get("id"), str):
+            collection = ID_PREFIXES.get(result["id"].split("-", 1)[0])
+            if collection:
+                self.record_changed(collection, result)
+
+    def invalidate_customer(self, customer_id: str) -> None:
+        self._epoch += 1
+        self._drop_view(customer_id)
+
+    def clear(self) -> None:
+        """Forget every view, index and assessment"""
+        self._epoch += 1
+        for cache in (
+            self._indexes,
+            self._loaded_at,
+            self._assessments,
+            self._views,
+            self._view_deps,
+            self._dependents,
+        ):
+            cache.clear()
+
+    # Fetching
+
+    async def _load(self, collection: str) -> CollectionIndex:
+        records = [r async for r in self.client.iterate(f"/api/{collection}")]
+        key = JOIN_KEYS[collection]
+        index = CollectionIndex(
+            key, records, _email_key if key == "holderEmail" else _id_key
+        )
+        for change in self._replay.pop(collection, ()):
+            change(index)
+        self._indexes[collection] = index
+        self._loaded_at[collection] = time.monotonic()
+        self.stats.index_loads += 1
+        return index
+
+    def _finish_load(self, collection: str) -> None:
+        self._loading.pop(collection, None)
+        self._replay.pop(collection, None)
+
+    async def index(self, collection: str, refresh: bool = False) -> CollectionIndex:
+        """Hash index over a whole collection, scanned at most once per ttl"""
+        if not refresh and self._fresh(self._loaded_at.get(collection)):
+            return self._indexes[collection]
+        # Concurrent views share one scan instead of each starting their own
+        loading = self._loading.get(collection)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(collection))
+            self._loading[collection] = loading
+            loading.add_done_callback(lambda _: self._finish_load(collection))
+        return await asyncio.shield(loading)
+
+    async def assessments(
+        self, policy_ids: list[str], refresh: bool = False
+    ) -> dict[str, Optional[dict[str, Any]]]:
+        """First stored risk assessment per policy, fetched concurrently if uncached"""
+        missing = [
+            pid
+            for pid in policy_ids
+            if refresh or not self._fresh(self._assessments.get(pid, (None,))[0])
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(policy_id: str) -> Optional[dict[str, Any]]:
+            async with semaphore:
+                return await get_assessment(self.client, policy_id)
+
+        fetched = await asyncio.gather(*(fetch(pid) for pid in missing))
+        now = time.monotonic()
+        for policy_id, assessment in zip(missing, fetched):
+            self._assessments[policy_id] = (now, assessment)
+        self.stats.assessment_fetches += len(missing)
+        return {pid: self._assessments[pid][1] for pid in policy_ids}
+
+    # Assembly
+
+    async def view(self, customer_id: str, refresh: bool = False) -> dict[str, Any]:
+        """The assembled view of one customer, served from cache while valid"""
+        cached = self._views.get(customer_id)
+        if cached is not None and not refresh and self._fresh(cached[0]):
+            self.stats.cache_hits += 1
+            return cached[1]
+
+        epoch = self._epoch
+        # The customer and the four collection scans are independent
+        customer, policies, claims, payments, beneficiaries = await asyncio.gather(
+            self.client.get_customer(customer_id),
+            *(self.index(name, refresh) for name in JOIN_KEYS),
+        )
+        held = sorted(policies.get(customer["email"]), key=lambda p: p["id"])
+        assessments = await self.assessments([p["id"] for p in held], refresh)
+
+        entries = [
+            {
+                "policy": policy,
+                "claims": claims.get(policy["id"]),
+                "payments": payments.get(policy["id"]),
+                "beneficiaries": beneficiaries.get(policy["id"]),
+                "riskAssessment": assessments[policy["id"]],
+            }
+            for policy in held
+        ]
+        view = {
+            "customer": customer,
+            "policies": entries,
+            "summary": summarize_view(entries),
+            "generatedAt": get_current_timestamp(),
+        }
+        self.stats.views_built += 1
+
+        # A write that landed mid-build may not be reflected; serve it uncached
+        if epoch == self._epoch:
+            self._drop_view(customer_id)
+            dependencies = {
+                ("customer", customer_id),
+                ("email", _email_key(customer["email"])),
+                *(("policy", policy["id"]) for policy in held),
+            }
+            self._views[customer_id] = (time.monotonic(), view)
+            self._view_deps[customer_id] = dependencies
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, set()).add(customer_id)
+        return view
+
+
+def summarize_view(entries: list[dict[str, Any]]) -> dict[str, Any]:
+    policies = [e["policy"] for e in entries]
+    claims = [c for e in entries for c in e["claims"]]
+    payments = [p for e in entries for p in e["payments"]]
+    levels = [
+        e["riskAssessment"]["riskLevel"]
+        for e in entries
+        if e["riskAssessment"] and e["riskAssessment"].get("riskLevel") in RISK_ORDER
+    ]
+    return {
+        "policyCount": len(policies),
+        "activePolicies": sum(1 for p in policies if p.get("status") == "active"),
+        "totalPremium": round(sum(p.get("premium", 0) for p in policies), 2),
+        "totalCoverage": sum(p.get("coverageAmount", 0) for p in policies),
+        "claimCount": len(claims),
+        "openClaims": sum(1 for c in claims if c.get("status") in OPEN_CLAIM_STATUSES),
+        "totalClaimed": round(sum(c.get("claimAmount", 0) for c in claims), 2),
+        "totalPaid": round(
+            sum(p.get("amount", 0) for p in payments if p.get("status") == "completed"),
+            2,
+        ),
+        "beneficiaryCount": sum(len(e["beneficiaries"]) for e in entries),
+        "highestRiskLevel": max(levels, key=RISK_ORDER.index) if levels else None,
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("customer_id")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    async def run() -> tuple[dict[str, Any], Customer360Stats]:
+        async with AsyncInsuranceClient() as client:
+            service = Customer360Service(client)
+            return await service.view(args.customer_id), service.stats
+
+    view, stats = asyncio.run(run())
+    if args.json:
+        print(json.dumps(view, indent=2))
+        return
+
+    customer = view["customer"]
+    print(f"{customer['firstName']} {customer['lastName']} <{customer['email']}>")
+    for key, value in view["summary"].items():
+        print(f"  {key}: {value}")
+    print(f"  built with {json.dumps(asdict(stats))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate claim index
+Finds repeated or reworded claims: MinHash signatures of each description are
+banded into LSH buckets that also key on policy, claim amount and filing date,
+so a lookup touches a handful of buckets instead of every prior claim. The
+index updates one claim at a time; batch mode scans a whole claims.json
+history across a process pool.
+
+Usage:
+    python -m api.duplicates scan --workers 8
+    python -m api.duplicates scan --scope book --threshold 0.7 --json
+    python -m api.duplicates check CLM-001
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Literal, Optional
+
+from api.storage import DATA_DIR, read_json_file
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+Scope = Literal["policy", "book"]
+
+# a*x + b stays below 2^64 for 32-bit shingles, so numpy and plain ints agree
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def shingles(text: str, size: int = 4) -> set[int]:
+    """CRC32s of the character n-grams of the normalized text"""
+    normalized = _normalize(text)
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode())}
+    return {
+        zlib.crc32(normalized[i : i + size].encode())
+        for i in range(len(normalized) - size + 1)
+    }
+
+
+class MinHasher:
+    """
+    MinHash over character shingles with universal hashes (a*x + b) mod 2^31-1
+    The seed fixes the hash family, so signatures from different processes
+    and runs are comparable. With numpy installed the permutations are
+    evaluated as one array operation per text.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 4, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._perms = [
+            (rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_perm)
+        ]
+        if numpy is not None:
+            self._a = numpy.array([a for a, _ in self._perms], dtype=numpy.uint64)
+            self._b = numpy.array([b for _, b in self._perms], dtype=numpy.uint64)
+            self._a, self._b = self._a[:, None], self._b[:, None]
+        # Claim descriptions repeat a lot; sign each distinct text once
+        self.signature = lru_cache(maxsize=65536)(self._signature)
+
+    def _signature(self, text: str) -> tuple[int, ...]:
+        values = shingles(text, self.shingle_size)
+        if numpy is not None:
+            x = numpy.fromiter(values, dtype=numpy.uint64, count=len(values))
+            return tuple(((self._a * x + self._b) % _PRIME).min(axis=1).tolist())
+        return tuple(min((a * x + b) % _PRIME for x in values) for a, b in self._perms)
+
+
+def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def _filed_day(value: str) -> float:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() / 86400
+
+
+@dataclass
+class _Entry:
+    claim_id: str
+    signature: tuple[int, ...]
+    amount: float
+    day: float
+    scope: str
+    keys: list[tuple]
+
+
+@dataclass
+class DuplicateMatch:
+    claimId: str
+    duplicateOf: str
+    similarity: float
+    amountDelta: float
+    daysApart: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class ClaimIndex:
+    """
+    Incremental LSH index over claims
+
+    A pair is reported when both claims share the scope (the same policy, or
+    the whole book), their amounts are within amount_tolerance of each other,
+    they were filed at most window_days apart, and their descriptions have an
+    estimated Jaccard similarity of at least threshold. With the default 16
+    bands of 4 rows, pairs at 0.6 similarity collide in some band ~89% of the
+    time and pairs at 0.8 more than 99% of the time.
+    """
+
+    def __init__(
+        self,
+        hasher: Optional[MinHasher] = None,
+        bands: int = 16,
+        threshold: float = 0.6,
+        amount_tolerance: float = 0.1,
+        window_days: float = 14.0,
+        scope: Scope = "policy",
+    ):
+        self.hasher = hasher or MinHasher()
+        if self.hasher.num_perm % bands:
+            raise ValueError("bands must divide the number of permutations")
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+        self.threshold = threshold
+        self.amount_tolerance = amount_tolerance
+        self.window_days = window_days
+        self.scope = scope
+        # Widest log-ratio two matching amounts can have
+        self._log_step = -math.log1p(-amount_tolerance)
+        self._entries: dict[str, _Entry] = {}
+        self._buckets: dict[tuple, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, claim_id: str) -> bool:
+        return claim_id in self._entries
+
+    def _entry(
+        self, claim: dict[str, Any], signature: Optional[tuple[int, ...]] = None
+    ) -> _Entry:
+        return _Entry(
+            claim["id"],
+            signature or self.hasher.signature(claim.get("description") or ""),
+            float(claim["claimAmount"]),
+            _filed_day(claim["filedDate"]),
+            claim.get("policyId", "") if self.scope == "policy" else "",
+            [],
+        )
+
+    def _cells(self, entry: _Entry) -> tuple[int, int]:
+        # Amount cells are one tolerance wide on a log scale and date cells one
+        # window wide, so a match is always in the same or an adjacent cell
+        amount_cell = math.floor(math.log(max(entry.amount, 0.01)) / self._log_step)
+        return amount_cell, math.floor(entry.day / self.window_days)
+
+    def _band_hashes(self, signature: tuple[int, ...]) -> list[int]:
+        rows = self.rows
+        return [
+            hash(signature[band * rows : (band + 1) * rows])
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, entry: _Entry) -> set[str]:
+        amount_cell, day_cell = self._cells(entry)
+        found: set[str] = set()
+        buckets = self._buckets
+        for band, band_hash in enumerate(self._band_hashes(entry.signature)):
+            for amount in (amount_cell - 1, amount_cell, amount_cell + 1):
+                for day in (day_cell - 1, day_cell, day_cell + 1):
+                    bucket = buckets.get((entry.scope, band, band_hash, amount, day))
+                    if bucket:
+                        found |= bucket
+        found.discard(entry.claim_id)
+        return found
+
+    def _match(self, entry: _Entry, other: _Entry) -> Optional[DuplicateMatch]:
+        delta = abs(entry.amount - other.amount)
+        if delta > self.amount_tolerance * max(entry.amount, other.amount):
+            return None
+        days = abs(entry.day - other.day)
+        if days > self.window_days:
+            return None
+        score = similarity(entry.signature, other.signature)
+        if score < self.threshold:
+            return None
+        return DuplicateMatch(
+            entry.claim_id, other.claim_id, score, round(delta, 2), round(days, 2)
+        )
+
+    def _query(self, entry: _Entry, limit: Optional[int]) -> list[DuplicateMatch]:
+        matches = [
+            match
+            for match in (
+                self._match(entry, self._entries[claim_id])
+                for claim_id in self._candidates(entry)
+            )
+            if match is not None
+        ]
+        matches.sort(key=lambda m: (-m.similarity, m.daysApart))
+        return matches[:limit] if limit else matches
+
+    def query(
+        self, claim: dict[str, Any], limit: Optional[int] = 10
+    ) -> list[DuplicateMatch]:
+        """Indexed claims that look like duplicates of this one, best first"""
+        return self._query(self._entry(claim), limit)
+
+    def add(
+        self, claim: dict[str, Any], signature: Optional[tuple[int, ...]] = None
+    ) -> None:
+        """Index a claim, replacing any earlier version with the same ID"""
+        self.remove(claim["id"])
+        self._insert(self._entry(claim, signature))
+
+    def _insert(self, entry: _Entry) -> None:
+        amount_cell, day_cell = self._cells(entry)
+        entry.keys = [
+            (entry.scope, band, band_hash, amount_cell, day_cell)
+            for band, band_hash in enumerate(self._band_hashes(entry.signature))
+        ]
+        for key in entry.keys:
+            self._buckets.setdefault(key, set()).add(entry.claim_id)
+        self._entries[entry.claim_id] = entry
+
+    def add_and_query(
+        self,
+        claim: dict[str, Any],
+        limit: Optional[int] = 10,
+        signature: Optional[tuple[int, ...]] = None,
+    ) -> list[DuplicateMatch]:
+        """Match a new claim against everything indexed so far, then index it"""
+        self.remove(claim["id"])
+        entry = self._entry(claim, signature)
+        matches = self._query(entry, limit)
+        self._insert(entry)
+        return matches
+
+    def remove(self, claim_id: str) -> bool:
+        entry = self._entries.pop(claim_id, None)
+        if entry is None:
+            return False
+        for key in entry.keys:
+            bucket = self._buckets[key]
+            bucket.discard(claim_id)
+            if not bucket:
+                del self._buckets[key]
+        return True
+
+
+def _by_filed_date(claims: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(claims, key=lambda c: (_filed_day(c["filedDate"]), c["id"]))
+
+
+def _scan_shard(
+    claims: list[dict[str, Any]], options: dict[str, Any]
+) -> list[DuplicateMatch]:
+    """Stream one shard through a fresh index; each pair is found by its later claim"""
+    index = ClaimIndex(**options)
+    matches: list[DuplicateMatch] = []
+    for claim in _by_filed_date(claims):
+        matches += index.add_and_query(claim, limit=None)
+    return matches
+
+
+def _sign_chunk(texts: list[str]) -> list[tuple[int, ...]]:
+    hasher = MinHasher()
+    return [hasher.signature(text) for text in texts]
+
+
+def scan(
+    claims: list[dict[str, Any]],
+    workers: Optional[int] = None,
+    scope: Scope = "policy",
+    **options: Any,
+) -> list[DuplicateMatch]:
+    """
+    Every near-duplicate pair in a claim history
+
+    With scope="policy" claims are sharded by policy and each shard is
+    indexed in its own process. With scope="book" a pool computes the
+    signatures and one index joins them in filing order.
+    """
+    workers = workers or os.cpu_count() or 1
+    options = {**options, "scope": scope}
+    if workers == 1:
+        return _scan_shard(claims, options)
+
+    with ProcessPoolExecutor(workers) as pool:
+        if scope == "policy":
+            shards: list[list[dict[str, Any]]] = [[] for _ in range(workers * 4)]
+            for claim in claims:
+                policy = claim.get("policyId", "").encode()
+                shards[zlib.crc32(policy) % len(shards)].append(claim)
+            results = pool.map(_scan_shard, shards, [options] * len(shards))
+            return [match for shard in results for match in shard]
+
+        ordered = _by_filed_date(claims)
+        texts = [claim.get("description") or "" for claim in ordered]
+        chunk = max(1, len(texts) // (workers * 4))
+        signatures = [
+            signature
+            for part in pool.map(
+                _sign_chunk, [texts[i : i + chunk] for i in range(0, len(texts), chunk)]
+            )
+            for signature in part
+        ]
+    index = ClaimIndex(**options)
+    matches: list[DuplicateMatch] = []
+    for claim, signature in zip(ordered, signatures):
+        matches += index.add_and_query(claim, limit=None, signature=signature)
+    return matches
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--scope", choices=("policy", "book"), default="policy")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--amount-tolerance", type=float, default=0.1)
+    parser.add_argument("--window-days", type=float, default=14.0)
+    parser.add_argument("--json", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch = commands.add_parser("scan", help="Report every near-duplicate pair")
+    batch.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    check = commands.add_parser("check", help="Show likely duplicates of one claim")
+    check.add_argument("claim_id")
+    args = parser.parse_args()
+
+    options = {
+        "threshold": args.threshold,
+        "amount_tolerance": args.amount_tolerance,
+        "window_days": args.window_days,
+    }
+    claims = read_json_file("claims.json", args.data_dir)
+
+    if args.command == "check":
+        claim = next((c for c in claims if c["id"] == args.claim_id), None)
+        if claim is None:
+            print(f"{args.claim_id} not found", file=sys.stderr)
+            sys.exit(1)
+        index = ClaimIndex(scope=args.scope, **options)
+        for other in claims:
+            index.add(other)
+        matches = index.query(claim)
+    else:
+        start = time.perf_counter()
+        matches = scan(claims, args.workers, args.scope, **options)
+        elapsed = time.perf_counter() - start
+        matches.sort(key=lambda m: (-m.similarity, m.claimId))
+        print(
+            f"Scanned {len(claims)} claims in {elapsed:.2f}s: "
+            f"{len(matches)} near-duplicate pairs",
+            file=sys.stderr,
+        )
+
+    if args.json:
+        print(json.dumps([m.as_dict() for m in matches], indent=2))
+        return
+    for m in matches:
+        print(
+            f"{m.claimId} ~ {m.duplicateOf}  similarity {m.similarity:.2f}  "
+            f"amount delta {m.amountDelta:,.2f}  {m.daysApart:.1f} days apart"
+        )
+
+
+if __name__ == "__main__":
+    main()
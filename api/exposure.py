@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Portfolio exposure cube
+Sums policy coverage and premium into cells keyed by policyType, status and
+start period, together with quota-share and excess-of-loss cessions worked
+out per policy in vectorized form, so an exposure question reads a few
+hundred cells instead of scanning policies.json. Policies are upserted and
+removed in batches by subtracting their old contribution.
+
+Usage:
+    python -m api.exposure --by policyType
+    python -m api.exposure --by period --where policyType=home,auto --where status=active
+    python -m api.exposure --terms treaties.json --by policyType,status --json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Literal, Optional, Sequence
+
+from api.storage import DATA_DIR, read_json_file
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+Grain = Literal["month", "quarter", "year"]
+TreatyType = Literal["quota_share", "excess_of_loss"]
+
+DIMENSIONS = ("policyType", "status", "period")
+BASE_MEASURES = ("policies", "coverage", "premium")
+
+
+def _day(value: Optional[str]) -> float:
+    if not value:
+        return math.nan
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() / 86400
+
+
+def _period(date: str, grain: Grain) -> str:
+    if grain == "year":
+        return date[:4]
+    if grain == "month":
+        return date[:7]
+    return f"{date[:4]}-Q{(int(date[5:7]) + 2) // 3}"
+
+
+@dataclass
+class Treaty:
+    """
+    Per-risk treaty terms
+
+    A quota share cedes `share` of each attaching policy's coverage, capped
+    at `limit` per risk: min(share * net, limit). An excess-of-loss layer
+    is `limit` xs `retention` and the reinsurer takes `share` of it:
+    share * min(max(net - retention, 0), limit). Treaties inure in order:
+    each one sees the coverage the previous ones retained. Premium is ceded
+    in proportion to the coverage ceded. A policy attaches when its
+    startDate falls in [effective, expiry) and its type is listed (or no
+    types are).
+    """
+
+    id: str
+    name: str
+    kind: TreatyType
+    share: float = 1.0
+    retention: float = 0.0
+    limit: Optional[float] = None
+    policy_types: tuple[str, ...] = ()
+    effective: Optional[str] = None
+    expiry: Optional[str] = None
+
+    @classmethod
+    def from_record(
+        cls, record: dict[str, Any], terms: Optional[dict[str, Any]] = None
+    ) -> "Treaty":
+        """
+        Build from a reinsurance.json record; terms fill in what it lacks
+
+        The record's coverageAmount is the per-risk limit. treatyType,
+        cessionRate, retention and policyTypes are not part of the stored
+        schema, so they usually come from terms.
+        """
+        merged = {**record, **(terms or {})}
+        kind = merged.get("treatyType")
+        if kind not in ("quota_share", "excess_of_loss"):
+            raise ValueError(f"Treaty {merged.get('id')} has no treatyType")
+        if kind == "quota_share" and "cessionRate" not in merged:
+            raise ValueError(f"Quota share {merged.get('id')} has no cessionRate")
+        limit = merged.get("limit", merged.get("coverageAmount"))
+        return cls(
+            id=merged["id"],
+            name=merged.get("treatyName", merged["id"]),
+            kind=kind,
+            share=float(merged.get("cessionRate", 1.0)),
+            retention=float(merged.get("retention", 0.0)),
+            limit=float(limit) if limit is not None else None,
+            policy_types=tuple(merged.get("policyTypes") or ()),
+            effective=merged.get("effectiveDate"),
+            expiry=merged.get("expiryDate"),
+        )
+
+    def cede(self, net: Any, types: Any, start: Any) -> Any:
+        """Coverage ceded from each policy's net coverage"""
+        effective = _day(self.effective) if self.effective else -math.inf
+        expiry = _day(self.expiry) if self.expiry else math.inf
+        limit = math.inf if self.limit is None else self.limit
+        layered = self.kind == "excess_of_loss"
+        if numpy is None:
+            return [
+                (
+                    (
+                        self.share * min(max(n - self.retention, 0.0), limit)
+                        if layered
+                        else min(self.share * max(n - self.retention, 0.0), limit)
+                    )
+                    if effective <= s < expiry
+                    and (not self.policy_types or t in self.policy_types)
+                    else 0.0
+                )
+                for n, t, s in zip(net, types, start)
+            ]
+
+        attaches = (start >= effective) & (start < expiry)
+        if self.policy_types:
+            attaches &= numpy.isin(types, self.policy_types)
+        above = numpy.maximum(net - self.retention, 0.0)
+        if layered:
+            ceded = self.share * numpy.minimum(above, limit)
+        else:
+            ceded = numpy.minimum(self.share * above, limit)
+        return numpy.where(attaches, ceded, 0.0)
+
+
+def load_treaties(
+    records: list[dict[str, Any]], terms: Sequence[dict[str, Any]] = ()
+) -> tuple[list[Treaty], list[str]]:
+    """
+    Treaties from reinsurance records plus a list of terms
+
+    Terms whose id matches a record complete it; the rest are standalone
+    treaties. Cancelled treaties and records without usable terms are
+    skipped, and the reasons returned.
+    """
+    by_id = {t["id"]: t for t in terms}
+    treaties, skipped = [], []
+    known = {r["id"] for r in records}
+    for record in [*records, *(t for t in terms if t["id"] not in known)]:
+        merged = {**record, **by_id.get(record["id"], {})}
+        if merged.get("status") == "cancelled":
+            skipped.append(f"{record['id']}: cancelled")
+            continue
+        try:
+            treaties.append(Treaty.from_record(merged))
+        except ValueError as error:
+            skipped.append(str(error))
+    return treaties, skipped
+
+
+class ExposureCube:
+    """
+    Coverage and premium summed by (policyType, status, period)
+
+    Each policy's contribution (count, coverage, premium, then ceded
+    coverage and premium per treaty) is kept so an upsert or removal can
+    subtract it from its cell; queries only read the cell totals.
+    """
+
+    def __init__(self, treaties: Iterable[Treaty] = (), grain: Grain = "quarter"):
+        self.treaties = list(treaties)
+        self.grain = grain
+        self.measures = BASE_MEASURES + tuple(
+            f"{t.id}.{m}" for t in self.treaties for m in ("coverage", "premium")
+        )
+        self.cells: list[tuple[str, str, str]] = []
+        self._cell_index: dict[tuple[str, str, str], int] = {}
+        self._position: dict[str, int] = {}
+        self._next = 0
+        if numpy is None:
+            self._totals: Any = []
+            self._cell_of: Any = []
+            self._rows: Any = []
+        else:
+            self._totals = numpy.zeros((0, len(self.measures)))
+            self._cell_of = numpy.zeros(0, dtype=numpy.int64)
+            self._rows = numpy.zeros((0, len(self.measures)))
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    # Updates
+
+    def _cell(self, key: tuple[str, str, str]) -> int:
+        cell = self._cell_index.get(key)
+        if cell is None:
+            cell = self._cell_index[key] = len(self.cells)
+            self.cells.append(key)
+        return cell
+
+    def _contributions(self, policies: list[dict[str, Any]]) -> tuple[Any, Any]:
+        cells = [
+            self._cell(
+                (p["policyType"], p["status"], _period(p["startDate"], self.grain))
+            )
+            for p in policies
+        ]
+        types = [p["policyType"] for p in policies]
+        coverage = [float(p["coverageAmount"]) for p in policies]
+        premium = [float(p["premium"]) for p in policies]
+        start = [_day(p["startDate"]) for p in policies]
+        if numpy is None:
+            columns = [[1.0] * len(policies), coverage, premium]
+            net = coverage
+            for treaty in self.treaties:
+                ceded = treaty.cede(net, types, start)
+                columns.append(ceded)
+                columns.append(
+                    [
+                        pr * c / cov if cov else 0.0
+                        for pr, c, cov in zip(premium, ceded, coverage)
+                    ]
+                )
+                net = [n - c for n, c in zip(net, ceded)]
+            return cells, [list(row) for row in zip(*columns)]
+
+        types, coverage, premium, start = (
+            numpy.asarray(column) for column in (types, coverage, premium, start)
+        )
+        columns = [numpy.ones(len(policies)), coverage, premium]
+        net = coverage
+        # Guards the premium ratio against zero coverage without a warning
+        safe = numpy.where(coverage > 0, coverage, 1.0)
+        for treaty in self.treaties:
+            ceded = treaty.cede(net, types, start)
+            columns += [ceded, premium * ceded / safe]
+            net = net - ceded
+        return numpy.asarray(cells, dtype=numpy.int64), numpy.column_stack(columns)
+
+    def _accumulate(self, cells: Any, rows: Any, sign: float) -> None:
+        if numpy is None:
+            while len(self._totals) < len(self.cells):
+                self._totals.append([0.0] * len(self.measures))
+            for cell, row in zip(cells, rows):
+                total = self._totals[cell]
+                for m, value in enumerate(row):
+                    total[m] += sign * value
+            return
+
+        grow = len(self.cells) - len(self._totals)
+        if grow > 0:
+            self._totals = numpy.vstack(
+                [self._totals, numpy.zeros((grow, len(self.measures)))]
+            )
+        numpy.add.at(self._totals, cells, sign * rows)
+
+    def _take(self, positions: list[int]) -> tuple[Any, Any]:
+        if numpy is None:
+            return [self._cell_of[p] for p in positions], [
+                self._rows[p] for p in positions
+            ]
+        return self._cell_of[positions], self._rows[positions]
+
+    def _store(self, positions: list[int], cells: Any, rows: Any) -> None:
+        if numpy is None:
+            for position, cell, row in zip(positions, cells, rows):
+                if position == len(self._rows):
+                    self._cell_of.append(cell)
+                    self._rows.append(row)
+                else:
+                    self._cell_of[position] = cell
+                    self._rows[position] = row
+            return
+
+        grow = max(positions) + 1 - len(self._rows)
+        if grow > 0:
+            self._cell_of = numpy.concatenate(
+                [self._cell_of, numpy.zeros(grow, dtype=numpy.int64)]
+            )
+            self._rows = numpy.vstack(
+                [self._rows, numpy.zeros((grow, len(self.measures)))]
+            )
+        self._cell_of[positions] = cells
+        self._rows[positions] = rows
+
+    def upsert(self, policies: Iterable[dict[str, Any]]) -> None:
+        """Add policies, or replace ones already counted"""
+        # The last version of a policy within one batch wins
+        policies = list({p["id"]: p for p in policies}.values())
+        if not policies:
+            return
+        cells, rows = self._contributions(policies)
+        replaced = [
+            self._position[p["id"]] for p in policies if p["id"] in self._position
+        ]
+        if replaced:
+            self._accumulate(*self._take(replaced), -1.0)
+        positions = []
+        for policy in policies:
+            position = self._position.get(policy["id"])
+            if position is None:
+                position = self._position[policy["id"]] = self._next
+                self._next += 1
+            positions.append(position)
+        self._store(positions, cells, rows)
+        self._accumulate(cells, rows, 1.0)
+
+    def remove(self, policy_ids: Iterable[str]) -> None:
+        positions = [
+            self._position.pop(policy_id)
+            for policy_id in set(policy_ids)
+            if policy_id in self._position
+        ]
+        if not positions:
+            return
+        cells, rows = self._take(positions)
+        self._accumulate(cells, rows, -1.0)
+        # Leaves a zero row behind; positions are never reused
+        self._store(positions, cells, [[0.0] * len(self.measures)] * len(positions))
+
+    def on_write(self, method: str, path: str, result: Any) -> None:
+        """
+        AsyncInsuranceClient/InsuranceClient write listener
+        Policies are recognised by their POL- ID rather than the path, so ones
+        created by POST /api/quotes/{id}/convert are folded in too
+        """
+        parts = path.strip("/").split("/")
+        if method == "DELETE":
+            if parts[:2] == ["api", "policies"] and len(parts) == 3:
+                self.remove([parts[2]])
+        elif isinstance(result, dict) and str(result.get("id", "")).startswith("POL-"):
+            self.upsert([result])
+
+    # Queries
+
+    def query(
+        self,
+        where: Optional[dict[str, str | Iterable[str]]] = None,
+        by: Sequence[str] = (),
+    ) -> list[dict[str, Any]]:
+        """
+        Totals grouped by the `by` dimensions over the cells matching `where`
+
+        Each row carries the grouped dimension values, policy count,
+        coverage and premium, ceded and retained coverage and premium, and
+        the ceded amounts per treaty id.
+        """
+        for dimension in [*(where or {}), *by]:
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension {dimension!r}; use {DIMENSIONS}")
+        wanted = {
+            DIMENSIONS.index(dimension): (
+                {values} if isinstance(values, str) else set(values)
+            )
+            for dimension, values in (where or {}).items()
+        }
+        axes = [DIMENSIONS.index(dimension) for dimension in by]
+        groups: dict[tuple[str, ...], list[int]] = {}
+        for cell, key in enumerate(self.cells):
+            if all(key[axis] in values for axis, values in wanted.items()):
+                groups.setdefault(tuple(key[axis] for axis in axes), []).append(cell)
+
+        rows = []
+        for group, cells in sorted(groups.items()):
+            if numpy is None:
+                totals = [
+                    sum(column) for column in zip(*(self._totals[c] for c in cells))
+                ]
+            else:
+                totals = self._totals[cells].sum(axis=0).tolist()
+            count = round(totals[0])
+            if not count:
+                continue
+            treaties = {
+                treaty.id: {
+                    "coverage": round(totals[3 + 2 * i], 2),
+                    "premium": round(totals[4 + 2 * i], 2),
+                }
+                for i, treaty in enumerate(self.treaties)
+            }
+            ceded_coverage = sum(totals[3::2])
+            ceded_premium = sum(totals[4::2])
+            rows.append(
+                {
+                    **dict(zip(by, group)),
+                    "policies": count,
+                    "coverage": round(totals[1], 2),
+                    "premium": round(totals[2], 2),
+                    "cededCoverage": round(ceded_coverage, 2),
+                    "cededPremium": round(ceded_premium, 2),
+                    "retainedCoverage": round(totals[1] - ceded_coverage, 2),
+                    "retainedPremium": round(totals[2] - ceded_premium, 2),
+                    "treaties": treaties,
+                }
+            )
+        return rows
+
+
+def _where(pairs: list[str]) -> dict[str, list[str]]:
+    where: dict[str, list[str]] = {}
+    for pair in pairs:
+        dimension, _, values = pair.partition("=")
+        where.setdefault(dimension, []).extend(values.split(","))
+    return where
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument(
+        "--terms",
+        type=Path,
+        help="JSON list of treaty terms (treatyType, cessionRate, retention, "
+        "limit, policyTypes) keyed by reinsurance id, or standalone treaties",
+    )
+    parser.add_argument(
+        "--grain", choices=("month", "quarter", "year"), default="quarter"
+    )
+    parser.add_argument("--by", default="", help=f"Comma-separated from {DIMENSIONS}")
+    parser.add_argument(
+        "--where", action="append", default=[], help="dimension=value[,value...]"
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    terms = json.loads(args.terms.read_text()) if args.terms else []
+    treaties, skipped = load_treaties(
+        read_json_file("reinsurance.json", args.data_dir), terms
+    )
+    for reason in skipped:
+        print(f"Skipping treaty: {reason}", file=sys.stderr)
+
+    started = time.perf_counter()
+    cube = ExposureCube(treaties, args.grain)
+    cube.upsert(read_json_file("policies.json", args.data_dir))
+    built = time.perf_counter() - started
+    started = time.perf_counter()
+    by = [dimension for dimension in args.by.split(",") if dimension]
+    try:
+        rows = cube.query(_where(args.where), by)
+    except ValueError as e:
+        parser.error(str(e))
+    queried = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(
+        f"{len(cube)} policies in {len(cube.cells)} cells, {len(treaties)} treaties; "
+        f"built in {built * 1000:.0f} ms, queried in {queried * 1000:.2f} ms",
+        file=sys.stderr,
+    )
+    width = max([len(" / ".join(r[d] for d in by)) for r in rows] + [5])
+    print(
+        f"{'group':<{width}} {'policies':>9} {'coverage':>16} {'premium':>13} "
+        f"{'ceded cover':>16} {'retained cover':>16}"
+    )
+    for r in rows:
+        label = " / ".join(r[d] for d in by) or "all"
+        print(
+            f"{label:<{width}} {r['policies']:>9} {r['coverage']:>16,.2f} "
+            f"{r['premium']:>13,.2f} {r['cededCoverage']:>16,.2f} "
+            f"{r['retainedCoverage']:>16,.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Conditional-request HTTP cache for the Python client
+Stores validators (ETag / Last-Modified) and bodies; small bodies and their
+decoded objects stay in memory, large bodies are spilled to disk, and each
+tier is held to a byte budget with least-recently-used eviction
+"""
+
+import hashlib
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "insurance-api-cache"
+
+_UNSET = object()
+
+
+@dataclass
+class CacheEntry:
+    """Validators plus either an in-memory body or a pointer to its file"""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    size: int
+    body: Optional[bytes] = None
+    decoded: Any = _UNSET
+
+    @property
+    def on_disk(self) -> bool:
+        return self.body is None
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    bytes_saved: int = 0
+
+
+class HTTPCache:
+    """
+    Two-tier validator cache keyed by request URL
+
+    memory_limit bounds the memory tier's bodies and disk_limit the spilled
+    files. Disk entries also keep their decoded object, so a 304 on a large
+    body doesn't re-read and re-parse it, until decoded_limit (counted in
+    body bytes) pushes the least recently used ones back to disk-only.
+    Decoded objects returned on a hit are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        memory_threshold: int = 256 * 1024,
+        memory_limit: int = 64 * 1024 * 1024,
+        disk_limit: int = 512 * 1024 * 1024,
+        decoded_limit: int = 64 * 1024 * 1024,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.memory_threshold = memory_threshold
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.decoded_limit = decoded_limit
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._disk_bytes = 0
+        # Disk entries currently holding a decoded object, least recent first
+        self._decoded: "OrderedDict[str, int]" = OrderedDict()
+        self._decoded_bytes = 0
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk()
+
+    def _load_disk(self) -> None:
+        """Count files left by earlier processes against disk_limit, oldest first"""
+        metas = sorted(
+            self.cache_dir.glob("*.meta.json"), key=lambda path: path.stat().st_mtime
+        )
+        for meta_path in metas:
+            try:
+                meta = json.loads(meta_path.read_text())
+                key = meta["key"]
+                entry = CacheEntry(meta.get("etag"), meta.get("last_modified"), meta["size"])
+            except (OSError, ValueError, KeyError):
+                continue
+            self._disk[key] = entry
+            self._disk_bytes += entry.size
+        with self._lock:
+            self._evict()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return self.cache_dir / f"{name}.body", self.cache_dir / f"{name}.meta.json"
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        entry = self._disk.get(key)
+        if entry is not None:
+            self._disk.move_to_end(key)
+        elif self.cache_dir:
+            # Bodies written by an earlier process are still valid candidates
+            _, meta_path = self._paths(key)
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                return None
+            if meta.get("key") != key:
+                return None
+            entry = CacheEntry(meta.get("etag"), meta.get("last_modified"), meta["size"])
+            self._disk[key] = entry
+            self._disk_bytes += entry.size
+            self._evict()
+        return entry
+
+    def conditional_headers(self, key: str) -> dict[str, str]:
+        """If-None-Match / If-Modified-Since for a cached representation, if any"""
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is None:
+            return {}
+        if entry.etag:
+            return {"If-None-Match": entry.etag}
+        if entry.last_modified:
+            return {"If-Modified-Since": entry.last_modified}
+        return {}
+
+    def store(self, key: str, headers: Mapping[str, str], body: bytes, decoded: Any = _UNSET):
+        """Cache a 200 response that carries at least one validator"""
+        cache_control = headers.get("Cache-Control", "")
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if "no-store" in cache_control or not (etag or last_modified):
+            return
+
+        entry = CacheEntry(etag, last_modified, len(body))
+        with self._lock:
+            self._forget(key)
+            if len(body) <= self.memory_threshold or not self.cache_dir:
+                entry.body = body
+                entry.decoded = decoded
+                self._memory[key] = entry
+                self._memory_bytes += len(body)
+            else:
+                body_path, meta_path = self._paths(key)
+                body_path.write_bytes(body)
+                meta_path.write_text(
+                    json.dumps(
+                        {"key": key, "etag": etag, "last_modified": last_modified, "size": len(body)}
+                    )
+                )
+                self._disk[key] = entry
+                self._disk_bytes += entry.size
+                if decoded is not _UNSET:
+                    self._keep_decoded(key, entry, decoded)
+            self._evict()
+            self.stats.stores += 1
+
+    def revalidated(self, key: str, headers: Mapping[str, str]) -> Any:
+        """
+        Serve the cached representation after a 304
+        Returns the decoded JSON object; a disk entry is read and decoded again
+        only after decoded_limit has evicted its decoded object
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                raise KeyError(key)
+            entry.etag = headers.get("ETag", entry.etag)
+            entry.last_modified = headers.get("Last-Modified", entry.last_modified)
+            self.stats.hits += 1
+            self.stats.bytes_saved += entry.size
+            if entry.decoded is not _UNSET:
+                if key in self._decoded:
+                    self._decoded.move_to_end(key)
+                return entry.decoded
+            body = entry.body if not entry.on_disk else self._paths(key)[0].read_bytes()
+
+        decoded = json.loads(body) if body else None
+        with self._lock:
+            if not entry.on_disk:
+                entry.decoded = decoded
+            elif self._disk.get(key) is entry:
+                self._keep_decoded(key, entry, decoded)
+                self._evict()
+        return decoded
+
+    def body(self, key: str) -> Optional[bytes]:
+        """Raw cached body, or None when the key is not cached"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            if not entry.on_disk:
+                return entry.body
+        return self._paths(key)[0].read_bytes()
+
+    def miss(self) -> None:
+        with self._lock:
+            self.stats.misses += 1
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Drop every entry whose key starts with prefix (all entries by default)"""
+        with self._lock:
+            for key in [k for k in (*self._memory, *self._disk) if k.startswith(prefix)]:
+                self._forget(key)
+
+    def _keep_decoded(self, key: str, entry: CacheEntry, decoded: Any) -> None:
+        if key not in self._decoded:
+            self._decoded_bytes += entry.size
+        entry.decoded = decoded
+        self._decoded[key] = entry.size
+        self._decoded.move_to_end(key)
+
+    def _drop_decoded(self, key: str) -> None:
+        size = self._decoded.pop(key, None)
+        if size is not None:
+            self._decoded_bytes -= size
+            entry = self._disk.get(key)
+            if entry is not None:
+                entry.decoded = _UNSET
+
+    def _forget(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+        self._drop_decoded(key)
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry.size
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+            _, entry = self._memory.popitem(last=False)
+            self._memory_bytes -= entry.size
+        while self._decoded_bytes > self.decoded_limit and self._decoded:
+            self._drop_decoded(next(iter(self._decoded)))
+        while self._disk_bytes > self.disk_limit and len(self._disk) > 1:
+            self._forget(next(iter(self._disk)))
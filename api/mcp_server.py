@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+insurance-api-mcp: Python MCP server for the Insurance Management API
+Exposes the same core tools as app/mcp/route.ts over FastMCP, backed by the
+async Python client. List tools are cursor-paginated and filterable so agents
+never have to pull a whole collection into context.
+
+Usage:
+    insurance-api-mcp                       # stdio
+    insurance-api-mcp --transport http --port 8000
+"""
+
+import argparse
+import asyncio
+import os
+from typing import Annotated, Any, Literal, Optional
+
+from fastmcp import Context, FastMCP
+from fastmcp.exceptions import ToolError
+from pydantic import BaseModel, Field
+
+from api.client import APIError, AsyncInsuranceClient
+from api.concurrency import gather_bounded, summarize
+from api.customer360 import Customer360Service
+from api.storage import get_current_timestamp
+
+DEFAULT_LIMIT = 50
+BULK_CONCURRENCY = int(os.getenv("MCP_BULK_CONCURRENCY", "8"))
+BULK_CONCURRENCY_MAX = int(os.getenv("MCP_BULK_CONCURRENCY_MAX", "32"))
+CUSTOMER360_TTL = float(os.getenv("MCP_CUSTOMER360_TTL", "300"))
+
+mcp = FastMCP("insurance-api")
+
+_client: Optional[AsyncInsuranceClient] = None
+_customer360: Optional[Customer360Service] = None
+
+PolicyId = Annotated[str, Field(description="The policy ID")]
+ClaimId = Annotated[str, Field(description="The claim ID")]
+Limit = Annotated[int, Field(ge=1, le=1000, description="Maximum records per page")]
+Cursor = Annotated[
+    Optional[str], Field(description="nextCursor from the previous page")
+]
+FromDate = Annotated[
+    Optional[str], Field(description="ISO-8601 lower bound on the record date")
+]
+ToDate = Annotated[
+    Optional[str], Field(description="ISO-8601 upper bound on the record date")
+]
+PolicyType = Literal["auto", "home", "life", "health"]
+PolicyStatus = Literal["active", "expired", "cancelled"]
+ClaimType = Literal["accident", "theft", "damage", "medical", "other"]
+ClaimStatus = Literal["pending", "approved", "rejected", "processing"]
+RiskLevel = Literal["low", "medium", "high", "critical"]
+QuoteId = Annotated[str, Field(description="The quote ID")]
+QuoteStatus = Literal["draft", "pending", "approved", "rejected", "converted"]
+Concurrency = Annotated[
+    Optional[int],
+    Field(
+        ge=1, description="Backend calls in flight at once (server default if omitted)"
+    ),
+]
+
+
+class PolicyInput(BaseModel):
+    """Body of POST /api/policies (CreatePolicySchema)"""
+
+    policyNumber: str
+    policyType: PolicyType
+    holderName: str
+    holderEmail: str
+    premium: float = Field(gt=0)
+    coverageAmount: float = Field(gt=0)
+    startDate: str
+    endDate: str
+    status: PolicyStatus
+
+
+class QuoteInput(BaseModel):
+    """Body of POST /api/quotes (CreateQuoteSchema)"""
+
+    policyType: PolicyType
+    coverageAmount: float = Field(gt=0)
+    customerEmail: Optional[str] = None
+    customerName: Optional[str] = None
+
+
+class RiskAssessmentInput(BaseModel):
+    """Body of POST /api/risk-assessment (CreateRiskAssessmentSchema)"""
+
+    policyId: str
+    riskScore: float = Field(ge=0, le=100)
+    riskLevel: RiskLevel
+    factors: list[str]
+    assessmentDate: str
+    assessedBy: str
+    notes: Optional[str] = None
+
+
+def get_client() -> AsyncInsuranceClient:
+    """Shared client, created on first use inside the server's event loop"""
+    global _client
+    if _client is None:
+        _client = AsyncInsuranceClient()
+    return _client
+
+
+def get_customer360() -> Customer360Service:
+    """Shared view cache, rebuilt if the shared client is replaced"""
+    global _customer360
+    client = get_client()
+    if _customer360 is None or _customer360.client is not client:
+        _customer360 = Customer360Service(
+            client, ttl=CUSTOMER360_TTL, concurrency=BULK_CONCURRENCY_MAX
+        )
+    return _customer360
+
+
+async def call(awaitable) -> Any:
+    """Await a client call, surfacing API failures as MCP tool errors"""
+    try:
+        return await awaitable
+    except APIError as e:
+        raise ToolError(e.message) from e
+
+
+def _page_query(
+    limit: int, cursor: Optional[str], from_date: Optional[str], to_date: Optional[str]
+) -> dict[str, Any]:
+    return {"limit": limit, "cursor": cursor, "from": from_date, "to": to_date}
+
+
+def _present(**fields: Any) -> dict[str, Any]:
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+async def run_bulk(
+    ctx: Optional[Context], items: list, worker, concurrency: Optional[int]
+) -> dict[str, Any]:
+    """Fan a bulk tool out over the backend, reporting progress as items finish"""
+    limit = min(concurrency or BULK_CONCURRENCY, BULK_CONCURRENCY_MAX)
+
+    async def progress(done: int, total: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(done, total)
+
+    return summarize(await gather_bounded(items, worker, limit, progress))
+
+
+# Policy operations
+@mcp.tool(name="listPolicies")
+async def list_policies(
+    limit: Limit = DEFAULT_LIMIT,
+    cursor: Cursor = None,
+    status: Optional[PolicyStatus] = None,
+    fromDate: FromDate = None,
+    toDate: ToDate = None,
+) -> dict[str, Any]:
+    """List insurance policies one page at a time, optionally filtered by status and start date"""
+    return await call(
+        get_client().list_policies(
+            status=status, **_page_query(limit, cursor, fromDate, toDate)
+        )
+    )
+
+
+@mcp.tool(name="getPolicyById")
+async def get_policy_by_id(id: PolicyId) -> dict[str, Any]:
+    """Get a specific insurance policy by ID"""
+    return await call(get_client().get_policy(id))
+
+
+@mcp.tool(name="createPolicy")
+async def create_policy(
+    policyNumber: str,
+    policyType: PolicyType,
+    holderName: str,
+    holderEmail: str,
+    premium: Annotated[float, Field(gt=0)],
+    coverageAmount: Annotated[float, Field(gt=0)],
+    startDate: str,
+    endDate: str,
+    status: PolicyStatus,
+) -> dict[str, Any]:
+    """Create a new insurance policy"""
+    return await call(
+        get_client().create_policy(
+            {
+                "policyNumber": policyNumber,
+                "policyType": policyType,
+                "holderName": holderName,
+                "holderEmail": holderEmail,
+                "premium": premium,
+                "coverageAmount": coverageAmount,
+                "startDate": startDate,
+                "endDate": endDate,
+                "status": status,
+            }
+        )
+    )
+
+
+@mcp.tool(name="updatePolicy")
+async def update_policy(
+    id: PolicyId,
+    policyNumber: Optional[str] = None,
+    policyType: Optional[PolicyType] = None,
+    holderName: Optional[str] = None,
+    holderEmail: Optional[str] = None,
+    premium: Annotated[Optional[float], Field(gt=0)] = None,
+    coverageAmount: Annotated[Optional[float], Field(gt=0)] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    status: Optional[PolicyStatus] = None,
+) -> dict[str, Any]:
+    """Update an existing insurance policy"""
+    updates = _present(
+        policyNumber=policyNumber,
+        policyType=policyType,
+        holderName=holderName,
+        holderEmail=holderEmail,
+        premium=premium,
+        coverageAmount=coverageAmount,
+        startDate=startDate,
+        endDate=endDate,
+        status=status,
+    )
+    return await call(get_client().update_policy(id, updates))
+
+
+@mcp.tool(name="deletePolicy")
+async def delete_policy(id: PolicyId) -> dict[str, Any]:
+    """Delete an insurance policy"""
+    return await call(get_client().delete_policy(id))
+
+
+# Claim operations
+@mcp.tool(name="listClaims")
+async def list_claims(
+    limit: Limit = DEFAULT_LIMIT,
+    cursor: Cursor = None,
+    status: Optional[ClaimStatus] = None,
+    policyId: Optional[str] = None,
+    fromDate: FromDate = None,
+    toDate: ToDate = None,
+) -> dict[str, Any]:
+    """List insurance claims one page at a time, optionally filtered by status, policy and filed date"""
+    return await call(
+        get_client().list_claims(
+            status=status,
+            policyId=policyId,
+            **_page_query(limit, cursor, fromDate, toDate),
+        )
+    )
+
+
+@mcp.tool(name="getClaimById")
+async def get_claim_by_id(id: ClaimId) -> dict[str, Any]:
+    """Get a specific insurance claim by ID"""
+    return await call(get_client().get_claim(id))
+
+
+@mcp.tool(name="createClaim")
+async def create_claim(
+    claimNumber: str,
+    policyId: str,
+    claimType: ClaimType,
+    description: str,
+    claimAmount: Annotated[float, Field(gt=0)],
+    status: ClaimStatus,
+    filedDate: str,
+    notes: Optional[str] = None,
+) -> dict[str, Any]:
+    """Create a new insurance claim"""
+    claim = _present(
+        claimNumber=claimNumber,
+        policyId=policyId,
+        claimType=claimType,
+        description=description,
+        claimAmount=claimAmount,
+        status=status,
+        filedDate=filedDate,
+        notes=notes,
+    )
+    return await call(get_client().create_claim(claim))
+
+
+@mcp.tool(name="updateClaim")
+async def update_claim(
+    id: ClaimId,
+    claimType: Optional[ClaimType] = None,
+    description: Optional[str] = None,
+    claimAmount: Annotated[Optional[float], Field(gt=0)] = None,
+    status: Optional[ClaimStatus] = None,
+    notes: Optional[str] = None,
+) -> dict[str, Any]:
+    """Update an existing insurance claim"""
+    updates = _present(
+        claimType=claimType,
+        description=description,
+        claimAmount=claimAmount,
+        status=status,
+        notes=notes,
+    )
+    return await call(get_client().update_claim(id, updates))
+
+
+@mcp.tool(name="deleteClaim")
+async def delete_claim(id: ClaimId) -> dict[str, Any]:
+    """Delete an insurance claim"""
+    return await call(get_client().delete_claim(id))
+
+
+@mcp.tool(name="approveClaim")
+async def approve_claim(id: ClaimId) -> dict[str, Any]:
+    """Approve a pending insurance claim"""
+    return await call(get_client().approve_claim(id))
+
+
+@mcp.tool(name="rejectClaim")
+async def reject_claim(id: ClaimId) -> dict[str, Any]:
+    """Reject a pending insurance claim"""
+    return await call(get_client().reject_claim(id))
+
+
+# Risk assessment operations
+@mcp.tool(name="createRiskAssessment")
+async def create_risk_assessment(
+    policyId: str,
+    riskScore: Annotated[float, Field(ge=0, le=100)],
+    riskLevel: RiskLevel,
+    factors: list[str],
+    assessmentDate: str,
+    assessedBy: str,
+    notes: Optional[str] = None,
+) -> dict[str, Any]:
+    """Create a new risk assessment for a policy"""
+    assessment = _present(
+        policyId=policyId,
+        riskScore=riskScore,
+        riskLevel=riskLevel,
+        factors=factors,
+        assessmentDate=assessmentDate,
+        assessedBy=assessedBy,
+        notes=notes,
+    )
+    return await call(get_client().create_risk_assessment(assessment))
+
+
+@mcp.tool(name="getRiskAssessmentByPolicyId")
+async def get_risk_assessment_by_policy_id(policyId: PolicyId) -> dict[str, Any]:
+    """Get the first risk assessment stored for a specific policy"""
+    return await call(get_client().get_risk_assessment(policyId))
+
+
+# Bulk operations
+@mcp.tool(name="approveClaims")
+async def approve_claims(
+    ids: Annotated[list[str], Field(min_length=1, description="Claim IDs to approve")],
+    concurrency: Concurrency = None,
+    ctx: Optional[Context] = None,
+) -> dict[str, Any]:
+    """Approve many claims concurrently; reports success or failure per claim"""
+    client = get_client()
+    return await run_bulk(ctx, ids, client.approve_claim, concurrency)
+
+
+@mcp.tool(name="createPolicies")
+async def create_policies(
+    policies: Annotated[list[PolicyInput], Field(min_length=1)],
+    concurrency: Concurrency = None,
+    ctx: Optional[Context] = None,
+) -> dict[str, Any]:
+    """Create many insurance policies concurrently; reports success or failure per policy"""
+    client = get_client()
+    return await run_bulk(
+        ctx,
+        [p.model_dump() for p in policies],
+        client.create_policy,
+        concurrency,
+    )
+
+
+@mcp.tool(name="createRiskAssessments")
+async def create_risk_assessments(
+    assessments: Annotated[list[RiskAssessmentInput], Field(min_length=1)],
+    concurrency: Concurrency = None,
+    ctx: Optional[Context] = None,
+) -> dict[str, Any]:
+    """Create many risk assessments concurrently; reports success or failure per assessment"""
+    client = get_client()
+    return await run_bulk(
+        ctx,
+        [a.model_dump(exclude_none=True) for a in assessments],
+        client.create_risk_assessment,
+        concurrency,
+    )
+
+
+# Quote and fraud operations
+@mcp.tool(name="getQuoteById")
+async def get_quote_by_id(id: QuoteId) -> dict[str, Any]:
+    """Get a specific quote by ID"""
+    return await call(get_client().get_quote(id))
+
+
+@mcp.tool(name="createQuote")
+async def create_quote(
+    policyType: PolicyType,
+    coverageAmount: Annotated[float, Field(gt=0)],
+    customerEmail: Optional[str] = None,
+    customerName: Optional[str] = None,
+) -> dict[str, Any]:
+    """Create a new insurance quote"""
+    quote = _present(
+        policyType=policyType,
+        coverageAmount=coverageAmount,
+        customerEmail=customerEmail,
+        customerName=customerName,
+    )
+    return await call(get_client().create_quote(quote))
+
+
+@mcp.tool(name="updateQuote")
+async def update_quote(
+    id: QuoteId,
+    status: Optional[QuoteStatus] = None,
+    coverageAmount: Annotated[Optional[float], Field(gt=0)] = None,
+    customerEmail: Optional[str] = None,
+    customerName: Optional[str] = None,
+) -> dict[str, Any]:
+    """Update an existing quote"""
+    updates = _present(
+        status=status,
+        coverageAmount=coverageAmount,
+        customerEmail=customerEmail,
+        customerName=customerName,
+    )
+    return await call(get_client().update_quote(id, updates))
+
+
+@mcp.tool(name="convertQuoteToPolicy")
+async def convert_quote_to_policy(id: QuoteId) -> dict[str, Any]:
+    """Convert an approved quote to a policy"""
+    return await call(get_client().convert_quote(id))
+
+
+@mcp.tool(name="analyzeFraud")
+async def analyze_fraud(claimId: ClaimId) -> dict[str, Any]:
+    """Analyze a claim for potential fraud"""
+    return await call(get_client().analyze_fraud(claimId))
+
+
+# Workflow operations: one tool call runs a whole chain server-side
+@mcp.tool(name="issuePolicyFromQuote")
+async def issue_policy_from_quote(
+    riskScore: Annotated[float, Field(ge=0, le=100)],
+    riskLevel: RiskLevel,
+    factors: list[str],
+    assessedBy: str,
+    quoteId: Optional[QuoteId] = None,
+    quote: Optional[QuoteInput] = None,
+    approve: Annotated[
+        bool, Field(description="Approve a pending or draft quote before converting")
+    ] = True,
+    notes: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Quote to insured policy in one call: create or load the quote, approve it,
+    convert it to a policy and record the policy's risk assessment
+    """
+    if (quoteId is None) == (quote is None):
+        raise ToolError("Provide exactly one of quoteId or quote")
+    client = get_client()
+    if quote is not None:
+        record = await call(client.create_quote(quote.model_dump(exclude_none=True)))
+    else:
+        record = await call(client.get_quote(quoteId))
+
+    if record["status"] != "approved":
+        if not approve or record["status"] not in ("draft", "pending"):
+            raise ToolError(
+                f"Quote {record['id']} has status {record['status']} and cannot be converted"
+            )
+        record = await call(client.update_quote(record["id"], {"status": "approved"}))
+
+    policy = await call(client.convert_quote(record["id"]))
+    # The convert route flips the quote's status; mirror it rather than refetching
+    record = {**record, "status": "converted"}
+
+    assessment = _present(
+        policyId=policy["id"],
+        riskScore=riskScore,
+        riskLevel=riskLevel,
+        factors=factors,
+        assessmentDate=get_current_timestamp(),
+        assessedBy=assessedBy,
+        notes=notes,
+    )
+    try:
+        risk_assessment = await client.create_risk_assessment(assessment)
+    except APIError as e:
+        raise ToolError(
+            f"Policy {policy['id']} was issued from quote {record['id']} "
+            f"but the risk assessment failed: {e.message}"
+        ) from e
+    return {"quote": record, "policy": policy, "riskAssessment": risk_assessment}
+
+
+@mcp.tool(name="adjudicateClaim")
+async def adjudicate_claim(
+    claimId: ClaimId,
+    onReview: Annotated[
+        Literal["hold", "approve", "reject"],
+        Field(description="Action when fraud analysis recommends manual review"),
+    ] = "hold",
+) -> dict[str, Any]:
+    """
+    Fraud-check a claim and act on the recommendation in one call; claims that
+    are no longer pending or processing are analyzed but left unchanged
+    """
+    client = get_client()
+    # Both read the stored claim, so neither has to wait for the other
+    claim, analysis = await call(
+        asyncio.gather(client.get_claim(claimId), client.analyze_fraud(claimId))
+    )
+
+    decision = analysis["recommendation"]
+    if decision == "review":
+        decision = onReview
+    if claim["status"] not in ("pending", "processing"):
+        decision = "none"
+    elif decision == "approve":
+        claim = await call(client.approve_claim(claimId))
+    elif decision == "reject":
+        claim = await call(client.reject_claim(claimId))
+    return {"claim": claim, "analysis": analysis, "decision": decision}
+
+
+# Customer operations
+@mcp.tool(name="getCustomer360")
+async def get_customer_360(
+    customerId: Annotated[str, Field(description="The customer ID")],
+    refresh: Annotated[
+        bool, Field(description="Rebuild from the API instead of the cached view")
+    ] = False,
+) -> dict[str, Any]:
+    """
+    Everything about one customer in a single call: the customer record and,
+    for each policy held under their email, its claims, payments,
+    beneficiaries and first stored risk assessment, plus portfolio totals
+    """
+    return await call(get_customer360().view(customerId, refresh))
+
+
+# Payment and audit operations
+@mcp.tool(name="listPayments")
+async def list_payments(
+    limit: Limit = DEFAULT_LIMIT,
+    cursor: Cursor = None,
+    status: Optional[Literal["pending", "completed", "failed", "refunded"]] = None,
+    policyId: Optional[str] = None,
+    fromDate: FromDate = None,
+    toDate: ToDate = None,
+) -> dict[str, Any]:
+    """List payments one page at a time, optionally filtered by status, policy and payment date"""
+    return await call(
+        get_client().list_payments(
+            status=status,
+            policyId=policyId,
+            **_page_query(limit, cursor, fromDate, toDate),
+        )
+    )
+
+
+@mcp.tool(name="listAuditTrail")
+async def list_audit_trail(
+    limit: Limit = DEFAULT_LIMIT,
+    cursor: Cursor = None,
+    entityType: Optional[
+        Literal["policy", "claim", "payment", "customer", "agent"]
+    ] = None,
+    entityId: Optional[str] = None,
+    fromDate: FromDate = None,
+    toDate: ToDate = None,
+) -> dict[str, Any]:
+    """List audit log entries one page at a time, optionally filtered by entity and timestamp"""
+    return await call(
+        get_client().list_audit_trail(
+            entityType=entityType,
+            entityId=entityId,
+            **_page_query(limit, cursor, fromDate, toDate),
+        )
+    )
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Insurance API MCP server")
+    parser.add_argument("--transport", choices=("stdio", "http"), default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.transport == "http":
+        mcp.run(transport="http", host=args.host, port=args.port)
+    else:
+        mcp.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+Asynchronous notification dispatcher
+Queues notifications in a local SQLite file and drains it with worker
+coroutines that batch by channel and recipient domain, honor per-channel and
+per-domain rate limits, drop duplicates and dead-letter repeated failures
+
+Usage:
+    python -m api.notifications enqueue reminders.ndjson
+    python -m api.notifications run --workers 8 --email-rate 50 --sms-rate 10
+    python -m api.notifications stats
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import statistics
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+import httpx
+
+from api.client import APIError, AsyncInsuranceClient
+
+DEFAULT_QUEUE_PATH = Path("notifications-queue.sqlite3")
+DEFAULT_DEDUP_WINDOW = 24 * 3600.0
+# How long a claimed message may stay inflight before another dispatcher
+# assumes its owner died and requeues it
+DEFAULT_LEASE = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    sent_at REAL,
+    notification_id TEXT,
+    last_error TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS messages_ready
+    ON messages (state, available_at, channel, domain);
+CREATE INDEX IF NOT EXISTS messages_dedup ON messages (dedup_key, enqueued_at);
+CREATE TABLE IF NOT EXISTS dispatcher_metrics (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    snapshot TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def _recipient(notification: dict[str, Any]) -> str:
+    if notification.get("type") == "sms" and notification.get("recipientPhone"):
+        return notification["recipientPhone"]
+    return notification["recipientEmail"].lower()
+
+
+def _domain(notification: dict[str, Any]) -> str:
+    return notification["recipientEmail"].rsplit("@", 1)[-1].lower()
+
+
+@dataclass
+class QueuedMessage:
+    id: int
+    channel: str
+    domain: str
+    payload: dict[str, Any]
+    attempts: int
+    enqueued_at: float
+
+
+class NotificationQueue:
+    """
+    Durable SQLite queue
+    Messages move queued -> inflight -> sent, or back to queued with a backoff,
+    or to dead after too many attempts. A claim is a lease: a dispatcher calls
+    recover_expired() to requeue what a crashed one left inflight for longer
+    than the lease, while a live one renews the leases it still holds.
+    Opening the queue changes nothing, so stats and enqueue are safe next to
+    a live dispatcher.
+    """
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH):
+        self.path = Path(path)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(messages)")}
+        if "claimed_at" not in columns:
+            # Queue files created before claims carried a lease
+            self._db.execute("ALTER TABLE messages ADD COLUMN claimed_at REAL")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def enqueue(
+        self,
+        notifications: Iterable[dict[str, Any]],
+        dedup_window: float = DEFAULT_DEDUP_WINDOW,
+    ) -> tuple[int, int]:
+        """
+        Queue notifications in one transaction, skipping any whose
+        (recipient, subject) was already queued within dedup_window seconds
+        Returns (queued, deduplicated)
+        """
+        now = time.time()
+        queued = deduped = 0
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            for notification in notifications:
+                key = f"{_recipient(notification)}\x1f{notification['subject']}"
+                duplicate = self._db.execute(
+                    "SELECT 1 FROM messages WHERE dedup_key = ? AND enqueued_at >= ? "
+                    "AND state != 'dead' LIMIT 1",
+                    (key, now - dedup_window),
+                ).fetchone()
+                if duplicate:
+                    deduped += 1
+                    continue
+                self._db.execute(
+                    "INSERT INTO messages (channel, domain, dedup_key, payload, "
+                    "enqueued_at, available_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        notification.get("type", "email"),
+                        _domain(notification),
+                        key,
+                        json.dumps(notification),
+                        now,
+                        now,
+                    ),
+                )
+                queued += 1
+        return queued, deduped
+
+    def claim_batch(self, max_size: int) -> list[QueuedMessage]:
+        """
+        Take up to max_size ready messages sharing the channel and domain of the
+        oldest ready message, marking them inflight
+        """
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            head = self._db.execute(
+                "SELECT channel, domain FROM messages WHERE state = 'queued' "
+                "AND available_at <= ? ORDER BY available_at, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if head is None:
+                return []
+            rows = self._db.execute(
+                "SELECT id, channel, domain, payload, attempts, enqueued_at "
+                "FROM messages WHERE state = 'queued' AND available_at <= ? "
+                "AND channel = ? AND domain = ? ORDER BY available_at, id LIMIT ?",
+                (now, *head, max_size),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE messages SET state = 'inflight', attempts = attempts + 1, "
+                "claimed_at = ? WHERE id = ?",
+                [(now, row[0]) for row in rows],
+            )
+        return [
+            QueuedMessage(
+                row[0], row[1], row[2], json.loads(row[3]), row[4] + 1, row[5]
+            )
+            for row in rows
+        ]
+
+    def recover_expired(
+        self, lease: float = DEFAULT_LEASE, held: Iterable[int] = ()
+    ) -> int:
+        """
+        Requeue messages claimed more than lease seconds ago and never settled,
+        except the held ones the calling dispatcher is still working on
+        """
+        now = time.time()
+        held = set(held)
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            expired = [
+                (now, row[0])
+                for row in self._db.execute(
+                    "SELECT id FROM messages WHERE state = 'inflight' "
+                    "AND (claimed_at IS NULL OR claimed_at < ?)",
+                    (now - lease,),
+                )
+                if row[0] not in held
+            ]
+            self._db.executemany(
+                "UPDATE messages SET state = 'queued', available_at = ? WHERE id = ?",
+                expired,
+            )
+        return len(expired)
+
+    def renew(self, message_ids: Iterable[int]) -> None:
+        """Restart the lease on messages that are still inflight"""
+        now = time.time()
+        self._db.executemany(
+            "UPDATE messages SET claimed_at = ? WHERE id = ? AND state = 'inflight'",
+            [(now, message_id) for message_id in message_ids],
+        )
+
+    def mark_sent(self, message_id: int, notification_id: Optional[str]) -> None:
+        self._db.execute(
+            "UPDATE messages SET state = 'sent', sent_at = ?, notification_id = ?, "
+            "last_error = NULL WHERE id = ?",
+            (time.time(), notification_id, message_id),
+        )
+
+    def retry_later(self, message_id: int, error: str, delay: float) -> None:
+        self._db.execute(
+            "UPDATE messages SET state = 'queued', available_at = ?, last_error = ? "
+            "WHERE id = ?",
+            (time.time() + delay, error, message_id),
+        )
+
+    def dead_letter(self, message_id: int, error: str) -> None:
+        self._db.execute(
+            "UPDATE messages SET state = 'dead', last_error = ? WHERE id = ?",
+            (error, message_id),
+        )
+
+    def requeue_dead(self) -> int:
+        """Give every dead letter a fresh set of attempts"""
+        cursor = self._db.execute(
+            "UPDATE messages SET state = 'queued', attempts = 0, available_at = ? "
+            "WHERE state = 'dead'",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+    def dead_letters(self, limit: int = 100) -> list[dict[str, Any]]:
+        rows = self._db.execute(
+            "SELECT id, attempts, last_error, payload FROM messages "
+            "WHERE state = 'dead' ORDER BY id LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            {
+                "id": r[0],
+                "attempts": r[1],
+                "error": r[2],
+                "notification": json.loads(r[3]),
+            }
+            for r in rows
+        ]
+
+    def depth(self) -> dict[str, int]:
+        """Message count per state"""
+        counts = dict(
+            self._db.execute("SELECT state, COUNT(*) FROM messages GROUP BY state")
+        )
+        return {
+            state: counts.get(state, 0)
+            for state in ("queued", "inflight", "sent", "dead")
+        }
+
+    def save_metrics(self, snapshot: dict[str, Any]) -> None:
+        """Publish a dispatcher's latest metrics for `stats` to read"""
+        self._db.execute(
+            "INSERT OR REPLACE INTO dispatcher_metrics (id, snapshot, updated_at) "
+            "VALUES (1, ?, ?)",
+            (json.dumps(snapshot), time.time()),
+        )
+
+    def last_metrics(self) -> Optional[dict[str, Any]]:
+        row = self._db.execute(
+            "SELECT snapshot, updated_at FROM dispatcher_metrics WHERE id = 1"
+        ).fetchone()
+        if row is None:
+            return None
+        return {**json.loads(row[0]), "ageSeconds": time.time() - row[1]}
+
+    def has_inflight(self) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM messages WHERE state = 'inflight' LIMIT 1"
+        ).fetchone()
+        return row is not None
+
+    def next_available_in(self) -> Optional[float]:
+        """Seconds until the earliest backed-off message is ready, if any"""
+        row = self._db.execute(
+            "SELECT MIN(available_at) FROM messages WHERE state = 'queued'"
+        ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+
+class RateLimiter:
+    """Token bucket; acquire() waits until a token is available"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class DispatchMetrics:
+    sent: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    batches: int = 0
+    started: float = field(default_factory=time.monotonic)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=10_000))
+
+    def snapshot(self, queue: NotificationQueue) -> dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        samples = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+        return {
+            "queue": queue.depth(),
+            "sent": self.sent,
+            "retried": self.retried,
+            "deadLettered": self.dead_lettered,
+            "batches": self.batches,
+            "throughputPerSecond": self.sent / elapsed if elapsed else 0.0,
+            "latencyMs": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": samples[-1] * 1000 if samples else None,
+                "mean": statistics.fmean(samples) * 1000 if samples else None,
+            },
+        }
+
+
+class NotificationDispatcher:
+    """Drains a NotificationQueue through POST /api/notifications"""
+
+    def __init__(
+        self,
+        client: AsyncInsuranceClient,
+        queue: NotificationQueue,
+        workers: int = 4,
+        batch_size: int = 50,
+        channel_rates: Optional[dict[str, float]] = None,
+        domain_rate: float = 20.0,
+        max_in_flight: int = 32,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        poll_interval: float = 0.5,
+        lease: float = DEFAULT_LEASE,
+        metrics_interval: float = 10.0,
+    ):
+        self.client = client
+        self.queue = queue
+        self.workers = workers
+        self.batch_size = batch_size
+        self.channel_rates = channel_rates or {"email": 50.0, "sms": 10.0, "both": 10.0}
+        self.domain_rate = domain_rate
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.metrics_interval = metrics_interval
+        self.metrics = DispatchMetrics()
+        self._limiters: dict[str, RateLimiter] = {}
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self.on_metrics: Optional[Callable[[dict[str, Any]], None]] = None
+        self._reported = 0.0
+        # Claimed and not yet settled; a batch can wait on its rate limiters
+        # for longer than the lease, so these are renewed until it finishes
+        self._held: set[int] = set()
+
+    def _limiter(self, key: str, rate: float) -> RateLimiter:
+        if key not in self._limiters:
+            self._limiters[key] = RateLimiter(rate)
+        return self._limiters[key]
+
+    def _failed(self, message: QueuedMessage, error: str, permanent: bool) -> None:
+        if permanent or message.attempts >= self.max_attempts:
+            self.queue.dead_letter(message.id, error)
+            self.metrics.dead_lettered += 1
+        else:
+            delay = self.backoff * 2 ** (message.attempts - 1)
+            self.queue.retry_later(message.id, error, delay)
+            self.metrics.retried += 1
+
+    async def _send(self, message: QueuedMessage) -> None:
+        await self._limiter(
+            f"channel:{message.channel}", self.channel_rates.get(message.channel, 10.0)
+        ).acquire()
+        await self._limiter(f"domain:{message.domain}", self.domain_rate).acquire()
+        try:
+            async with self._in_flight:
+                created = await self.client.post("/api/notifications", message.payload)
+        except (APIError, httpx.TransportError) as e:
+            error = getattr(e, "message", None) or str(e) or type(e).__name__
+            # Validation failures will fail the same way on every attempt
+            permanent = (
+                isinstance(e, APIError)
+                and 400 <= e.status_code < 500
+                and e.status_code != 429
+            )
+            self._failed(message, error, permanent)
+            return
+        except Exception as e:
+            # Anything else (a bad payload, a decoding error) settles this one
+            # message; letting it escape would kill the worker mid-batch
+            self._failed(message, f"{type(e).__name__}: {e}", permanent=False)
+            return
+        self.queue.mark_sent(message.id, (created or {}).get("id"))
+        self.metrics.sent += 1
+        self.metrics.latencies.append(time.time() - message.enqueued_at)
+
+    async def _worker(self, drain: bool) -> None:
+        while True:
+            self._report()
+            batch = self.queue.claim_batch(self.batch_size)
+            if batch:
+                self.metrics.batches += 1
+                self._held.update(m.id for m in batch)
+                try:
+                    await asyncio.gather(*(self._send(m) for m in batch))
+                finally:
+                    self._held.difference_update(m.id for m in batch)
+                continue
+            if self.queue.recover_expired(self.lease, self._held):
+                continue
+            wait = self.queue.next_available_in()
+            if drain and wait is None and not self.queue.has_inflight():
+                return
+            await asyncio.sleep(
+                self.poll_interval if wait is None else min(wait, self.poll_interval)
+            )
+
+    async def _keep_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            if self._held:
+                self.queue.renew(list(self._held))
+
+    def _report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now - self._reported >= self.metrics_interval:
+            self._reported = now
+            snapshot = self.metrics.snapshot(self.queue)
+            self.queue.save_metrics(snapshot)
+            if self.on_metrics is not None:
+                self.on_metrics(snapshot)
+
+    async def run(
+        self,
+        drain: bool = True,
+        on_metrics: Optional[Callable[[dict[str, Any]], None]] = None,
+    ) -> dict[str, Any]:
+        """
+        Run the workers; with drain they stop once nothing is queued or in flight
+        Every metrics_interval seconds a snapshot is saved for `stats` and
+        passed to on_metrics, so a --follow run that never returns still
+        reports
+        """
+        self.metrics = DispatchMetrics()
+        self.on_metrics = on_metrics
+        self._reported = time.monotonic()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.queue.recover_expired(self.lease)
+        keeper = asyncio.create_task(self._keep_leases())
+        try:
+            await asyncio.gather(*(self._worker(drain) for _ in range(self.workers)))
+        finally:
+            keeper.cancel()
+        self.on_metrics = None
+        self._report(force=True)
+        return self.metrics.snapshot(self.queue)
+
+
+def _read_ndjson(path: str) -> Iterable[dict[str, Any]]:
+    stream = sys.stdin if path == "-" else open(path)
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queue", type=Path, default=DEFAULT_QUEUE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Queue notifications from NDJSON")
+    enqueue.add_argument("file", help="NDJSON file of notification bodies, or -")
+    enqueue.add_argument("--dedup-window", type=float, default=DEFAULT_DEDUP_WINDOW)
+
+    run = commands.add_parser("run", help="Dispatch queued notifications")
+    run.add_argument("--workers", type=int, default=4)
+    run.add_argument("--batch-size", type=int, default=50)
+    run.add_argument("--email-rate", type=float, default=50.0)
+    run.add_argument("--sms-rate", type=float, default=10.0)
+    run.add_argument("--domain-rate", type=float, default=20.0)
+    run.add_argument("--max-in-flight", type=int, default=32)
+    run.add_argument("--max-attempts", type=int, default=5)
+    run.add_argument("--follow", action="store_true", help="Keep polling when empty")
+    run.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE,
+        help="Seconds before another dispatcher's unsettled claims are requeued",
+    )
+    run.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between metric snapshots (printed as NDJSON with --follow)",
+    )
+
+    commands.add_parser(
+        "stats", help="Queue depth per state and the last dispatcher metrics"
+    )
+    dead = commands.add_parser("dead", help="List dead letters")
+    dead.add_argument("--requeue", action="store_true")
+    args = parser.parse_args()
+
+    queue = NotificationQueue(args.queue)
+    try:
+        if args.command == "enqueue":
+            queued, deduped = queue.enqueue(_read_ndjson(args.file), args.dedup_window)
+            print(f"Queued {queued}, dropped {deduped} duplicates")
+        elif args.command == "run":
+
+            async def dispatch() -> dict[str, Any]:
+                async with AsyncInsuranceClient() as client:
+                    dispatcher = NotificationDispatcher(
+                        client,
+                        queue,
+                        workers=args.workers,
+                        batch_size=args.batch_size,
+                        channel_rates={
+                            "email": args.email_rate,
+                            "sms": args.sms_rate,
+                            "both": min(args.email_rate, args.sms_rate),
+                        },
+                        domain_rate=args.domain_rate,
+                        max_in_flight=args.max_in_flight,
+                        max_attempts=args.max_attempts,
+                        lease=args.lease,
+                        metrics_interval=args.metrics_interval,
+                    )
+                    return await dispatcher.run(
+                        drain=not args.follow,
+                        on_metrics=(
+                            (lambda m: print(json.dumps(m), flush=True))
+                            if args.follow
+                            else None
+                        ),
+                    )
+
+            print(json.dumps(asyncio.run(dispatch()), indent=2))
+        elif args.command == "stats":
+            print(
+                json.dumps(
+                    {**queue.depth(), "dispatcher": queue.last_metrics()}, indent=2
+                )
+            )
+        elif args.requeue:
+            print(f"Requeued {queue.requeue_dead()} dead letters")
+        else:
+            print(json.dumps(queue.dead_letters(), indent=2))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
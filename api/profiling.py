@@ -0,0 +1,380 @@
+"""
+Client-side profiling for the Insurance API
+Records per-endpoint payload sizes, compressibility, decode and transfer times,
+and per-suite CPU, allocation and network-wait profiles of the test client
+"""
+
+import cProfile
+import gzip
+import io
+import json
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Any path segment carrying an uppercase letter or digit is an entity ID
+_ID_SEGMENT = re.compile(r"[A-Z0-9]")
+
+
+def endpoint_template(path: str) -> str:
+    """Collapse concrete IDs so /api/policies/POL-1-abc becomes /api/policies/{id}"""
+    segments = path.split("?", 1)[0].rstrip("/").split("/")
+    return "/".join("{id}" if _ID_SEGMENT.search(s) else s for s in segments)
+
+
+def compressed_sizes(body: bytes) -> dict[str, Optional[int]]:
+    """Size of the body under each codec a client could negotiate"""
+    sizes: dict[str, Optional[int]] = {"gzip": len(gzip.compress(body, compresslevel=6))}
+    sizes["br"] = len(brotli.compress(body, quality=5)) if brotli else None
+    sizes["zstd"] = (
+        len(zstandard.ZstdCompressor(level=3).compress(body)) if zstandard else None
+    )
+    return sizes
+
+
+@dataclass
+class EndpointStats:
+    """Accumulated measurements for one METHOD + path template"""
+
+    endpoint: str
+    calls: int = 0
+    raw_bytes: int = 0
+    wire_bytes: int = 0
+    compressed_bytes: dict[str, int] = field(default_factory=dict)
+    decode_seconds: float = 0.0
+    ttfb_seconds: float = 0.0
+    transfer_seconds: float = 0.0
+    max_raw_bytes: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "calls": self.calls,
+            "raw_bytes": self.raw_bytes,
+            "wire_bytes": self.wire_bytes,
+            "compressed_bytes": dict(self.compressed_bytes),
+            "decode_ms": self.decode_seconds * 1000,
+            "ttfb_ms": self.ttfb_seconds * 1000,
+            "transfer_ms": self.transfer_seconds * 1000,
+            "max_raw_bytes": self.max_raw_bytes,
+        }
+
+
+class PayloadProfiler:
+    """Collects per-endpoint payload measurements from any HTTP client"""
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.sample_urls: dict[str, str] = {}
+        self.encoding_results: list[dict[str, Any]] = []
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        path: str,
+        body: bytes,
+        wire_bytes: int,
+        ttfb_seconds: float,
+        total_seconds: float,
+        status: int = 200,
+    ) -> None:
+        """
+        Record one response; body is the decoded (uncompressed) payload
+        Only successful GETs become the sample URL compare_encodings re-fetches
+        """
+        key = f"{method.upper()} {endpoint_template(path)}"
+        stats = self.endpoints.setdefault(key, EndpointStats(key))
+
+        decode_seconds = 0.0
+        if body:
+            start = time.perf_counter()
+            try:
+                json.loads(body)
+            except ValueError:
+                pass
+            decode_seconds = time.perf_counter() - start
+
+        stats.calls += 1
+        stats.raw_bytes += len(body)
+        stats.wire_bytes += wire_bytes
+        stats.max_raw_bytes = max(stats.max_raw_bytes, len(body))
+        stats.decode_seconds += decode_seconds
+        stats.ttfb_seconds += ttfb_seconds
+        stats.transfer_seconds += max(0.0, total_seconds - ttfb_seconds)
+        for codec, size in compressed_sizes(body).items():
+            if size is not None:
+                stats.compressed_bytes[codec] = stats.compressed_bytes.get(codec, 0) + size
+
+        if method.upper() == "GET" and 200 <= status < 300:
+            self.sample_urls.setdefault(key, url)
+
+    def compare_encodings(
+        self,
+        fetch: Callable[[str, str], tuple[int, float]],
+        accept_encoding: str,
+        repeat: int = 3,
+    ) -> list[dict[str, Any]]:
+        """
+        Re-fetch one URL per GET endpoint with and without compression
+        fetch(url, accept_encoding) must return (wire_bytes, total_seconds).
+        Call it before deleting test records, or their URLs measure a 404
+        """
+        self.encoding_results = []
+        for key, url in self.sample_urls.items():
+            identity = [fetch(url, "identity") for _ in range(repeat)]
+            negotiated = [fetch(url, accept_encoding) for _ in range(repeat)]
+            self.encoding_results.append(
+                {
+                    "endpoint": key,
+                    "identity_bytes": min(b for b, _ in identity),
+                    "encoded_bytes": min(b for b, _ in negotiated),
+                    "identity_ms": min(s for _, s in identity) * 1000,
+                    "encoded_ms": min(s for _, s in negotiated) * 1000,
+                }
+            )
+        return self.encoding_results
+
+    def ranked(self, by: str = "bandwidth") -> list[EndpointStats]:
+        """Endpoints ordered by total wire bytes ("bandwidth") or decode time ("cpu")"""
+        if by == "cpu":
+            sort_key = lambda s: s.decode_seconds
+        else:
+            sort_key = lambda s: s.wire_bytes or s.raw_bytes
+        return sorted(self.endpoints.values(), key=sort_key, reverse=True)
+
+    def report(self, top: int = 15) -> str:
+        """Human-readable ranked report"""
+        lines = ["Payload profile - ranked by bandwidth"]
+        header = (
+            f"{'endpoint':<48} {'calls':>5} {'raw KB':>9} {'wire KB':>9} "
+            f"{'gzip KB':>9} {'br KB':>9} {'zstd KB':>9} {'decode ms':>10} {'xfer ms':>9}"
+        )
+        lines += [header, "-" * len(header)]
+
+        def kb(value: Optional[int]) -> str:
+            return "-" if value is None else f"{value / 1024:.1f}"
+
+        for stats in self.ranked("bandwidth")[:top]:
+            compressed = stats.compressed_bytes
+            lines.append(
+                f"{stats.endpoint[:48]:<48} {stats.calls:>5} {kb(stats.raw_bytes):>9} "
+                f"{kb(stats.wire_bytes):>9} {kb(compressed.get('gzip')):>9} "
+                f"{kb(compressed.get('br')):>9} {kb(compressed.get('zstd')):>9} "
+                f"{stats.decode_seconds * 1000:>10.2f} {stats.transfer_seconds * 1000:>9.2f}"
+            )
+
+        lines += ["", "Top client CPU (JSON decode)"]
+        for stats in self.ranked("cpu")[:5]:
+            lines.append(f"  {stats.decode_seconds * 1000:8.2f} ms  {stats.endpoint}")
+
+        if self.encoding_results:
+            lines += ["", "Accept-Encoding end-to-end savings"]
+            total_identity = total_encoded = 0
+            for r in self.encoding_results:
+                total_identity += r["identity_bytes"]
+                total_encoded += r["encoded_bytes"]
+                saved = 1 - r["encoded_bytes"] / r["identity_bytes"] if r["identity_bytes"] else 0
+                lines.append(
+                    f"  {r['endpoint'][:48]:<48} {kb(r['identity_bytes']):>9} -> "
+                    f"{kb(r['encoded_bytes']):>9} KB ({saved:6.1%})  "
+                    f"{r['identity_ms']:7.2f} -> {r['encoded_ms']:7.2f} ms"
+                )
+            if total_identity:
+                lines.append(
+                    f"  total {kb(total_identity)} KB -> {kb(total_encoded)} KB "
+                    f"({1 - total_encoded / total_identity:.1%} saved)"
+                )
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "endpoints": [s.as_dict() for s in self.ranked("bandwidth")],
+            "encodings": self.encoding_results,
+        }
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+@dataclass
+class SuiteProfile:
+    """Where one suite's wall time went"""
+
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    network_seconds: float = 0.0
+    requests: int = 0
+    allocated_bytes: int = 0
+    peak_bytes: int = 0
+    top_functions: list[str] = field(default_factory=list)
+
+    @property
+    def other_seconds(self) -> float:
+        """Wall time that is neither client CPU nor network wait (sleeps, GC, I/O)"""
+        return max(0.0, self.wall_seconds - self.cpu_seconds - self.network_seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "suite": self.name,
+            "wall_ms": self.wall_seconds * 1000,
+            "client_cpu_ms": self.cpu_seconds * 1000,
+            "network_wait_ms": self.network_seconds * 1000,
+            "other_ms": self.other_seconds * 1000,
+            "requests": self.requests,
+            "allocated_bytes": self.allocated_bytes,
+            "peak_bytes": self.peak_bytes,
+            "top_functions": self.top_functions,
+        }
+
+
+class SuiteProfiler:
+    """
+    Wraps test suites in cProfile and tracemalloc
+    Each suite leaves <name>.pstats and <name>.alloc.txt in output_dir. HTTP
+    clients report their blocking time through network_wait() so it can be
+    told apart from client CPU.
+    """
+
+    def __init__(self, output_dir: Path, top: int = 25, traceback_limit: int = 1):
+        self.output_dir = Path(output_dir)
+        self.top = top
+        self.traceback_limit = traceback_limit
+        self.suites: list[SuiteProfile] = []
+        self._current: Optional[SuiteProfile] = None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def network_wait(self) -> Iterator[None]:
+        """
+        Time a blocking request; the CPU the client spends inside it (encoding,
+        parsing headers) still counts as CPU, only the remainder as network wait
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            suite = self._current
+            if suite is not None:
+                suite.requests += 1
+                suite.network_seconds += max(
+                    0.0,
+                    (time.perf_counter() - wall) - (time.process_time() - cpu),
+                )
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[SuiteProfile]:
+        suite = SuiteProfile(name)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.traceback_limit)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        self._current = suite
+        wall, cpu = time.perf_counter(), time.process_time()
+        profiler.enable()
+        try:
+            yield suite
+        finally:
+            profiler.disable()
+            suite.wall_seconds = time.perf_counter() - wall
+            suite.cpu_seconds = time.process_time() - cpu
+            self._current = None
+            after = tracemalloc.take_snapshot()
+            _, suite.peak_bytes = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            self._save(suite, profiler, before, after)
+            self.suites.append(suite)
+
+    def _save(
+        self,
+        suite: SuiteProfile,
+        profiler: cProfile.Profile,
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+    ) -> None:
+        stem = self.output_dir / _slug(suite.name)
+        profiler.dump_stats(f"{stem}.pstats")
+
+        stats = pstats.Stats(profiler)
+        ranked = sorted(stats.stats.items(), key=lambda kv: kv[1][2], reverse=True)
+        suite.top_functions = [
+            f"{pstats.func_std_string(func)} {timing[2] * 1000:.2f}ms"
+            for func, timing in ranked[:5]
+        ]
+
+        # Ignore the profilers' own bookkeeping
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+        ]
+        diff = after.filter_traces(filters).compare_to(
+            before.filter_traces(filters), "lineno"
+        )
+        suite.allocated_bytes = sum(max(0, d.size_diff) for d in diff)
+
+        cumulative = io.StringIO()
+        pstats.Stats(profiler, stream=cumulative).sort_stats("cumulative").print_stats(
+            self.top
+        )
+        lines = [
+            f"Suite {suite.name}",
+            f"wall {suite.wall_seconds * 1000:.1f} ms, client CPU "
+            f"{suite.cpu_seconds * 1000:.1f} ms, network wait "
+            f"{suite.network_seconds * 1000:.1f} ms over {suite.requests} requests",
+            f"allocated {suite.allocated_bytes / 1024:.1f} KB net, "
+            f"peak {suite.peak_bytes / 1024:.1f} KB",
+            "",
+            f"Top {self.top} allocation sites (net growth)",
+        ]
+        lines += [f"  {d}" for d in diff[: self.top]]
+        lines += ["", "Top functions by cumulative time", cumulative.getvalue()]
+        Path(f"{stem}.alloc.txt").write_text("\n".join(lines))
+
+    def report(self) -> str:
+        """Per-suite breakdown, slowest suite first"""
+        header = (
+            f"{'suite':<32} {'reqs':>5} {'wall ms':>9} {'cpu ms':>9} "
+            f"{'net ms':>9} {'other ms':>9} {'alloc KB':>9} {'peak KB':>9}"
+        )
+        lines = ["Suite profile - client CPU vs network wait", header, "-" * len(header)]
+        for s in sorted(self.suites, key=lambda s: s.wall_seconds, reverse=True):
+            lines.append(
+                f"{s.name[:32]:<32} {s.requests:>5} {s.wall_seconds * 1000:>9.1f} "
+                f"{s.cpu_seconds * 1000:>9.1f} {s.network_seconds * 1000:>9.1f} "
+                f"{s.other_seconds * 1000:>9.1f} {s.allocated_bytes / 1024:>9.1f} "
+                f"{s.peak_bytes / 1024:>9.1f}"
+            )
+        wall = sum(s.wall_seconds for s in self.suites)
+        cpu = sum(s.cpu_seconds for s in self.suites)
+        network = sum(s.network_seconds for s in self.suites)
+        if wall:
+            lines.append(
+                f"\ntotal {wall * 1000:.1f} ms: client CPU {cpu / wall:.1%}, "
+                f"network wait {network / wall:.1%}"
+            )
+        lines.append(f"pstats and allocation reports in {self.output_dir}")
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"suites": [s.as_dict() for s in self.suites]}
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Premium reconciliation engine
+Loads policies.json and payments.json into sorted columnar arrays, computes
+each policy's paid-to-date with a group-by over prefix sums, and flags
+underpaid, lapsed and overpaid policies as of any date. Re-runs only
+re-evaluate policies whose payments or terms changed.
+
+Usage:
+    python -m api.reconciliation --as-of 2025-06-30
+    python -m api.reconciliation --as-of 2025-06-30 --state reconcile.json --flagged
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from heapq import merge
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Iterable, Literal, Optional
+
+from api.storage import DATA_DIR, read_json_file
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+Billing = Literal["monthly", "annual"]
+
+MONTH_DAYS = 365.25 / 12
+DEFAULT_GRACE_DAYS = 30.0
+DEFAULT_TOLERANCE = 0.01
+KEY_SECONDS = 2**32 - 1
+STATUSES = ("current", "underpaid", "lapsed", "overpaid", "not_started")
+
+
+def _timestamp(value: str) -> float:
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _day(value: str) -> float:
+    """Days since the Unix epoch"""
+    return _timestamp(value) / 86400
+
+
+def _second(day: float) -> int:
+    """Whole epoch seconds, clamped to the 32 bits a ledger key holds"""
+    return min(max(math.floor(day * 86400), 0), KEY_SECONDS)
+
+
+def _iso(day: float) -> str:
+    moment = datetime.fromtimestamp(day * 86400, timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def _changed_at(record: dict[str, Any]) -> str:
+    return max(record.get("updatedAt") or "", record.get("createdAt") or "")
+
+
+@dataclass
+class PolicyBalance:
+    policyId: str
+    status: str
+    premium: float
+    due: float
+    paid: float
+    pending: float
+    balance: float
+    installmentsDue: int
+    installmentsPaid: int
+    lapsedSince: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class PolicyTerms:
+    """
+    Policy columns in a fixed order; a policy's position is its group key
+
+    installments is the full term's count, so an installment is always
+    premium / installments. billable caps how many of them fall due: all of
+    them, or for a cancelled policy only those due before it was cancelled
+    (taken as its updatedAt).
+    """
+
+    def __init__(self, policies: list[dict[str, Any]], billing: Billing):
+        self.ids = [p["id"] for p in policies]
+        self.position = {policy_id: i for i, policy_id in enumerate(self.ids)}
+        self.premium = [float(p["premium"]) for p in policies]
+        self.start = [_day(p["startDate"]) for p in policies]
+        self.installments = [
+            (
+                max(1, round((_day(p["endDate"]) - start) / MONTH_DAYS))
+                if billing == "monthly"
+                else 1
+            )
+            for p, start in zip(policies, self.start)
+        ]
+        self.billable = list(self.installments)
+        for i, policy in enumerate(policies):
+            if policy.get("status") == "cancelled" and policy.get("updatedAt"):
+                # Installment k falls due at start + k months
+                months = (_day(policy["updatedAt"]) - self.start[i]) / MONTH_DAYS
+                self.billable[i] = max(0, min(self.installments[i], math.ceil(months)))
+        if numpy is not None:
+            for name in ("premium", "start", "installments", "billable"):
+                setattr(self, name, numpy.asarray(getattr(self, name)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class Ledger:
+    """
+    Payments sorted by (policy, paymentDate) with running totals
+
+    Each row's key packs the policy position above its paymentDate in epoch
+    seconds, so one sorted int64 column keeps every policy's rows contiguous
+    and in date order. Paid-to-date for any set of policies is then two
+    binary searches and a difference of prefix sums. Amounts are summed in
+    integer cents, so a policy's total is exact wherever its rows sit and an
+    incremental merge matches a full rebuild. Completed payments count as
+    paid and pending ones are tracked separately; failed and refunded
+    payments count for nothing.
+    """
+
+    def __init__(self, position: dict[str, int], payments: Iterable[dict[str, Any]]):
+        self.keys, self.paid, self.pending = self._rows(position, payments)
+        self._prefix()
+
+    @staticmethod
+    def _rows(position: dict[str, int], payments: Iterable[dict[str, Any]]) -> tuple:
+        keys, paid, pending = [], [], []
+        for payment in payments:
+            group = position.get(payment.get("policyId"))
+            if group is None or not payment.get("paymentDate"):
+                continue
+            second = int(_timestamp(payment["paymentDate"]))
+            keys.append(group << 32 | min(max(second, 0), KEY_SECONDS))
+            cents = round(float(payment["amount"]) * 100)
+            status = payment.get("status")
+            paid.append(cents if status == "completed" else 0)
+            pending.append(cents if status == "pending" else 0)
+        if numpy is None:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            return tuple([column[i] for i in order] for column in (keys, paid, pending))
+        keys = numpy.asarray(keys, dtype=numpy.int64)
+        order = numpy.argsort(keys, kind="stable")
+        return (
+            keys[order],
+            numpy.asarray(paid, dtype=numpy.int64)[order],
+            numpy.asarray(pending, dtype=numpy.int64)[order],
+        )
+
+    def _prefix(self):
+        if numpy is None:
+            self.paid_sum = list(accumulate(self.paid, initial=0))
+            self.pending_sum = list(accumulate(self.pending, initial=0))
+        else:
+            zero = numpy.zeros(1, dtype=numpy.int64)
+            self.paid_sum = numpy.concatenate((zero, numpy.cumsum(self.paid)))
+            self.pending_sum = numpy.concatenate((zero, numpy.cumsum(self.pending)))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def extend(self, position: dict[str, int], payments: Iterable[dict[str, Any]]):
+        """Merge new payments into place without re-sorting existing rows"""
+        keys, paid, pending = self._rows(position, payments)
+        if numpy is None:
+            rows = list(
+                merge(zip(self.keys, self.paid, self.pending), zip(keys, paid, pending))
+            )
+            self.keys, self.paid, self.pending = (list(c) for c in zip(*rows)) or (
+                [],
+                [],
+                [],
+            )
+        else:
+            at = numpy.searchsorted(self.keys, keys, side="right")
+            self.keys = numpy.insert(self.keys, at, keys)
+            self.paid = numpy.insert(self.paid, at, paid)
+            self.pending = numpy.insert(self.pending, at, pending)
+        self._prefix()
+
+    def to_date(self, groups: Any, as_of: float) -> tuple[Any, Any]:
+        """Paid and pending totals on or before as_of for each group"""
+        cutoff = _second(as_of)
+        if numpy is None:
+            paid, pending = [], []
+            for group in groups:
+                lo = bisect_left(self.keys, group << 32)
+                cut = bisect_right(self.keys, group << 32 | cutoff, lo)
+                paid.append((self.paid_sum[cut] - self.paid_sum[lo]) / 100)
+                pending.append((self.pending_sum[cut] - self.pending_sum[lo]) / 100)
+            return paid, pending
+
+        groups = numpy.asarray(groups, dtype=numpy.int64) << 32
+        lo = numpy.searchsorted(self.keys, groups)
+        cut = numpy.searchsorted(self.keys, groups | cutoff, side="right")
+        return (
+            (self.paid_sum[cut] - self.paid_sum[lo]) / 100,
+            (self.pending_sum[cut] - self.pending_sum[lo]) / 100,
+        )
+
+
+class Reconciler:
+    """
+    Reconciles every policy's payments against its premium schedule
+
+    Monthly billing spreads the premium over whole months of the term with
+    the first installment due on startDate; annual billing makes it all due
+    on startDate. A policy is underpaid when paid-to-date trails the amount
+    due, lapsed when its oldest unpaid installment is more than grace_days
+    overdue, and overpaid when it has paid more than every installment that
+    can fall due (for a cancelled policy, those due before cancellation).
+    """
+
+    def __init__(
+        self,
+        policies: list[dict[str, Any]],
+        payments: list[dict[str, Any]],
+        billing: Billing = "monthly",
+        grace_days: float = DEFAULT_GRACE_DAYS,
+        tolerance: float = DEFAULT_TOLERANCE,
+    ):
+        self.billing = billing
+        self.grace_days = grace_days
+        self.tolerance = tolerance
+        self._policies = {p["id"]: p for p in policies}
+        self._payments = {p["id"]: p for p in payments}
+        self._terms: Optional[PolicyTerms] = None
+        self._ledger: Optional[Ledger] = None
+        self._appended: list[dict[str, Any]] = []
+        self.results: dict[str, PolicyBalance] = {}
+        self.as_of: Optional[float] = None
+        self.evaluated = 0
+        self._dirty: set[str] = set(self._policies)
+
+    # Incremental input
+
+    def apply_payments(self, payments: Iterable[dict[str, Any]]) -> None:
+        """Add or replace payments; only their policies are re-evaluated"""
+        for payment in payments:
+            previous = self._payments.get(payment["id"])
+            if previous is not None:
+                # A replaced row can't be located by key alone, so rebuild
+                self._dirty.add(previous.get("policyId"))
+                self._ledger = None
+            elif self._ledger is not None:
+                self._appended.append(payment)
+            self._payments[payment["id"]] = payment
+            self._dirty.add(payment.get("policyId"))
+
+    def apply_policies(self, policies: Iterable[dict[str, Any]]) -> None:
+        """Add or replace policies; existing ones keep their ledger position"""
+        for policy in policies:
+            if policy["id"] not in self._policies:
+                # Its payments may already be on file but were left out of the ledger
+                self._ledger = None
+            self._policies[policy["id"]] = policy
+            self._dirty.add(policy["id"])
+        self._terms = None
+
+    def mark_dirty(self, policy_ids: Iterable[str]) -> None:
+        self._dirty.update(policy_ids)
+
+    def resume(self, as_of: float, results: dict[str, PolicyBalance]) -> None:
+        """Adopt a previous run's results; only policies marked dirty since are redone"""
+        self.as_of = as_of
+        self.results = dict(results)
+        self._dirty = self._policies.keys() ^ self.results.keys()
+
+    # Evaluation
+
+    def _columns(self) -> tuple[PolicyTerms, Ledger]:
+        if self._terms is None:
+            self._terms = PolicyTerms(list(self._policies.values()), self.billing)
+        if self._ledger is None:
+            self._ledger = Ledger(self._terms.position, self._payments.values())
+        elif self._appended:
+            self._ledger.extend(self._terms.position, self._appended)
+        self._appended.clear()
+        return self._terms, self._ledger
+
+    def reconcile(self, as_of: datetime | str | float) -> dict[str, PolicyBalance]:
+        """Balances for every policy as of a moment (datetime, ISO string or epoch days)"""
+        if isinstance(as_of, datetime):
+            as_of = as_of.isoformat()
+        if isinstance(as_of, str):
+            as_of = _day(as_of)
+        if as_of != self.as_of:
+            self._dirty = set(self._policies)
+            self.as_of = as_of
+
+        dirty = [p for p in self._dirty if p in self._policies]
+        for policy_id in self._dirty - set(dirty):
+            self.results.pop(policy_id, None)
+        terms, ledger = self._columns()
+        groups = [terms.position[p] for p in dirty]
+        self.results.update(zip(dirty, self._evaluate(terms, ledger, groups, as_of)))
+        self.evaluated = len(dirty)
+        self._dirty.clear()
+        return self.results
+
+    def _evaluate(
+        self, terms: PolicyTerms, ledger: Ledger, groups: list[int], as_of: float
+    ) -> list[PolicyBalance]:
+        if not groups:
+            return []
+        tolerance, grace = self.tolerance, self.grace_days
+        paid, pending = ledger.to_date(groups, as_of)
+        if numpy is None:
+            premium, start, count, billable = (
+                [getattr(terms, name)[g] for g in groups]
+                for name in ("premium", "start", "installments", "billable")
+            )
+            due_count = [
+                0 if as_of < s else min(b, math.floor((as_of - s) / MONTH_DAYS) + 1)
+                for s, b in zip(start, billable)
+            ]
+            # Most a policy can owe: the installments that ever fall due
+            billed = [pr * b / n for pr, b, n in zip(premium, billable, count)]
+            covered = [
+                min(n, math.floor((p + tolerance) * n / pr)) if pr > 0 else n
+                for p, pr, n in zip(paid, premium, count)
+            ]
+            due = [pr * d / n for pr, d, n in zip(premium, due_count, count)]
+            # The first installment the payments do not cover
+            overdue = [s + c * MONTH_DAYS for s, c in zip(start, covered)]
+            status = []
+            for p, bl, s, d, o in zip(paid, billed, start, due, overdue):
+                if p > bl + tolerance:
+                    status.append("overpaid")
+                elif as_of < s:
+                    status.append("not_started")
+                elif p - d >= -tolerance:
+                    status.append("current")
+                else:
+                    status.append("lapsed" if as_of - o > grace else "underpaid")
+            balance = [p - d for p, d in zip(paid, due)]
+        else:
+            index = numpy.asarray(groups)
+            premium = terms.premium[index]
+            start = terms.start[index]
+            count = terms.installments[index]
+            billable = terms.billable[index]
+            elapsed = numpy.floor((as_of - start) / MONTH_DAYS).astype(numpy.int64) + 1
+            due_count = numpy.where(as_of < start, 0, numpy.minimum(billable, elapsed))
+            billed = premium * billable / count
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                share = numpy.floor((paid + tolerance) * count / premium)
+            covered = numpy.where(
+                premium > 0, numpy.minimum(count, share), count
+            ).astype(numpy.int64)
+            due = premium * due_count / count
+            overdue = start + covered * MONTH_DAYS
+            status = numpy.select(
+                [
+                    paid > billed + tolerance,
+                    as_of < start,
+                    paid - due >= -tolerance,
+                    as_of - overdue > grace,
+                ],
+                ["overpaid", "not_started", "current", "lapsed"],
+                "underpaid",
+            )
+            balance = paid - due
+            columns = (status, premium, due, paid, pending, balance)
+            status, premium, due, paid, pending, balance = (c.tolist() for c in columns)
+            columns = (due_count, covered, overdue)
+            due_count, covered, overdue = (c.tolist() for c in columns)
+
+        return [
+            PolicyBalance(
+                policyId=terms.ids[group],
+                status=s,
+                premium=pr,
+                due=round(d, 2),
+                paid=round(p, 2),
+                pending=round(pe, 2),
+                balance=round(b, 2),
+                installmentsDue=dc,
+                installmentsPaid=c,
+                lapsedSince=_iso(o + grace) if s == "lapsed" else None,
+            )
+            for group, s, pr, d, p, pe, b, dc, c, o in zip(
+                groups,
+                status,
+                premium,
+                due,
+                paid,
+                pending,
+                balance,
+                due_count,
+                covered,
+                overdue,
+            )
+        ]
+
+    def summary(self) -> dict[str, Any]:
+        counts = dict.fromkeys(STATUSES, 0)
+        outstanding = 0.0
+        for result in self.results.values():
+            counts[result.status] += 1
+            outstanding += min(result.balance, 0.0)
+        return {
+            "asOf": _iso(self.as_of) if self.as_of is not None else None,
+            "policies": len(self.results),
+            "evaluated": self.evaluated,
+            **counts,
+            "outstanding": round(-outstanding, 2),
+        }
+
+
+def _payment_digests(payments: Iterable[dict[str, Any]]) -> dict[str, str]:
+    """
+    A digest of each policy's payment IDs, so a rerun notices payments that
+    were deleted or moved to another policy, which leave no newer timestamp
+    """
+    ids: dict[str, list[str]] = {}
+    for payment in payments:
+        ids.setdefault(payment.get("policyId"), []).append(payment["id"])
+    return {
+        policy_id: hashlib.blake2b(
+            "\n".join(sorted(payment_ids)).encode(), digest_size=8
+        ).hexdigest()
+        for policy_id, payment_ids in ids.items()
+        if policy_id is not None
+    }
+
+
+def _load_state(path: Optional[Path]) -> dict[str, Any]:
+    if path is None or not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--as-of",
+        help="ISO date or timestamp (default: the --state file's date, else today)",
+    )
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--billing", choices=("monthly", "annual"), default="monthly")
+    parser.add_argument("--grace-days", type=float, default=DEFAULT_GRACE_DAYS)
+    parser.add_argument(
+        "--state",
+        type=Path,
+        help="Results from the previous run; only changed policies are re-evaluated",
+    )
+    parser.add_argument(
+        "--flagged",
+        action="store_true",
+        help="Only underpaid, lapsed and overpaid policies",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    state = _load_state(args.state)
+    if args.as_of:
+        as_of = _day(args.as_of)
+    elif state.get("options"):
+        # Rerunning against a state file continues from the date it holds
+        as_of = state["options"]["asOf"]
+    else:
+        # Whole days, so reruns the same day can reuse a state file
+        as_of = _day(datetime.now(timezone.utc).date().isoformat())
+    started = time.perf_counter()
+    policies = read_json_file("policies.json", args.data_dir)
+    payments = read_json_file("payments.json", args.data_dir)
+    reconciler = Reconciler(policies, payments, args.billing, args.grace_days)
+
+    options = {
+        "asOf": as_of,
+        "billing": args.billing,
+        "graceDays": args.grace_days,
+    }
+    digests = _payment_digests(payments)
+    if state and state.get("options") == options and "payments" in state:
+        # Everything untouched since the last run keeps its stored result
+        watermark = state["watermark"]
+        changed = {p["policyId"] for p in payments if _changed_at(p) > watermark}
+        changed |= {p["id"] for p in policies if _changed_at(p) > watermark}
+        stored = state["payments"]
+        changed |= {
+            policy_id
+            for policy_id in stored.keys() | digests.keys()
+            if stored.get(policy_id) != digests.get(policy_id)
+        }
+        reconciler.resume(
+            options["asOf"],
+            {
+                policy_id: PolicyBalance(**result)
+                for policy_id, result in state["results"].items()
+            },
+        )
+        reconciler.mark_dirty(changed)
+    reconciler.reconcile(options["asOf"])
+    elapsed = time.perf_counter() - started
+
+    if args.state:
+        watermark = max((_changed_at(r) for r in (*policies, *payments)), default="")
+        args.state.write_text(
+            json.dumps(
+                {
+                    "options": options,
+                    "watermark": watermark,
+                    "payments": digests,
+                    "results": {
+                        policy_id: result.as_dict()
+                        for policy_id, result in reconciler.results.items()
+                    },
+                }
+            )
+        )
+
+    results = sorted(reconciler.results.values(), key=lambda r: (r.status, r.balance))
+    if args.flagged:
+        results = [r for r in results if r.status not in ("current", "not_started")]
+    summary = reconciler.summary()
+    if args.json:
+        print(
+            json.dumps({**summary, "results": [r.as_dict() for r in results]}, indent=2)
+        )
+        return
+
+    print(
+        f"Reconciled {summary['policies']} policies as of {summary['asOf']} "
+        f"({summary['evaluated']} evaluated) in {elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    print("  " + ", ".join(f"{s} {summary[s]}" for s in STATUSES))
+    print(f"  outstanding {summary['outstanding']:,.2f}")
+    for r in results[:50]:
+        print(
+            f"  {r.policyId:<28} {r.status:<11} due {r.due:>10,.2f}  "
+            f"paid {r.paid:>10,.2f}  balance {r.balance:>10,.2f}"
+            + (f"  lapsed since {r.lapsedSince}" if r.lapsedSince else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
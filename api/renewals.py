@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Renewal sweep job
+Indexes active policies by endDate, prices renewals for the ones expiring in a
+window from their risk assessment and claim history, and submits them
+concurrently with a resumable checkpoint journal
+
+Usage:
+    insurance-api-renewals --days 30 --checkpoint renewals.ckpt
+    python -m api.renewals --from 2025-01-01 --to 2025-02-01 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from bisect import bisect_left, insort
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from api.client import AsyncInsuranceClient
+from api.concurrency import gather_bounded
+from api.risk import get_assessment
+
+RISK_LOADING = {"low": 0.95, "medium": 1.0, "high": 1.15, "critical": 1.3}
+CLAIM_LOADING = 0.05
+CLAIM_LOADING_CAP = 0.30
+CLAIM_LOOKBACK = timedelta(days=3 * 365)
+INTENT_SKEW = timedelta(minutes=5)
+
+
+def _parse_date(value: str) -> datetime:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class ExpiryIndex:
+    """Policies kept sorted by endDate so a renewal window is two bisections"""
+
+    def __init__(self):
+        self._keys: list[tuple[datetime, str]] = []
+        self._policies: dict[str, dict[str, Any]] = {}
+        self._end_of: dict[str, tuple[datetime, str]] = {}
+
+    @classmethod
+    def from_policies(cls, policies: Iterable[dict[str, Any]]) -> "ExpiryIndex":
+        index = cls()
+        for policy in policies:
+            key = (_parse_date(policy["endDate"]), policy["id"])
+            index._policies[policy["id"]] = policy
+            index._end_of[policy["id"]] = key
+        index._keys = sorted(index._end_of.values())
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def upsert(self, policy: dict[str, Any]) -> None:
+        self.remove(policy["id"])
+        key = (_parse_date(policy["endDate"]), policy["id"])
+        insort(self._keys, key)
+        self._policies[policy["id"]] = policy
+        self._end_of[policy["id"]] = key
+
+    def remove(self, policy_id: str) -> None:
+        key = self._end_of.pop(policy_id, None)
+        if key is None:
+            return
+        del self._keys[bisect_left(self._keys, key)]
+        del self._policies[policy_id]
+
+    def expiring(self, start: datetime, end: datetime) -> list[dict[str, Any]]:
+        """Policies with start <= endDate < end, soonest first"""
+        lo = bisect_left(self._keys, (start, ""))
+        hi = bisect_left(self._keys, (end, ""), lo)
+        return [self._policies[policy_id] for _, policy_id in self._keys[lo:hi]]
+
+
+@dataclass
+class RenewalQuote:
+    policyId: str
+    renewalDate: str
+    newPremium: float
+    newCoverageAmount: float
+    riskLevel: Optional[str]
+    claimCount: int
+
+    def body(self) -> dict[str, Any]:
+        """Request body for POST /api/renewals"""
+        return {
+            "policyId": self.policyId,
+            "renewalDate": self.renewalDate,
+            "newPremium": self.newPremium,
+            "newCoverageAmount": self.newCoverageAmount,
+        }
+
+
+def price_renewal(
+    policy: dict[str, Any],
+    assessment: Optional[dict[str, Any]],
+    claims: list[dict[str, Any]],
+) -> RenewalQuote:
+    """
+    Current premium, scaled by the assessed risk level and loaded 5% per
+    non-rejected claim filed in the three years before expiry (capped at 30%)
+    """
+    expiry = _parse_date(policy["endDate"])
+    recent = [
+        c
+        for c in claims
+        if c.get("status") != "rejected"
+        and expiry - CLAIM_LOOKBACK <= _parse_date(c["filedDate"]) <= expiry
+    ]
+    risk_level = assessment.get("riskLevel") if assessment else None
+    factor = RISK_LOADING.get(risk_level, 1.0) * (
+        1 + min(CLAIM_LOADING * len(recent), CLAIM_LOADING_CAP)
+    )
+    return RenewalQuote(
+        policyId=policy["id"],
+        renewalDate=policy["endDate"],
+        newPremium=round(policy["premium"] * factor, 2),
+        newCoverageAmount=policy["coverageAmount"],
+        riskLevel=risk_level,
+        claimCount=len(recent),
+    )
+
+
+class Checkpoint:
+    """
+    Append-only NDJSON journal of renewal steps
+    The first line pins the window; replaying the rest tells a resumed sweep
+    which renewals already exist and which are already approved. An intent
+    line is written before each create, so a renewal whose POST may have
+    landed without being recorded can be looked up instead of sent twice
+    """
+
+    def __init__(self, path: Optional[Path], window: tuple[str, str]):
+        self.path = Path(path) if path else None
+        self.created: dict[str, str] = {}
+        self.approved: set[str] = set()
+        self.intents: dict[str, str] = {}
+        self._file = None
+        if self.path is None:
+            return
+
+        header = self._header(self.path)
+        if header is None:
+            # Missing, empty or torn header: nothing after it can be trusted
+            self._file = self.path.open("w")
+            self._write({"window": list(window)})
+            return
+        if header.get("window") != list(window):
+            raise ValueError(
+                f"{self.path} belongs to window {header.get('window')}, "
+                f"not {list(window)}"
+            )
+        with self.path.open() as f:
+            f.readline()
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from an interrupted write
+                    continue
+                if entry["step"] == "intent":
+                    self.intents[entry["policyId"]] = entry["at"]
+                    continue
+                self.intents.pop(entry["policyId"], None)
+                self.created[entry["policyId"]] = entry["renewalId"]
+                if entry["step"] == "approved":
+                    self.approved.add(entry["policyId"])
+        self._file = self.path.open("a")
+
+    @staticmethod
+    def _header(path: Path) -> Optional[dict[str, Any]]:
+        if not path.exists():
+            return None
+        with path.open() as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return None
+        return header if isinstance(header, dict) and "window" in header else None
+
+    @classmethod
+    def stored_window(cls, path: Optional[Path]) -> Optional[tuple[str, str]]:
+        """The window a journal was started for, if it has a readable header"""
+        header = cls._header(Path(path)) if path else None
+        return tuple(header["window"]) if header else None
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def record_intent(self, policy_id: str) -> None:
+        at = datetime.now(timezone.utc).isoformat()
+        self.intents[policy_id] = at
+        if self._file is not None:
+            self._write({"step": "intent", "policyId": policy_id, "at": at})
+
+    def record(self, step: str, policy_id: str, renewal_id: str) -> None:
+        self.intents.pop(policy_id, None)
+        self.created[policy_id] = renewal_id
+        if step == "approved":
+            self.approved.add(policy_id)
+        if self._file is not None:
+            self._write({"step": step, "policyId": policy_id, "renewalId": renewal_id})
+
+    def done(self, policy_id: str, approve: bool) -> bool:
+        return policy_id in (self.approved if approve else self.created)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass
+class SweepReport:
+    window: tuple[str, str]
+    indexed: int = 0
+    selected: int = 0
+    resumed: int = 0
+    created: int = 0
+    approved: int = 0
+    failed: list[dict[str, Any]] = field(default_factory=list)
+    quotes: list[dict[str, Any]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+async def build_index(client: AsyncInsuranceClient) -> ExpiryIndex:
+    """
+    One paginated pass over active policies
+    The Next.js route ignores the status filter, so it is re-applied here
+    """
+    return ExpiryIndex.from_policies(
+        [
+            p
+            async for p in client.iterate("/api/policies", status="active")
+            if p.get("status") == "active"
+        ]
+    )
+
+
+async def claim_history(
+    client: AsyncInsuranceClient, policy_ids: set[str]
+) -> dict[str, list[dict[str, Any]]]:
+    """Claims for the selected policies, grouped in a single pass over /api/claims"""
+    history: dict[str, list[dict[str, Any]]] = {pid: [] for pid in policy_ids}
+    async for claim in client.iterate("/api/claims"):
+        if claim.get("policyId") in history:
+            history[claim["policyId"]].append(claim)
+    return history
+
+
+async def recover_intents(client: AsyncInsuranceClient, checkpoint: Checkpoint) -> int:
+    """
+    Resolve creates a previous run started but never recorded
+
+    The renewals route does not filter by policy, so this is one scan of
+    /api/renewals matching policyId and a createdAt no earlier than the
+    intent (less INTENT_SKEW for clock drift). Intents left unmatched never
+    reached the server and are simply retried.
+    """
+    recovered = 0
+    async for renewal in client.iterate("/api/renewals"):
+        at = checkpoint.intents.get(renewal.get("policyId"))
+        if at is None or not renewal.get("createdAt"):
+            continue
+        if _parse_date(renewal["createdAt"]) >= _parse_date(at) - INTENT_SKEW:
+            checkpoint.record("created", renewal["policyId"], renewal["id"])
+            recovered += 1
+    return recovered
+
+
+async def sweep(
+    client: AsyncInsuranceClient,
+    start: datetime,
+    end: datetime,
+    approve: bool = True,
+    concurrency: int = 8,
+    batch_size: int = 100,
+    checkpoint: Optional[Checkpoint] = None,
+    dry_run: bool = False,
+    index: Optional[ExpiryIndex] = None,
+) -> SweepReport:
+    """Price and submit renewals for active policies expiring in [start, end)"""
+    began = time.perf_counter()
+    window = (start.isoformat(), end.isoformat())
+    checkpoint = checkpoint or Checkpoint(None, window)
+    report = SweepReport(window)
+
+    index = index or await build_index(client)
+    report.indexed = len(index)
+    selected = index.expiring(start, end)
+    report.selected = len(selected)
+    todo = [p for p in selected if not checkpoint.done(p["id"], approve)]
+    report.resumed = report.selected - len(todo)
+    history = await claim_history(client, {p["id"] for p in todo})
+    if checkpoint.intents and not dry_run:
+        await recover_intents(client, checkpoint)
+
+    async def submit(quote: RenewalQuote) -> None:
+        renewal_id = checkpoint.created.get(quote.policyId)
+        if renewal_id is None:
+            checkpoint.record_intent(quote.policyId)
+            renewal = await client.post("/api/renewals", quote.body())
+            renewal_id = renewal["id"]
+            checkpoint.record("created", quote.policyId, renewal_id)
+            report.created += 1
+        if approve:
+            await client.post(f"/api/renewals/{renewal_id}/approve")
+            checkpoint.record("approved", quote.policyId, renewal_id)
+            report.approved += 1
+
+    for offset in range(0, len(todo), batch_size):
+        batch = todo[offset : offset + batch_size]
+        lookups = await gather_bounded(
+            [p["id"] for p in batch],
+            lambda policy_id: get_assessment(client, policy_id),
+            concurrency,
+        )
+        quotes = []
+        for policy, lookup in zip(batch, lookups):
+            if lookup.ok:
+                quotes.append(
+                    price_renewal(policy, lookup.result, history[policy["id"]])
+                )
+            else:
+                report.failed.append({"policyId": policy["id"], "error": lookup.error})
+
+        if dry_run:
+            report.quotes += [asdict(q) for q in quotes]
+            continue
+        for quote, outcome in zip(
+            quotes, await gather_bounded(quotes, submit, concurrency)
+        ):
+            if not outcome.ok:
+                report.failed.append(
+                    {"policyId": quote.policyId, "error": outcome.error}
+                )
+
+    report.elapsed_seconds = time.perf_counter() - began
+    return report
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--from",
+        dest="start",
+        help="Window start (default: the checkpoint's window, else today 00:00 UTC)",
+    )
+    parser.add_argument("--to", dest="end", help="Window end (default: start + --days)")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--checkpoint", type=Path, help="Journal file for resuming")
+    parser.add_argument("--no-approve", action="store_true")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Price without submitting"
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    stored = Checkpoint.stored_window(args.checkpoint)
+    if stored and not args.start and not args.end:
+        # Resuming: the journal pins the window it was started with
+        start, end = (_parse_date(value) for value in stored)
+    else:
+        # Whole days, so a rerun later the same day lands on the same window
+        today = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        start = _parse_date(args.start) if args.start else today
+        end = _parse_date(args.end) if args.end else start + timedelta(days=args.days)
+
+    async def run() -> SweepReport:
+        checkpoint = Checkpoint(args.checkpoint, (start.isoformat(), end.isoformat()))
+        try:
+            async with AsyncInsuranceClient() as client:
+                return await sweep(
+                    client,
+                    start,
+                    end,
+                    approve=not args.no_approve,
+                    concurrency=args.concurrency,
+                    batch_size=args.batch_size,
+                    checkpoint=checkpoint,
+                    dry_run=args.dry_run,
+                )
+        finally:
+            checkpoint.close()
+
+    report = asyncio.run(run())
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+        return
+
+    print(f"Renewal window {report.window[0]} .. {report.window[1]}")
+    print(f"  indexed {report.indexed} active policies, {report.selected} expiring")
+    print(f"  resumed {report.resumed} already done from checkpoint")
+    if args.dry_run:
+        print(f"  priced {len(report.quotes)} renewals (dry run)")
+    else:
+        print(f"  created {report.created}, approved {report.approved}")
+    print(f"  failed {len(report.failed)} in {report.elapsed_seconds:.2f}s")
+    for failure in report.failed[:10]:
+        print(f"    {failure['policyId']}: {failure['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Risk assessment lookups shared by the renewal sweep and the customer 360 view
+GET /api/risk-assessment/{policyId} returns the first assessment stored for
+the policy, not the most recent one. A policy without an assessment is a
+normal case for both callers, so it comes back as None rather than an APIError
+"""
+
+from typing import Any, Optional
+
+from api.client import APIError, AsyncInsuranceClient
+
+
+async def get_assessment(
+    client: AsyncInsuranceClient, policy_id: str
+) -> Optional[dict[str, Any]]:
+    """The policy's first stored risk assessment, or None when it has none"""
+    try:
+        return await client.get_risk_assessment(policy_id)
+    except APIError as e:
+        if e.status_code == 404:
+            return None
+        raise
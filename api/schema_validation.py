@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Compiled response-contract validation
+Compiles the JSON Schemas in public/openapi.yaml (or an MCP tools/list
+manifest) once into plain Python validator functions, caches them per
+endpoint, and checks responses or streamed records under a sampling rate or
+CPU budget
+
+Usage:
+    python -m api.schema_validation --records 100000
+"""
+
+import argparse
+import math
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import yaml
+
+try:
+    import jsonschema
+except ImportError:  # pragma: no cover - optional dependency
+    jsonschema = None
+
+OPENAPI_PATH = Path(__file__).resolve().parent.parent / "public" / "openapi.yaml"
+
+# A validator returns None when the value conforms, otherwise a message that
+# starts with the offending location relative to the value ("": ..., ".premium: ...")
+# Paths are only built on failure, so valid records never format strings
+Validator = Callable[[Any], Optional[str]]
+
+_DATE_TIME = re.compile(
+    r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})$"
+)
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_FORMATS = {"date-time": _DATE_TIME.match, "email": _EMAIL.match}
+
+# Exact-type lookups are cheaper than isinstance chains on the hot path
+_TYPES: dict[str, frozenset] = {
+    "string": frozenset((str,)),
+    "integer": frozenset((int,)),
+    "number": frozenset((int, float)),
+    "boolean": frozenset((bool,)),
+    "array": frozenset((list,)),
+    "object": frozenset((dict,)),
+    "null": frozenset((type(None),)),
+}
+
+
+def _ok(value: Any) -> Optional[str]:
+    return None
+
+
+class SchemaCompiler:
+    """
+    Turns JSON Schema (the OpenAPI 3.1 subset used by this API) into nested
+    closures. $refs are compiled once and shared, so each component schema
+    costs one compilation no matter how many endpoints use it.
+    """
+
+    def __init__(self, document: Optional[dict[str, Any]] = None):
+        self.document = document or {}
+        self._refs: dict[str, Validator] = {}
+
+    def resolve(self, ref: str) -> dict[str, Any]:
+        if not ref.startswith("#/"):
+            raise ValueError(f"Only local $refs are supported: {ref}")
+        node: Any = self.document
+        for part in ref[2:].split("/"):
+            node = node[part.replace("~1", "/").replace("~0", "~")]
+        return node
+
+    def compile(self, schema: Any) -> Validator:
+        if schema is True or schema == {}:
+            return _ok
+        if schema is False:
+            return lambda value: ": no value is allowed"
+
+        if "$ref" in schema:
+            ref = schema["$ref"]
+            if ref not in self._refs:
+                # Placeholder first so self-referencing schemas terminate
+                slot: list[Validator] = []
+                self._refs[ref] = lambda value: slot[0](value)
+                slot.append(self.compile(self.resolve(ref)))
+                self._refs[ref] = slot[0]
+            return self._refs[ref]
+
+        checks: list[Validator] = []
+        if "type" in schema:
+            checks.append(self._type_check(schema))
+        if "enum" in schema:
+            allowed = schema["enum"]
+            try:
+                allowed_set = frozenset(allowed)
+            except TypeError:
+                allowed_set = None
+
+            def check_enum(value):
+                try:
+                    if value in (allowed if allowed_set is None else allowed_set):
+                        return None
+                except TypeError:
+                    if value in allowed:
+                        return None
+                return f": {value!r} not in {allowed}"
+
+            checks.append(check_enum)
+        if "const" in schema:
+            const = schema["const"]
+            checks.append(
+                lambda value: None if value == const else f": expected {const!r}"
+            )
+
+        checks += self._string_checks(schema)
+        checks += self._number_checks(schema)
+        checks += self._array_checks(schema)
+        checks += self._object_checks(schema)
+        checks += self._combinator_checks(schema)
+
+        if not checks:
+            return _ok
+        if len(checks) == 1:
+            return checks[0]
+        checks_tuple = tuple(checks)
+
+        def check_all(value):
+            for check in checks_tuple:
+                error = check(value)
+                if error is not None:
+                    return error
+            return None
+
+        return check_all
+
+    def _type_check(self, schema: dict[str, Any]) -> Validator:
+        names = schema["type"]
+        names = [names] if isinstance(names, str) else list(names)
+        if schema.get("nullable"):
+            names.append("null")
+        allowed = frozenset().union(*(_TYPES[name] for name in names))
+        integral_floats = "integer" in names and float not in allowed
+        expected = "/".join(names)
+
+        def check_type(value):
+            kind = type(value)
+            if kind in allowed or (
+                integral_floats and kind is float and value.is_integer()
+            ):
+                return None
+            return f": expected {expected}, got {kind.__name__}"
+
+        return check_type
+
+    def _string_checks(self, schema: dict[str, Any]) -> list[Validator]:
+        checks: list[Validator] = []
+        if "minLength" in schema or "maxLength" in schema:
+            low = schema.get("minLength", 0)
+            high = schema.get("maxLength", math.inf)
+
+            def check_length(value):
+                if type(value) is str and not low <= len(value) <= high:
+                    return f": length {len(value)} outside [{low}, {high}]"
+                return None
+
+            checks.append(check_length)
+        if "pattern" in schema:
+            pattern = schema["pattern"]
+            search = re.compile(pattern).search
+            checks.append(
+                lambda value: (
+                    None
+                    if type(value) is not str or search(value)
+                    else f": does not match {pattern}"
+                )
+            )
+        match = _FORMATS.get(schema.get("format"))
+        if match is not None:
+            name = schema["format"]
+            checks.append(
+                lambda value: (
+                    None
+                    if type(value) is not str or match(value)
+                    else f": {value!r} is not a valid {name}"
+                )
+            )
+        return checks
+
+    def _number_checks(self, schema: dict[str, Any]) -> list[Validator]:
+        low = schema.get("minimum", -math.inf)
+        high = schema.get("maximum", math.inf)
+        low_open = schema.get("exclusiveMinimum")
+        high_open = schema.get("exclusiveMaximum")
+        # OpenAPI 3.0 spells exclusivity as a boolean next to minimum/maximum
+        if low_open is True:
+            low_open = low
+        if high_open is True:
+            high_open = high
+        if not isinstance(low_open, (int, float)) or isinstance(low_open, bool):
+            low_open = -math.inf
+        if not isinstance(high_open, (int, float)) or isinstance(high_open, bool):
+            high_open = math.inf
+        if (low, high, low_open, high_open) == (-math.inf, math.inf) * 2:
+            return []
+
+        def check_bounds(value):
+            kind = type(value)
+            if kind is not int and kind is not float:
+                return None
+            if low <= value <= high and low_open < value < high_open:
+                return None
+            return f": {value} outside the allowed range"
+
+        return [check_bounds]
+
+    def _array_checks(self, schema: dict[str, Any]) -> list[Validator]:
+        checks: list[Validator] = []
+        item = self.compile(schema["items"]) if "items" in schema else _ok
+        if item is not _ok:
+
+            def check_items(value):
+                if type(value) is not list:
+                    return None
+                for position, element in enumerate(value):
+                    error = item(element)
+                    if error is not None:
+                        return f"[{position}]{error}"
+                return None
+
+            checks.append(check_items)
+        if "minItems" in schema or "maxItems" in schema:
+            low = schema.get("minItems", 0)
+            high = schema.get("maxItems", math.inf)
+            checks.append(
+                lambda value: (
+                    None
+                    if type(value) is not list or low <= len(value) <= high
+                    else f": {len(value)} items outside [{low}, {high}]"
+                )
+            )
+        return checks
+
+    def _object_checks(self, schema: dict[str, Any]) -> list[Validator]:
+        properties = schema.get("properties") or {}
+        required = tuple(schema.get("required") or ())
+        additional = schema.get("additionalProperties", True)
+        if not properties and not required and additional is True:
+            return []
+
+        compiled = tuple(
+            (name, validator)
+            for name, validator in (
+                (name, self.compile(sub)) for name, sub in properties.items()
+            )
+            if validator is not _ok
+        )
+        known = frozenset(properties)
+        extra: Optional[Validator] = None
+        if additional is False:
+            extra = lambda value: ": unexpected property"
+        elif isinstance(additional, dict):
+            extra = self.compile(additional)
+
+        def check_object(value):
+            if type(value) is not dict:
+                return None
+            for name in required:
+                if name not in value:
+                    return f": missing required property {name!r}"
+            get = value.get
+            for name, validator in compiled:
+                field_value = get(name, _ok)
+                if field_value is not _ok:
+                    error = validator(field_value)
+                    if error is not None:
+                        return f".{name}{error}"
+            if extra is not None:
+                for name in value.keys() - known:
+                    error = extra(value[name])
+                    if error is not None:
+                        return f".{name}{error}"
+            return None
+
+        return [check_object]
+
+    def _combinator_checks(self, schema: dict[str, Any]) -> list[Validator]:
+        checks: list[Validator] = [self.compile(sub) for sub in schema.get("allOf", ())]
+        for keyword in ("anyOf", "oneOf"):
+            if keyword not in schema:
+                continue
+            options = tuple(self.compile(sub) for sub in schema[keyword])
+            exactly_one = keyword == "oneOf"
+
+            def check_options(value, options=options, exactly_one=exactly_one):
+                matches = sum(1 for option in options if option(value) is None)
+                if matches == 0 or (exactly_one and matches > 1):
+                    return f": matches {matches} of {len(options)} alternatives"
+                return None
+
+            checks.append(check_options)
+        return checks
+
+
+def _path_pattern(template: str) -> re.Pattern:
+    parts = re.split(r"(\{[^}]+\})", template)
+    return re.compile(
+        "^"
+        + "".join("[^/]+" if p.startswith("{") else re.escape(p) for p in parts)
+        + "$"
+    )
+
+
+@dataclass
+class ValidationStats:
+    checked: int = 0
+    skipped: int = 0
+    failed: int = 0
+    unknown_endpoints: int = 0
+    seconds: float = 0.0
+    compile_seconds: float = 0.0
+    failures: list[dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "unknownEndpoints": self.unknown_endpoints,
+            "validationMs": self.seconds * 1000,
+            "usPerRecord": self.seconds * 1e6 / self.checked if self.checked else 0.0,
+            "compileMs": self.compile_seconds * 1000,
+            "failures": self.failures,
+        }
+
+
+class ResponseValidator:
+    """
+    Validates API responses against the OpenAPI contract
+
+    Compiled validators are cached per (method, path template, status); the
+    one-off compile is timed in stats.compile_seconds, not stats.seconds. Each
+    record is checked with probability sample_rate; with cpu_budget set,
+    validation is additionally skipped whenever it has used more than that
+    share of wall time since the validator was created.
+    """
+
+    def __init__(
+        self,
+        spec: Optional[dict[str, Any]] = None,
+        sample_rate: float = 1.0,
+        cpu_budget: Optional[float] = None,
+        max_failures: int = 100,
+        seed: Optional[int] = None,
+    ):
+        self.spec = spec if spec is not None else load_openapi()
+        self.compiler = SchemaCompiler(self.spec)
+        self.sample_rate = sample_rate
+        self.cpu_budget = cpu_budget
+        self.max_failures = max_failures
+        self.stats = ValidationStats()
+        self._random = random.Random(seed)
+        self._started = time.perf_counter()
+        self._templates = [
+            (template.count("/"), _path_pattern(template), template)
+            for template in self.spec.get("paths", {})
+        ]
+        self._path_cache: dict[str, Optional[str]] = {}
+        self._validators: dict[tuple[str, str, str, bool], Optional[Validator]] = {}
+
+    @classmethod
+    def from_file(
+        cls, path: Path = OPENAPI_PATH, **options: Any
+    ) -> "ResponseValidator":
+        return cls(load_openapi(path), **options)
+
+    def template_for(self, path: str) -> Optional[str]:
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path not in self._path_cache:
+            depth = path.count("/")
+            # Literal segments beat parameters (/payments/policy/{id} vs /payments/{id})
+            candidates = [
+                template
+                for segments, pattern, template in self._templates
+                if segments == depth and pattern.match(path)
+            ]
+            candidates.sort(key=lambda t: t.count("{"))
+            if len(self._path_cache) > 10_000:
+                self._path_cache.clear()
+            self._path_cache[path] = candidates[0] if candidates else None
+        return self._path_cache[path]
+
+    def _response_schema(self, method: str, template: str, status: str) -> Any:
+        operation = self.spec["paths"][template].get(method) or {}
+        responses = operation.get("responses") or {}
+        response = responses.get(status) or responses.get(f"{status[0]}XX") or {}
+        if "$ref" in response:
+            response = self.compiler.resolve(response["$ref"])
+        content = response.get("content") or {}
+        return (content.get("application/json") or {}).get("schema")
+
+    def validator_for(
+        self, method: str, path: str, status: int, item: bool = False
+    ) -> Optional[Validator]:
+        """
+        Compiled validator for a response body, or for one element of it when
+        item is set and the documented body is an array
+        """
+        template = self.template_for(path)
+        if template is None:
+            return None
+        key = (method.lower(), template, str(status), item)
+        if key not in self._validators:
+            start = time.perf_counter()
+            schema = self._response_schema(*key[:3])
+            if item:
+                is_array = isinstance(schema, dict) and schema.get("type") == "array"
+                schema = schema.get("items") if is_array else None
+            self._validators[key] = self.compiler.compile(schema) if schema else None
+            self.stats.compile_seconds += time.perf_counter() - start
+        return self._validators[key]
+
+    def _sampled(self) -> bool:
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return False
+        if self.cpu_budget is not None:
+            elapsed = time.perf_counter() - self._started
+            if self.stats.seconds > self.cpu_budget * elapsed:
+                return False
+        return True
+
+    def _record_failure(self, endpoint: str, error: str) -> str:
+        error = "$" + error
+        self.stats.failed += 1
+        if len(self.stats.failures) < self.max_failures:
+            self.stats.failures.append({"endpoint": endpoint, "error": error})
+        return error
+
+    def check(
+        self, method: str, path: str, status: int, body: Any | Callable[[], Any]
+    ) -> Optional[str]:
+        """
+        Validate one decoded response body; returns the first error, if any
+        body may instead be a callable that decodes it (e.g. response.json),
+        so responses that are not sampled are never decoded
+        """
+        if not self._sampled():
+            self.stats.skipped += 1
+            return None
+        validator = self.validator_for(method, path, status)
+        if validator is None:
+            self.stats.unknown_endpoints += 1
+            return None
+        if callable(body):
+            body = body()
+        start = time.perf_counter()
+        if isinstance(body, dict) and "items" in body and "nextCursor" in body:
+            # Cursor pages wrap the documented array
+            body = body["items"]
+        error = validator(body)
+        self.stats.checked += 1
+        self.stats.seconds += time.perf_counter() - start
+        if error is not None:
+            return self._record_failure(f"{method.upper()} {path}", error)
+        return None
+
+    def stream(
+        self,
+        method: str,
+        path: str,
+        records: Iterable[dict[str, Any]],
+        status: int = 200,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Pass records of a list endpoint through, validating a sample of them
+        individually against the endpoint's item schema
+        """
+        validator = self.validator_for(method, path, status, item=True)
+        if validator is None:
+            self.stats.unknown_endpoints += 1
+            yield from records
+            return
+        endpoint = f"{method.upper()} {path}"
+        for record in records:
+            if self._sampled():
+                start = time.perf_counter()
+                error = validator(record)
+                self.stats.checked += 1
+                self.stats.seconds += time.perf_counter() - start
+                if error is not None:
+                    self._record_failure(endpoint, error)
+            else:
+                self.stats.skipped += 1
+            yield record
+
+
+def load_openapi(path: Path = OPENAPI_PATH) -> dict[str, Any]:
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, encoding="utf-8") as f:
+        return yaml.load(f, Loader=loader)
+
+
+def compile_tool_schemas(tools: Iterable[dict[str, Any]]) -> dict[str, Validator]:
+    """Compile the inputSchema of every tool in an MCP tools/list manifest"""
+    validators = {}
+    for tool in tools:
+        schema = tool.get("inputSchema") or {}
+        validators[tool["name"]] = SchemaCompiler(schema).compile(schema)
+    return validators
+
+
+def main():
+    """Main entry point"""
+    from api.benchmarks.fixtures import make_policy
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    records = [make_policy(i) for i in range(args.records)]
+    start = time.perf_counter()
+    validator = ResponseValidator(sample_rate=args.sample_rate)
+    validator.validator_for("GET", "/api/policies", 200)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in validator.stream("GET", "/api/policies", records):
+        pass
+    elapsed = time.perf_counter() - start
+    stats = validator.stats
+    print(f"compile: {compile_ms:.1f} ms")
+    print(
+        f"compiled: {stats.checked} checked, {stats.skipped} skipped, "
+        f"{stats.failed} failed in {elapsed:.3f}s "
+        f"({args.records / elapsed:,.0f} records/s)"
+    )
+
+    if jsonschema is not None:
+        policy = validator.spec["components"]["schemas"]["Policy"]
+        reference = jsonschema.Draft202012Validator(
+            policy, format_checker=jsonschema.FormatChecker()
+        )
+        sample = records[: min(len(records), 20_000)]
+        start = time.perf_counter()
+        for record in sample:
+            reference.is_valid(record)
+        elapsed = time.perf_counter() - start
+        print(f"jsonschema: {len(sample) / elapsed:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Segmented NDJSON collection storage
+Stores an append-heavy collection as size-rolled NDJSON segments, each with a
+sidecar offset index, so inserts append one line instead of rewriting the
+whole array and lookups by ID read one record through mmap. Compaction folds
+updates and deletes in the background, and import/export converts to and
+from the data/*.json array format without loss
+
+Usage:
+    python -m api.segments import data/audit-logs.json data/segments/audit-logs
+    python -m api.segments get data/segments/audit-logs AUD-001
+    python -m api.segments compact data/segments/audit-logs
+    python -m api.segments export data/segments/audit-logs data/audit-logs.json
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from api.storage import write_json_file
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+MANIFEST = "MANIFEST.json"
+TOMBSTONE = "$deleted"
+
+
+def _encode(record: dict[str, Any]) -> bytes:
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _write_manifest(directory: Path, manifest: dict[str, Any]) -> None:
+    path = directory / MANIFEST
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Segment:
+    """
+    One NDJSON data file plus its sidecar index
+
+    Each index line is "op<TAB>id<TAB>offset<TAB>length<TAB>rank", where op is
+    p (put) or d (delete) and rank is the record's position in array order.
+    The data line is written before its index line, so after a crash the
+    index can only lag the data and is repaired by rescanning the tail.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self.name = name
+        self.path = directory / name
+        self.index_path = self.path.with_suffix(".idx")
+        self.size = 0
+        self.live_bytes = 0
+        self._data = None
+        self._index = None
+        self._map: Optional[mmap.mmap] = None
+
+    def open_for_append(self) -> None:
+        self._data = self.path.open("ab")
+        self._index = self.index_path.open("ab")
+        self.size = self._data.tell()
+
+    def entries(self) -> Iterator[tuple[str, str, int, int, int]]:
+        """Index entries, repairing a torn or lagging index against the data file"""
+        if not self.path.exists():
+            return
+        data_size = self.path.stat().st_size
+        end = 0
+        good = 0
+        if self.index_path.exists():
+            with self.index_path.open("rb") as f:
+                for line in f:
+                    parts = line.rstrip(b"\n").split(b"\t")
+                    if not line.endswith(b"\n") or len(parts) != 5:
+                        break
+                    op, record_id = parts[0].decode(), parts[1].decode()
+                    offset, length, rank = (int(p) for p in parts[2:])
+                    if offset + length > data_size:
+                        break
+                    good += len(line)
+                    end = offset + length
+                    yield op, record_id, offset, length, rank
+            if good < self.index_path.stat().st_size:
+                os.truncate(self.index_path, good)
+        self.size = end
+        if data_size > end:
+            yield from self._rescan(end, data_size)
+
+    def _rescan(self, start: int, data_size: int):
+        """Index data lines written after the last index line"""
+        with self.path.open("rb") as f, self.index_path.open("ab") as index:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                deleted = TOMBSTONE in record
+                entry = (
+                    "d" if deleted else "p",
+                    record[TOMBSTONE] if deleted else record["id"],
+                    offset,
+                    len(line),
+                    -1,
+                )
+                index.write(self._index_line(*entry))
+                offset += len(line)
+                yield entry
+        self.size = offset
+        if offset < data_size:
+            # Torn final record from an interrupted append
+            os.truncate(self.path, offset)
+
+    @staticmethod
+    def _index_line(op: str, record_id: str, offset: int, length: int, rank: int):
+        return f"{op}\t{record_id}\t{offset}\t{length}\t{rank}\n".encode()
+
+    def append(self, op: str, record_id: str, line: bytes, rank: int) -> int:
+        offset = self.size
+        self._data.write(line)
+        self._index.write(self._index_line(op, record_id, offset, len(line), rank))
+        self.size += len(line)
+        return offset
+
+    def flush(self, fsync: bool = False) -> None:
+        if self._data is None:
+            return
+        self._data.flush()
+        self._index.flush()
+        if fsync:
+            os.fsync(self._data.fileno())
+            os.fsync(self._index.fileno())
+
+    def mapped(self) -> mmap.mmap:
+        """Read-only map of the whole data file"""
+        if self._map is None or len(self._map) < self.size:
+            # The active segment grows under the map; remap once past its end
+            self.flush()
+            if self._map is not None:
+                self._map.close()
+            with self.path.open("rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self.mapped()[offset : offset + length]
+
+    def seal(self) -> None:
+        self.flush(fsync=True)
+        for handle in (self._data, self._index):
+            if handle is not None:
+                handle.close()
+        self._data = self._index = None
+
+    def close(self) -> None:
+        self.seal()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def unlink(self) -> None:
+        self.close()
+        for path in (self.path, self.index_path):
+            path.unlink(missing_ok=True)
+
+
+class SegmentStore:
+    """
+    A collection stored as an ordered list of segments
+
+    The newest segment takes appends and rolls once it reaches
+    max_segment_bytes. Every put or delete is one appended line, and the
+    in-memory index maps each live ID to its latest location. Reads, writes
+    and the compaction swap share one lock; compaction does its copying
+    outside it.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        fsync: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync = fsync
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._index: dict[str, tuple[Segment, int, int, int]] = {}
+        self._segments: list[Segment] = []
+        self._next_rank = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._load()
+
+    # Manifest and recovery
+
+    def _load(self) -> None:
+        path = self.directory / MANIFEST
+        manifest = json.loads(path.read_text()) if path.exists() else {}
+        self._next_sequence = manifest.get("nextSequence", 1)
+        for name in manifest.get("segments", []):
+            segment = Segment(self.directory, name)
+            self._segments.append(segment)
+            for op, record_id, offset, length, rank in segment.entries():
+                self._apply(segment, op, record_id, offset, length, rank)
+        if not self._segments:
+            self._roll()
+        else:
+            self._segments[-1].open_for_append()
+
+    def _apply(
+        self, segment: Segment, op: str, record_id: str, offset: int, length: int, rank
+    ) -> None:
+        previous = self._index.pop(record_id, None)
+        if previous is not None:
+            previous[0].live_bytes -= previous[2]
+            if rank < 0:
+                rank = previous[3]
+        if op == "p":
+            if rank < 0:
+                rank = self._next_rank
+            self._index[record_id] = (segment, offset, length, rank)
+            segment.live_bytes += length
+            self._next_rank = max(self._next_rank, rank + 1)
+
+    def _manifest(self) -> dict[str, Any]:
+        return {
+            "segments": [segment.name for segment in self._segments],
+            "nextSequence": self._next_sequence,
+        }
+
+    def _new_segment(self) -> Segment:
+        segment = Segment(self.directory, f"seg-{self._next_sequence:06d}.ndjson")
+        self._next_sequence += 1
+        # Leftovers of a compaction that crashed before its manifest swap
+        segment.unlink()
+        return segment
+
+    def _roll(self) -> None:
+        if self._segments:
+            self._segments[-1].seal()
+        segment = self._new_segment()
+        segment.open_for_append()
+        self._segments.append(segment)
+        _write_manifest(self.directory, self._manifest())
+
+    # Reads
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._index
+
+    def get(self, record_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            location = self._index.get(record_id)
+            if location is None:
+                return None
+            segment, offset, length, _ = location
+            return json.loads(segment.read(offset, length))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Live records in array order (first-insertion order)"""
+        with self._lock:
+            locations = sorted(self._index.values(), key=itemgetter(3))
+            maps = {
+                segment: segment.mapped() for segment in self._segments if segment.size
+            }
+            loads = json.loads
+            return iter(
+                [
+                    loads(maps[segment][offset : offset + length])
+                    for segment, offset, length, _ in locations
+                ]
+            )
+
+    # Writes
+
+    def _write(self, op: str, record_id: str, line: bytes) -> None:
+        active = self._segments[-1]
+        previous = self._index.get(record_id)
+        rank = previous[3] if previous else self._next_rank
+        offset = active.append(op, record_id, line, rank)
+        self._apply(active, op, record_id, offset, len(line), rank)
+
+    def _commit(self) -> None:
+        active = self._segments[-1]
+        active.flush(self.fsync)
+        if active.size >= self.max_segment_bytes:
+            self._roll()
+
+    def put(self, record: dict[str, Any]) -> None:
+        """Insert a record, or replace the stored record with the same ID"""
+        with self._lock:
+            self._write("p", record["id"], _encode(record))
+            self._commit()
+
+    def put_many(self, records) -> int:
+        """Append a batch with one flush at the end; returns the count written"""
+        count = 0
+        with self._lock:
+            for record in records:
+                self._write("p", record["id"], _encode(record))
+                count += 1
+                if self._segments[-1].size >= self.max_segment_bytes:
+                    self._commit()
+            self._commit()
+        return count
+
+    def update(
+        self, record_id: str, changes: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        """Merge changes into a stored record, like the PUT handlers do"""
+        with self._lock:
+            current = self.get(record_id)
+            if current is None:
+                return None
+            updated = {**current, **changes}
+            self.put(updated)
+            return updated
+
+    def delete(self, record_id: str) -> bool:
+        with self._lock:
+            if record_id not in self._index:
+                return False
+            self._write("d", record_id, _encode({TOMBSTONE: record_id}))
+            self._commit()
+            return True
+
+    # Compaction
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = sum(segment.size for segment in self._segments)
+            live = sum(segment.live_bytes for segment in self._segments)
+            return {
+                "records": len(self._index),
+                "segments": len(self._segments),
+                "bytes": total,
+                "liveBytes": live,
+                "garbageRatio": (total - live) / total if total else 0.0,
+            }
+
+    def compact(self) -> dict[str, Any]:
+        """
+        Rewrite every sealed segment into fresh ones holding only the latest
+        version of each live record, rolled at max_segment_bytes
+        """
+        with self._compaction_lock:
+            return self._compact()
+
+    def _compact(self) -> dict[str, Any]:
+        started = time.perf_counter()
+        with self._lock:
+            # Seal the active segment so everything written so far is eligible
+            self._roll()
+            victims = self._segments[:-1]
+            victim_set = set(victims)
+            snapshot = sorted(
+                (
+                    (rank, record_id, segment, offset, length)
+                    for record_id, (
+                        segment,
+                        offset,
+                        length,
+                        rank,
+                    ) in self._index.items()
+                    if segment in victim_set
+                ),
+                key=lambda entry: entry[0],
+            )
+            before = sum(segment.size for segment in victims)
+
+        # Copy outside the lock through private maps of the sealed victims;
+        # writers keep appending to the new active segment meanwhile
+        maps: dict[Segment, mmap.mmap] = {}
+        for segment in victims:
+            if segment.size:
+                with segment.path.open("rb") as f:
+                    maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        outputs: list[Segment] = []
+        moved: list[tuple[str, Segment, int, int, Segment, int]] = []
+        current: Optional[Segment] = None
+        for rank, record_id, segment, offset, length in snapshot:
+            if current is None or current.size >= self.max_segment_bytes:
+                if current is not None:
+                    current.seal()
+                with self._lock:
+                    current = self._new_segment()
+                current.open_for_append()
+                outputs.append(current)
+            line = maps[segment][offset : offset + length]
+            new_offset = current.append("p", record_id, line, rank)
+            moved.append((record_id, segment, offset, length, current, new_offset))
+        if current is not None:
+            current.seal()
+        for victim_map in maps.values():
+            victim_map.close()
+
+        with self._lock:
+            for record_id, segment, offset, length, output, new_offset in moved:
+                location = self._index.get(record_id)
+                # Skip records rewritten or deleted while the copy ran
+                if location is None or location[:2] != (segment, offset):
+                    continue
+                self._index[record_id] = (output, new_offset, length, location[3])
+                output.live_bytes += length
+            self._segments = outputs + [s for s in self._segments if s not in victims]
+            _write_manifest(self.directory, self._manifest())
+            for segment in victims:
+                segment.unlink()
+            after = sum(segment.size for segment in outputs)
+
+        return {
+            "segmentsIn": len(victims),
+            "segmentsOut": len(outputs),
+            "bytesIn": before,
+            "bytesOut": after,
+            "seconds": time.perf_counter() - started,
+        }
+
+    def start_compactor(self, interval: float = 30.0, garbage_ratio: float = 0.5):
+        """Compact in a daemon thread whenever garbage exceeds garbage_ratio"""
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                stats = self.stats()
+                if stats["segments"] > 1 and stats["garbageRatio"] >= garbage_ratio:
+                    self.compact()
+
+        self._stop.clear()
+        self._compactor = threading.Thread(
+            target=run, name="segment-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Array format
+
+    @classmethod
+    def import_array(
+        cls, source: Path, directory: Path, **options: Any
+    ) -> "SegmentStore":
+        """Load a data/*.json array into a new store, keeping its order"""
+        directory = Path(directory)
+        if (directory / MANIFEST).exists():
+            raise ValueError(f"{directory} already holds a segment store")
+        with Path(source).open(encoding="utf-8") as f:
+            records = json.load(f)
+        store = cls(directory, **options)
+        store.put_many(records)
+        return store
+
+    def export_array(self, target: Path) -> int:
+        """Write live records as the pretty-printed array writeJsonFile produces"""
+        target = Path(target)
+        records = list(self)
+        write_json_file(target.name, records, target.parent)
+        return len(records)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="Convert a JSON array collection")
+    load.add_argument("source", type=Path)
+    load.add_argument("directory", type=Path)
+    load.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES)
+
+    dump = commands.add_parser("export", help="Write the collection as a JSON array")
+    dump.add_argument("directory", type=Path)
+    dump.add_argument("target", type=Path)
+
+    get = commands.add_parser("get", help="Print one record by ID")
+    get.add_argument("directory", type=Path)
+    get.add_argument("id")
+
+    compact = commands.add_parser("compact", help="Fold updates and deletes")
+    compact.add_argument("directory", type=Path)
+    compact.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES)
+
+    stats = commands.add_parser("stats", help="Show record, segment and garbage totals")
+    stats.add_argument("directory", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        with SegmentStore.import_array(
+            args.source, args.directory, max_segment_bytes=args.segment_bytes
+        ) as store:
+            print(json.dumps(store.stats(), indent=2))
+        return
+
+    if not (args.directory / MANIFEST).exists():
+        parser.error(f"{args.directory} is not a segment store")
+    options = {}
+    if args.command == "compact":
+        options["max_segment_bytes"] = args.segment_bytes
+    with SegmentStore(args.directory, **options) as store:
+        if args.command == "export":
+            print(f"Wrote {store.export_array(args.target)} records to {args.target}")
+        elif args.command == "get":
+            record = store.get(args.id)
+            if record is None:
+                print(f"{args.id} not found", file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(record, indent=2))
+        elif args.command == "compact":
+            print(json.dumps(store.compact(), indent=2))
+        else:
+            print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,944 @@
+#!/usr/bin/env python3
+"""
+Python stand-in for the Insurance API
+Serves the same routes as app/api over the data/*.json collections so the
+integration client, benchmarks and MCP server can run without Node
+
+Unlike the Next.js routes, collections are held in memory with write-through
+to disk, and every GET carries a strong ETag derived from the versions of the
+collections it reads. Conditional requests are answered with 304 before any
+body is serialized.
+
+List routes accept status, policyId, from and to filters (from/to apply to
+each collection's date field, e.g. filedDate for claims) and cursor
+pagination via limit and cursor.
+
+Usage:
+    python -m api.standin --port 3000 [--data-dir data]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from api.storage import (
+    DATA_DIR,
+    generate_id,
+    get_current_timestamp,
+    read_json_file,
+    write_json_file,
+)
+
+VALID_API_KEYS = {"demo-key-12345", "test-key-67890"}
+
+# Makes ETags unique across restarts even though versions start at zero
+_BOOT = f"{time.time_ns():x}"
+
+
+def _in_days(days: int) -> str:
+    moment = datetime.now(timezone.utc) + timedelta(days=days)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+@dataclass(frozen=True)
+class CollectionSpec:
+    """How one URL collection maps onto a data file, mirroring its route.ts"""
+
+    filename: str
+    prefix: str
+    label: str
+    required: tuple[str, ...] = ()
+    defaults: Callable[[], dict[str, Any]] = dict
+    date_field: str = "createdAt"
+
+
+POSITIVE_FIELDS = (
+    "premium",
+    "coverageAmount",
+    "claimAmount",
+    "amount",
+    "newPremium",
+    "amountSought",
+    "mileage",
+)
+
+COLLECTIONS: dict[str, CollectionSpec] = {
+    "policies": CollectionSpec(
+        "policies.json",
+        "POL",
+        "Policy",
+        (
+            "policyNumber",
+            "policyType",
+            "holderName",
+            "holderEmail",
+            "premium",
+            "coverageAmount",
+            "startDate",
+            "endDate",
+            "status",
+        ),
+        date_field="startDate",
+    ),
+    "claims": CollectionSpec(
+        "claims.json",
+        "CLM",
+        "Claim",
+        (
+            "claimNumber",
+            "policyId",
+            "claimType",
+            "description",
+            "claimAmount",
+            "status",
+            "filedDate",
+        ),
+        date_field="filedDate",
+    ),
+    "risk-assessment": CollectionSpec(
+        "risk-assessments.json",
+        "RISK",
+        "Risk assessment",
+        (
+            "policyId",
+            "riskScore",
+            "riskLevel",
+            "factors",
+            "assessmentDate",
+            "assessedBy",
+        ),
+        date_field="assessmentDate",
+    ),
+    "customers": CollectionSpec(
+        "customers.json", "CUS", "Customer", ("firstName", "lastName", "email", "phone")
+    ),
+    "quotes": CollectionSpec(
+        "quotes.json",
+        "QUO",
+        "Quote",
+        ("policyType", "coverageAmount"),
+        lambda: {
+            "validUntil": _in_days(30),
+            "status": "pending",
+            "premium": random.random() * 1000 + 500,
+        },
+    ),
+    "payments": CollectionSpec(
+        "payments.json",
+        "PAY",
+        "Payment",
+        ("policyId", "amount", "paymentMethod"),
+        lambda: {"status": "pending", "paymentDate": get_current_timestamp()},
+        date_field="paymentDate",
+    ),
+    "agents": CollectionSpec(
+        "agents.json",
+        "AGE",
+        "Agent",
+        ("firstName", "lastName", "email", "licenseNumber"),
+        lambda: {"status": "active"},
+    ),
+    "beneficiaries": CollectionSpec(
+        "beneficiaries.json",
+        "BEN",
+        "Beneficiary",
+        ("policyId", "firstName", "lastName", "relationship", "percentage"),
+    ),
+    "documents": CollectionSpec(
+        "documents.json",
+        "DOC",
+        "Document",
+        ("entityType", "entityId", "documentType", "fileName", "fileUrl"),
+        lambda: {"uploadedAt": get_current_timestamp()},
+        date_field="uploadedAt",
+    ),
+    "renewals": CollectionSpec(
+        "renewals.json",
+        "REN",
+        "Renewal",
+        ("policyId", "renewalDate", "newPremium"),
+        lambda: {"status": "pending"},
+        date_field="renewalDate",
+    ),
+    "endorsements": CollectionSpec(
+        "endorsements.json",
+        "END",
+        "Endorsement",
+        ("policyId", "endorsementType", "effectiveDate", "premiumChange"),
+        date_field="effectiveDate",
+    ),
+    "reinsurance": CollectionSpec(
+        "reinsurance.json",
+        "REI",
+        "Reinsurance",
+        (
+            "treatyName",
+            "reinsurerName",
+            "coverageAmount",
+            "premium",
+            "effectiveDate",
+            "expiryDate",
+        ),
+        date_field="effectiveDate",
+    ),
+    "notifications": CollectionSpec(
+        "notifications.json",
+        "NOT",
+        "Notification",
+        ("recipientEmail", "type", "subject", "message"),
+        lambda: {"status": "pending"},
+    ),
+    "telematics": CollectionSpec(
+        "telematics.json",
+        "TEL",
+        "Telematics data",
+        ("policyId", "recordDate", "mileage"),
+        date_field="recordDate",
+    ),
+    "inspections": CollectionSpec(
+        "inspections.json",
+        "INS",
+        "Inspection",
+        ("policyId", "inspectionType", "scheduledDate"),
+        lambda: {"status": "scheduled"},
+        date_field="scheduledDate",
+    ),
+    "subrogation": CollectionSpec(
+        "subrogation.json",
+        "SUB",
+        "Subrogation",
+        ("claimId", "thirdParty", "amountSought"),
+        lambda: {"status": "initiated"},
+    ),
+    "audit-trail": CollectionSpec(
+        "audit-logs.json", "AUD", "Audit log", date_field="timestamp"
+    ),
+    "fraud-detection": CollectionSpec(
+        "fraud-analyses.json", "FRD", "Fraud analysis", date_field="analyzedAt"
+    ),
+}
+
+PAGE_LIMIT_MAX = 1000
+FILTER_PARAMS = ("status", "policyId", "from", "to", "since")
+
+
+class HTTPError(Exception):
+    """Raised by route handlers to short-circuit with an error response"""
+
+    def __init__(self, status: int, error: str, message: Optional[str] = None):
+        super().__init__(error)
+        self.status = status
+        self.payload = {"error": error}
+        if message:
+            self.payload["message"] = message
+
+
+def _parse_date(value: str) -> datetime:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _encode_cursor(position: int, last_id: Optional[str]) -> str:
+    raw = json.dumps([position, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, items: list[dict[str, Any]]) -> int:
+    """Resume position in the unfiltered collection, re-anchored on the last ID seen"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position, last_id = json.loads(raw)
+        position = int(position)
+    except (ValueError, TypeError):
+        raise HTTPError(400, "Invalid input", "Malformed cursor")
+    if last_id is None or (
+        0 < position <= len(items) and items[position - 1].get("id") == last_id
+    ):
+        return position
+    # Items before the cursor were deleted or reordered; find the anchor again
+    for index, item in enumerate(items):
+        if item.get("id") == last_id:
+            return index + 1
+    return min(position, len(items))
+
+
+def query_items(
+    req: "Request",
+    items: list[dict[str, Any]],
+    date_field: str,
+    predicate: Optional[Callable[[dict[str, Any]], bool]] = None,
+    tail: bool = False,
+) -> tuple[int, Any]:
+    """
+    Apply status/policyId/from/to/since filters and, when limit or cursor is
+    given, cursor pagination. Paginated responses are {"items": [...],
+    "nextCursor": ...}; otherwise the filtered array is returned as before.
+    Tail routes of append-only collections also paginate on since and add a
+    highWaterMark cursor that stays valid once the reader has caught up.
+    """
+    query = req.query
+    try:
+        since = _parse_date(query["from"]) if "from" in query else None
+        until = _parse_date(query["to"]) if "to" in query else None
+        after = _parse_date(query["since"]) if "since" in query else None
+        limit = int(query.get("limit", PAGE_LIMIT_MAX))
+    except ValueError as e:
+        raise HTTPError(400, "Invalid input", str(e))
+    if not 1 <= limit <= PAGE_LIMIT_MAX:
+        raise HTTPError(
+            400, "Invalid input", f"limit must be between 1 and {PAGE_LIMIT_MAX}"
+        )
+    status = query.get("status")
+    policy = query.get("policyId")
+
+    def matches(item: dict[str, Any]) -> bool:
+        if status is not None and item.get("status") != status:
+            return False
+        if policy is not None and item.get("policyId") != policy:
+            return False
+        if since or until or after:
+            value = item.get(date_field)
+            if not value:
+                return False
+            moment = _parse_date(value)
+            if (since and moment < since) or (until and moment > until):
+                return False
+            if after and moment <= after:
+                return False
+        return predicate is None or predicate(item)
+
+    filtered = predicate is not None or any(name in query for name in FILTER_PARAMS)
+    paginate = ("limit", "cursor", "since") if tail else ("limit", "cursor")
+    if not any(name in query for name in paginate):
+        return 200, [item for item in items if matches(item)] if filtered else items
+
+    # Scan lazily from the cursor so early pages never touch the tail of the collection
+    position = _decode_cursor(query["cursor"], items) if "cursor" in query else 0
+    page = []
+    while position < len(items) and len(page) < limit:
+        item = items[position]
+        position += 1
+        if matches(item):
+            page.append(item)
+    last_id = items[position - 1].get("id") if position else None
+    next_cursor = None
+    if position < len(items):
+        next_cursor = _encode_cursor(position, page[-1].get("id") if page else last_id)
+    if not tail:
+        return 200, {"items": page, "nextCursor": next_cursor}
+    return 200, {
+        "items": page,
+        "nextCursor": next_cursor,
+        "highWaterMark": _encode_cursor(position, last_id),
+    }
+
+
+class Collection:
+    """One data file held in memory; every commit bumps its version"""
+
+    def __init__(self, filename: str, data_dir: Path):
+        self.filename = filename
+        self.data_dir = data_dir
+        self.items: list[dict[str, Any]] = read_json_file(filename, data_dir)
+        self.version = 0
+        self.modified = time.time()
+
+    def find(self, item_id: str) -> Optional[dict[str, Any]]:
+        return next((item for item in self.items if item.get("id") == item_id), None)
+
+    def index_of(self, item_id: str) -> int:
+        return next(
+            (i for i, item in enumerate(self.items) if item.get("id") == item_id), -1
+        )
+
+    def commit(self) -> None:
+        write_json_file(self.filename, self.items, self.data_dir)
+        self.version += 1
+        self.modified = time.time()
+
+
+class Store:
+    """Lazily loaded collections behind a single lock"""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.lock = threading.RLock()
+        self._collections: dict[str, Collection] = {}
+
+    def collection(self, filename: str) -> Collection:
+        with self.lock:
+            if filename not in self._collections:
+                self._collections[filename] = Collection(filename, self.data_dir)
+            return self._collections[filename]
+
+    def etag(self, target: str, filenames: tuple[str, ...]) -> str:
+        """Strong validator for a representation: request target + collection versions"""
+        versions = "|".join(f"{f}:{self.collection(f).version}" for f in filenames)
+        digest = hashlib.blake2b(
+            f"{_BOOT}|{target}|{versions}".encode(), digest_size=12
+        )
+        return f'"{digest.hexdigest()}"'
+
+    def last_modified(self, filenames: tuple[str, ...]) -> float:
+        return max(self.collection(f).modified for f in filenames)
+
+
+@dataclass
+class Request:
+    store: Store
+    params: dict[str, str]
+    query: dict[str, str]
+    body: Any = None
+
+
+@dataclass
+class Route:
+    method: str
+    pattern: re.Pattern
+    handler: Callable[[Request], tuple[int, Any]]
+    reads: tuple[str, ...] = field(default_factory=tuple)
+
+
+def _validate(spec: CollectionSpec, body: Any, partial: bool = False) -> dict[str, Any]:
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Invalid input", "Expected a JSON object")
+    if not partial:
+        missing = [f for f in spec.required if f not in body]
+        if missing:
+            raise HTTPError(
+                400, "Invalid input", f"Missing required fields: {', '.join(missing)}"
+            )
+    for name in POSITIVE_FIELDS:
+        value = body.get(name)
+        if value is not None and (not isinstance(value, (int, float)) or value <= 0):
+            raise HTTPError(400, "Invalid input", f"{name} must be a positive number")
+    return {k: v for k, v in body.items() if k not in ("id", "createdAt")}
+
+
+def list_items(spec: CollectionSpec) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        return query_items(
+            req, req.store.collection(spec.filename).items, spec.date_field
+        )
+
+    return handler
+
+
+def create_item(spec: CollectionSpec) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        data = _validate(spec, req.body)
+        now = get_current_timestamp()
+        with req.store.lock:
+            collection = req.store.collection(spec.filename)
+            item = {
+                **data,
+                "id": generate_id(spec.prefix),
+                "createdAt": now,
+                **spec.defaults(),
+            }
+            if spec.filename in ("policies.json", "claims.json"):
+                item["updatedAt"] = now
+            collection.items.append(item)
+            collection.commit()
+        return 201, item
+
+    return handler
+
+
+def get_item(spec: CollectionSpec) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        item = req.store.collection(spec.filename).find(req.params["id"])
+        if item is None:
+            raise HTTPError(404, f"{spec.label} not found")
+        return 200, item
+
+    return handler
+
+
+def update_item(spec: CollectionSpec) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        data = _validate(spec, req.body, partial=True)
+        with req.store.lock:
+            collection = req.store.collection(spec.filename)
+            index = collection.index_of(req.params["id"])
+            if index == -1:
+                raise HTTPError(404, f"{spec.label} not found")
+            item = {
+                **collection.items[index],
+                **data,
+                "updatedAt": get_current_timestamp(),
+            }
+            collection.items[index] = item
+            collection.commit()
+        return 200, item
+
+    return handler
+
+
+def delete_item(spec: CollectionSpec) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        with req.store.lock:
+            collection = req.store.collection(spec.filename)
+            index = collection.index_of(req.params["id"])
+            if index == -1:
+                raise HTTPError(404, f"{spec.label} not found")
+            del collection.items[index]
+            collection.commit()
+        return 200, {"message": f"{spec.label} deleted successfully"}
+
+    return handler
+
+
+def set_claim_status(status: str) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        with req.store.lock:
+            claims = req.store.collection("claims.json")
+            index = claims.index_of(req.params["id"])
+            if index == -1:
+                raise HTTPError(404, "Claim not found")
+            now = get_current_timestamp()
+            claim = {
+                **claims.items[index],
+                "status": status,
+                "processedDate": now,
+                "updatedAt": now,
+            }
+            claims.items[index] = claim
+            claims.commit()
+        return 200, claim
+
+    return handler
+
+
+def approve_renewal(req: Request):
+    with req.store.lock:
+        renewals = req.store.collection("renewals.json")
+        renewal = renewals.find(req.params["id"])
+        if renewal is None:
+            raise HTTPError(404, "Renewal not found")
+        renewal.update(status="approved", updatedAt=get_current_timestamp())
+        renewals.commit()
+    return 200, renewal
+
+
+def complete_inspection(req: Request):
+    body = req.body if isinstance(req.body, dict) else {}
+    if not isinstance(body.get("findings"), str) or not isinstance(
+        body.get("approved"), bool
+    ):
+        raise HTTPError(400, "Invalid input", "findings and approved are required")
+    with req.store.lock:
+        inspections = req.store.collection("inspections.json")
+        inspection = inspections.find(req.params["id"])
+        if inspection is None:
+            raise HTTPError(404, "Inspection not found")
+        now = get_current_timestamp()
+        inspection.update(
+            status="completed",
+            completedDate=now,
+            findings=body["findings"],
+            approved=body["approved"],
+            updatedAt=now,
+        )
+        inspections.commit()
+    return 200, inspection
+
+
+def convert_quote(req: Request):
+    with req.store.lock:
+        quotes = req.store.collection("quotes.json")
+        quote = quotes.find(req.params["id"])
+        if quote is None:
+            raise HTTPError(404, "Quote not found")
+        if quote.get("status") != "approved":
+            raise HTTPError(400, "Only approved quotes can be converted")
+
+        policies = req.store.collection("policies.json")
+        now = get_current_timestamp()
+        policy = {
+            "id": generate_id("POL"),
+            "policyNumber": f"INS-{datetime.now().year}-{len(policies.items) + 1:06d}",
+            "policyType": quote["policyType"],
+            "holderName": quote.get("customerName") or "",
+            "holderEmail": quote.get("customerEmail") or "",
+            "premium": quote["premium"],
+            "coverageAmount": quote["coverageAmount"],
+            "startDate": now,
+            "endDate": _in_days(365),
+            "status": "active",
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        policies.items.append(policy)
+        policies.commit()
+        quote["status"] = "converted"
+        quotes.commit()
+    return 200, policy
+
+
+def analyze_fraud(req: Request):
+    body = req.body if isinstance(req.body, dict) else {}
+    claim_id = body.get("claimId")
+    if not isinstance(claim_id, str):
+        raise HTTPError(400, "Invalid input", "claimId is required")
+    claim = req.store.collection("claims.json").find(claim_id)
+    if claim is None:
+        raise HTTPError(404, "Claim not found")
+
+    # Same rules as app/api/fraud-detection/analyze/route.ts
+    indicators = []
+    risk_score = 0
+    if claim["claimAmount"] > 10000:
+        indicators.append("High claim amount")
+        risk_score += 30
+    if claim["status"] == "pending" and not claim.get("notes"):
+        indicators.append("Incomplete documentation")
+        risk_score += 20
+    filed = datetime.fromisoformat(claim["filedDate"].replace("Z", "+00:00"))
+    if (datetime.now(timezone.utc) - filed).days > 30:
+        indicators.append("Delayed reporting")
+        risk_score += 25
+
+    if risk_score < 30:
+        recommendation = "approve"
+    elif risk_score < 60:
+        recommendation = "review"
+    else:
+        recommendation = "reject"
+
+    analysis = {
+        "id": generate_id("FRD"),
+        "claimId": claim_id,
+        "riskScore": risk_score,
+        "fraudIndicators": indicators,
+        "recommendation": recommendation,
+        "analyzedAt": get_current_timestamp(),
+    }
+    with req.store.lock:
+        analyses = req.store.collection("fraud-analyses.json")
+        analyses.items.append(analysis)
+        analyses.commit()
+    return 200, analysis
+
+
+def risk_assessment_by_policy(req: Request):
+    assessments = req.store.collection("risk-assessments.json").items
+    assessment = next(
+        (a for a in assessments if a.get("policyId") == req.params["policyId"]), None
+    )
+    if assessment is None:
+        raise HTTPError(404, "Risk assessment not found for this policy")
+    return 200, assessment
+
+
+def filter_by_policy(spec: CollectionSpec) -> Callable[[Request], tuple[int, Any]]:
+    def handler(req: Request):
+        policy = req.params["policyId"]
+        return query_items(
+            req,
+            req.store.collection(spec.filename).items,
+            spec.date_field,
+            lambda item: item.get("policyId") == policy,
+        )
+
+    return handler
+
+
+def audit_trail(req: Request):
+    entity_type = req.query.get("entityType")
+    entity_id = req.query.get("entityId")
+
+    def predicate(log: dict[str, Any]) -> bool:
+        if entity_type and log.get("entityType") != entity_type:
+            return False
+        return not entity_id or log.get("entityId") == entity_id
+
+    return query_items(
+        req,
+        req.store.collection("audit-logs.json").items,
+        COLLECTIONS["audit-trail"].date_field,
+        predicate if entity_type or entity_id else None,
+        tail=True,
+    )
+
+
+def claims_summary(req: Request):
+    claims = req.store.collection("claims.json").items
+    total = sum(c["claimAmount"] for c in claims)
+    return 200, {
+        "totalClaims": len(claims),
+        "approvedClaims": sum(1 for c in claims if c["status"] == "approved"),
+        "rejectedClaims": sum(1 for c in claims if c["status"] == "rejected"),
+        "pendingClaims": sum(
+            1 for c in claims if c["status"] in ("pending", "processing")
+        ),
+        "totalClaimAmount": total,
+        "averageClaimAmount": total / len(claims) if claims else 0,
+    }
+
+
+def policies_summary(req: Request):
+    policies = req.store.collection("policies.json").items
+    total = sum(p["premium"] for p in policies)
+    return 200, {
+        "totalPolicies": len(policies),
+        "activePolicies": sum(1 for p in policies if p["status"] == "active"),
+        "expiredPolicies": sum(1 for p in policies if p["status"] == "expired"),
+        "cancelledPolicies": sum(1 for p in policies if p["status"] == "cancelled"),
+        "totalPremiumRevenue": total,
+        "averagePremium": total / len(policies) if policies else 0,
+    }
+
+
+def loss_ratio(req: Request):
+    premiums = sum(p["premium"] for p in req.store.collection("policies.json").items)
+    claims = sum(
+        c["claimAmount"]
+        for c in req.store.collection("claims.json").items
+        if c["status"] == "approved"
+    )
+    now = datetime.now(timezone.utc)
+    return 200, {
+        "lossRatio": claims / premiums * 100 if premiums > 0 else 0,
+        "totalClaims": claims,
+        "totalPremiums": premiums,
+        "periodStart": now.replace(year=now.year - 1)
+        .isoformat()
+        .replace("+00:00", "Z"),
+        "periodEnd": now.isoformat().replace("+00:00", "Z"),
+    }
+
+
+def _route(method: str, path: str, handler, reads: tuple[str, ...] = ()) -> Route:
+    pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path)
+    return Route(method, re.compile(f"^{pattern}$"), handler, reads)
+
+
+def build_routes() -> list[Route]:
+    routes = [
+        _route("POST", "/api/claims/{id}/approve", set_claim_status("approved")),
+        _route("POST", "/api/claims/{id}/reject", set_claim_status("rejected")),
+        _route("POST", "/api/quotes/{id}/convert", convert_quote),
+        _route("POST", "/api/renewals/{id}/approve", approve_renewal),
+        _route("POST", "/api/inspections/{id}/complete", complete_inspection),
+        _route("POST", "/api/fraud-detection/analyze", analyze_fraud),
+        _route(
+            "GET",
+            "/api/fraud-detection/reports",
+            list_items(COLLECTIONS["fraud-detection"]),
+            ("fraud-analyses.json",),
+        ),
+        _route("GET", "/api/audit-trail", audit_trail, ("audit-logs.json",)),
+        _route(
+            "GET",
+            "/api/risk-assessment/{policyId}",
+            risk_assessment_by_policy,
+            ("risk-assessments.json",),
+        ),
+        _route(
+            "POST", "/api/risk-assessment", create_item(COLLECTIONS["risk-assessment"])
+        ),
+        _route(
+            "GET",
+            "/api/payments/policy/{policyId}",
+            filter_by_policy(COLLECTIONS["payments"]),
+            ("payments.json",),
+        ),
+        _route(
+            "GET",
+            "/api/telematics/policy/{policyId}",
+            filter_by_policy(COLLECTIONS["telematics"]),
+            ("telematics.json",),
+        ),
+        _route(
+            "GET", "/api/analytics/claims-summary", claims_summary, ("claims.json",)
+        ),
+        _route(
+            "GET",
+            "/api/analytics/policies-summary",
+            policies_summary,
+            ("policies.json",),
+        ),
+        _route(
+            "GET",
+            "/api/analytics/loss-ratio",
+            loss_ratio,
+            ("policies.json", "claims.json"),
+        ),
+    ]
+    for name, spec in COLLECTIONS.items():
+        if name in ("risk-assessment", "audit-trail", "fraud-detection"):
+            continue
+        reads = (spec.filename,)
+        routes += [
+            _route("GET", f"/api/{name}", list_items(spec), reads),
+            _route("POST", f"/api/{name}", create_item(spec)),
+            _route("GET", f"/api/{name}/{{id}}", get_item(spec), reads),
+            _route("PUT", f"/api/{name}/{{id}}", update_item(spec)),
+            _route("DELETE", f"/api/{name}/{{id}}", delete_item(spec)),
+        ]
+    return routes
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Dispatches requests to the route table of the owning StandInServer"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body leave in one buffered write (handle_one_request
+    # flushes after each response), and TCP_NODELAY keeps a keep-alive
+    # response from waiting on Nagle plus the client's delayed ACK
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    server: "StandInServer"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_bytes(self, status: int, body: bytes, headers: Optional[dict] = None):
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send(self, status: int, payload: Any = None, headers: Optional[dict] = None):
+        body = (
+            b""
+            if payload is None
+            else json.dumps(payload, separators=(",", ":")).encode()
+        )
+        self._send_bytes(status, body, headers)
+
+    def _not_modified(self, etag: str, last_modified: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            candidates = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in candidates or etag in candidates
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(last_modified) <= since
+        return False
+
+    def _dispatch(self):
+        raw_body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("X-API-Key") not in VALID_API_KEYS:
+            return self._send(
+                401, {"error": "Unauthorized", "message": "Valid API key required"}
+            )
+
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        method = "GET" if self.command == "HEAD" else self.command
+        for route in self.server.routes:
+            match = route.pattern.match(path)
+            if match and route.method == method:
+                break
+        else:
+            return self._send(404, {"error": "Not found"})
+
+        headers = {}
+        if route.reads:
+            store = self.server.store
+            with store.lock:
+                etag = store.etag(self.path, route.reads)
+                last_modified = store.last_modified(route.reads)
+            headers = {
+                "ETag": etag,
+                "Last-Modified": formatdate(last_modified, usegmt=True),
+                "Cache-Control": "no-cache",
+            }
+            if self._not_modified(etag, last_modified):
+                return self._send(304, headers=headers)
+
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            body = json.loads(raw_body) if raw_body else None
+            request = Request(self.server.store, match.groupdict(), query, body)
+            # Serialize under the lock so a concurrent write cannot tear the payload
+            with self.server.store.lock:
+                status, payload = route.handler(request)
+                data = json.dumps(payload, separators=(",", ":")).encode()
+        except HTTPError as e:
+            return self._send(e.status, e.payload)
+        except ValueError as e:
+            return self._send(400, {"error": "Invalid input", "message": str(e)})
+        self._send_bytes(status, data, headers)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = _dispatch
+
+
+class StandInServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer bound to a Store and the API route table"""
+
+    daemon_threads = True
+    # socketserver's default backlog of 5 resets bursts from concurrent clients
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], store: Store, verbose: bool = False):
+        super().__init__(address, StandInHandler)
+        self.store = store
+        self.routes = build_routes()
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_thread(
+    data_dir: Path = DATA_DIR, host: str = "127.0.0.1", port: int = 0
+) -> StandInServer:
+    """Start a server on a background thread; port 0 picks a free port"""
+    server = StandInServer((host, port), Store(data_dir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Python stand-in for the Insurance API"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = StandInServer((args.host, args.port), Store(args.data_dir), args.verbose)
+    print(
+        f"Insurance API stand-in listening on {server.base_url} (data: {args.data_dir})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
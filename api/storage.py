@@ -0,0 +1,52 @@
+"""
+Python mirror of lib/storage.ts
+Reads and writes the same data/*.json collections as the Next.js routes
+"""
+
+import json
+import os
+import random
+import string
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).resolve().parent.parent / "data"))
+
+
+def ensure_data_dir(data_dir: Path = DATA_DIR) -> None:
+    """Create the data directory if it does not exist yet"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+
+def read_json_file(filename: str, data_dir: Path = DATA_DIR) -> list[dict[str, Any]]:
+    """Read a collection, returning an empty list when the file is missing"""
+    ensure_data_dir(data_dir)
+    try:
+        with open(data_dir / filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def write_json_file(
+    filename: str, data: list[dict[str, Any]], data_dir: Path = DATA_DIR
+) -> None:
+    """Write a collection pretty-printed with 2-space indentation, like writeJsonFile"""
+    ensure_data_dir(data_dir)
+    with open(data_dir / filename, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=2))
+
+
+def generate_id(prefix: str) -> str:
+    """Generate an ID in the same PREFIX-<millis>-<random> shape as generateId"""
+    timestamp = int(time.time() * 1000)
+    suffix = "".join(random.choices(string.ascii_lowercase + string.digits, k=7))
+    return f"{prefix}-{timestamp}-{suffix}"
+
+
+def get_current_timestamp() -> str:
+    """ISO-8601 UTC timestamp with millisecond precision, like toISOString()"""
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
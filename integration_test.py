@@ -4,11 +4,21 @@ Comprehensive Integration test script for Insurance API Demo
 Tests all API endpoints including core and extended features
 """
 
+import asyncio
+import json
 import os
 import sys
+import time
+import httpx
 import requests
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from api import renewals
+from api.client import AsyncInsuranceClient
+from api.profiling import PayloadProfiler, SuiteProfiler
+from api.schema_validation import ResponseValidator
 
 
 class Colors:
@@ -22,9 +32,75 @@ class Colors:
     BOLD = "\033[1m"
 
 
+class ProfilingSession(requests.Session):
+    """
+    requests.Session that feeds every response into a PayloadProfiler,
+    reports its blocking time to a SuiteProfiler and checks JSON bodies
+    against the OpenAPI contract, whichever are enabled
+    """
+
+    def __init__(
+        self,
+        profiler: Optional[PayloadProfiler] = None,
+        suite_profiler: Optional[SuiteProfiler] = None,
+        validator: Optional[ResponseValidator] = None,
+    ):
+        super().__init__()
+        self.profiler = profiler
+        self.suite_profiler = suite_profiler
+        self.validator = validator
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        if self.suite_profiler:
+            with self.suite_profiler.network_wait():
+                response = super().request(method, url, *args, **kwargs)
+        else:
+            response = super().request(method, url, *args, **kwargs)
+        total_seconds = time.perf_counter() - start
+        if self.validator and "json" in response.headers.get("Content-Type", ""):
+            # Passing the decoder, not the body, skips json() when not sampled
+            self.validator.check(
+                method, urlsplit(url).path, response.status_code, response.json
+            )
+        if not self.profiler:
+            return response
+
+        # raw.tell() counts bytes read off the socket, before content decoding
+        body = response.content
+        wire_bytes = response.raw.tell() if response.raw is not None else len(body)
+        self.profiler.record(
+            method,
+            url,
+            urlsplit(url).path,
+            body,
+            wire_bytes,
+            response.elapsed.total_seconds(),
+            total_seconds,
+            response.status_code,
+        )
+        return response
+
+
 class InsuranceAPITester:
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        profile_payloads: bool = False,
+        profile_dir: Optional[str] = None,
+        validate_rate: Optional[float] = None,
+    ):
         self.base_url = base_url.rstrip("/")
+        self.profiler = PayloadProfiler() if profile_payloads else None
+        self.suite_profiler = SuiteProfiler(profile_dir) if profile_dir else None
+        self.validator = (
+            ResponseValidator(sample_rate=validate_rate) if validate_rate else None
+        )
+        self.session = (
+            ProfilingSession(self.profiler, self.suite_profiler, self.validator)
+            if self.profiler or self.suite_profiler or self.validator
+            else requests.Session()
+        )
         self.headers = {
             "X-API-Key": "demo-key-12345",
             "Content-Type": "application/json",
@@ -66,7 +142,7 @@ class InsuranceAPITester:
         """Test authentication failure with invalid API key"""
         print(f"\n{Colors.BOLD}{Colors.BLUE}Testing Authentication{Colors.RESET}")
 
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/policies", headers={"X-API-Key": "invalid-key"}
         )
 
@@ -81,7 +157,7 @@ class InsuranceAPITester:
         print(f"\n{Colors.BOLD}{Colors.BLUE}Testing Policies Endpoints{Colors.RESET}")
 
         # GET all policies (empty or existing)
-        response = requests.get(f"{self.base_url}/api/policies", headers=self.headers)
+        response = self.session.get(f"{self.base_url}/api/policies", headers=self.headers)
         self.log_test(
             "GET /api/policies - List all policies",
             response.status_code == 200,
@@ -104,7 +180,7 @@ class InsuranceAPITester:
             "status": "active",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/policies", headers=self.headers, json=new_policy
         )
 
@@ -125,7 +201,7 @@ class InsuranceAPITester:
             return None
 
         # GET single policy
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/policies/{policy_id}", headers=self.headers
         )
         self.log_test(
@@ -137,7 +213,7 @@ class InsuranceAPITester:
         # PUT - Update policy
         update_data = {"premium": 1300.75, "status": "active"}
 
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/api/policies/{policy_id}",
             headers=self.headers,
             json=update_data,
@@ -149,7 +225,7 @@ class InsuranceAPITester:
         )
 
         # Test 404 for non-existent policy
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/policies/INVALID-ID", headers=self.headers
         )
         self.log_test(
@@ -168,7 +244,7 @@ class InsuranceAPITester:
             policy_id = "TEST-POLICY-ID"
 
         # GET all claims
-        response = requests.get(f"{self.base_url}/api/claims", headers=self.headers)
+        response = self.session.get(f"{self.base_url}/api/claims", headers=self.headers)
         self.log_test(
             "GET /api/claims - List all claims",
             response.status_code == 200,
@@ -189,7 +265,7 @@ class InsuranceAPITester:
             "notes": "Driver side door dent",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/claims", headers=self.headers, json=new_claim
         )
 
@@ -210,7 +286,7 @@ class InsuranceAPITester:
             return
 
         # GET single claim
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/claims/{claim_id}", headers=self.headers
         )
         self.log_test(
@@ -222,7 +298,7 @@ class InsuranceAPITester:
         # PUT - Update claim
         update_data = {"status": "processing", "notes": "Claim under review"}
 
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/api/claims/{claim_id}",
             headers=self.headers,
             json=update_data,
@@ -234,7 +310,7 @@ class InsuranceAPITester:
         )
 
         # POST - Approve claim
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/claims/{claim_id}/approve", headers=self.headers
         )
         self.log_test(
@@ -245,7 +321,7 @@ class InsuranceAPITester:
 
         # Create another claim to test rejection
         new_claim["claimNumber"] = "CLM-TEST-002"
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/claims", headers=self.headers, json=new_claim
         )
 
@@ -254,7 +330,7 @@ class InsuranceAPITester:
             self.created_resources["claims"].append(claim_id_2)
 
             # POST - Reject claim
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/claims/{claim_id_2}/reject", headers=self.headers
             )
             self.log_test(
@@ -291,7 +367,7 @@ class InsuranceAPITester:
             "notes": "Standard risk profile for urban driver",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/risk-assessment",
             headers=self.headers,
             json=new_assessment,
@@ -310,7 +386,7 @@ class InsuranceAPITester:
         )
 
         # GET - Get risk assessment by policy ID
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/risk-assessment/{policy_id}", headers=self.headers
         )
         self.log_test(
@@ -321,7 +397,7 @@ class InsuranceAPITester:
         )
 
         # Test 404 for non-existent policy
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/risk-assessment/INVALID-POLICY-ID",
             headers=self.headers,
         )
@@ -340,7 +416,7 @@ class InsuranceAPITester:
         # Invalid policy data (missing required fields)
         invalid_policy = {"policyNumber": "INVALID", "policyType": "invalid_type"}
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/policies", headers=self.headers, json=invalid_policy
         )
         self.log_test(
@@ -360,7 +436,7 @@ class InsuranceAPITester:
             "filedDate": datetime.utcnow().isoformat() + "Z",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/claims", headers=self.headers, json=invalid_claim
         )
         self.log_test(
@@ -389,7 +465,7 @@ class InsuranceAPITester:
             },
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/customers", headers=self.headers, json=customer_data
         )
         if response.status_code == 201:
@@ -402,7 +478,7 @@ class InsuranceAPITester:
         )
 
         # Get all customers
-        response = requests.get(f"{self.base_url}/api/customers", headers=self.headers)
+        response = self.session.get(f"{self.base_url}/api/customers", headers=self.headers)
         self.log_test(
             "GET /api/customers - List customers",
             response.status_code == 200,
@@ -411,7 +487,7 @@ class InsuranceAPITester:
 
         # Get customer by ID
         if self.customer_id:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/customers/{self.customer_id}",
                 headers=self.headers,
             )
@@ -432,7 +508,7 @@ class InsuranceAPITester:
             "customerName": "John Doe",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/quotes", headers=self.headers, json=quote_data
         )
         if response.status_code == 201:
@@ -444,7 +520,7 @@ class InsuranceAPITester:
         )
 
         # Get all quotes
-        response = requests.get(f"{self.base_url}/api/quotes", headers=self.headers)
+        response = self.session.get(f"{self.base_url}/api/quotes", headers=self.headers)
         self.log_test(
             "GET /api/quotes - List quotes",
             response.status_code == 200,
@@ -452,7 +528,7 @@ class InsuranceAPITester:
 
         # Update quote to approved
         if self.quote_id:
-            response = requests.put(
+            response = self.session.put(
                 f"{self.base_url}/api/quotes/{self.quote_id}",
                 headers=self.headers,
                 json={"status": "approved"},
@@ -463,7 +539,7 @@ class InsuranceAPITester:
             )
 
             # Convert quote to policy
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/quotes/{self.quote_id}/convert",
                 headers=self.headers,
             )
@@ -489,7 +565,7 @@ class InsuranceAPITester:
             "paymentMethod": "credit_card",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/payments", headers=self.headers, json=payment_data
         )
         payment_id = None
@@ -502,7 +578,7 @@ class InsuranceAPITester:
         )
 
         # Get payments by policy
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/payments/policy/{self.policy_id}",
             headers=self.headers,
         )
@@ -526,7 +602,7 @@ class InsuranceAPITester:
             "territory": "Northeast",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/agents", headers=self.headers, json=agent_data
         )
         self.log_test(
@@ -535,7 +611,7 @@ class InsuranceAPITester:
         )
 
         # Get all agents
-        response = requests.get(f"{self.base_url}/api/agents", headers=self.headers)
+        response = self.session.get(f"{self.base_url}/api/agents", headers=self.headers)
         self.log_test(
             "GET /api/agents - List agents",
             response.status_code == 200,
@@ -562,7 +638,7 @@ class InsuranceAPITester:
             "percentage": 100,
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/beneficiaries",
             headers=self.headers,
             json=beneficiary_data,
@@ -573,7 +649,7 @@ class InsuranceAPITester:
         )
 
         # Get all beneficiaries
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/beneficiaries", headers=self.headers
         )
         self.log_test(
@@ -598,7 +674,7 @@ class InsuranceAPITester:
             "fileUrl": "https://example.com/documents/policy_agreement.pdf",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/documents", headers=self.headers, json=document_data
         )
         self.log_test(
@@ -607,7 +683,7 @@ class InsuranceAPITester:
         )
 
         # Get all documents
-        response = requests.get(f"{self.base_url}/api/documents", headers=self.headers)
+        response = self.session.get(f"{self.base_url}/api/documents", headers=self.headers)
         self.log_test(
             "GET /api/documents - List documents",
             response.status_code == 200,
@@ -629,7 +705,7 @@ class InsuranceAPITester:
             "newCoverageAmount": 55000,
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/renewals", headers=self.headers, json=renewal_data
         )
         renewal_id = None
@@ -643,7 +719,7 @@ class InsuranceAPITester:
 
         # Approve renewal
         if renewal_id:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/renewals/{renewal_id}/approve",
                 headers=self.headers,
             )
@@ -652,6 +728,28 @@ class InsuranceAPITester:
                 response.status_code == 200,
             )
 
+        # The Next.js list route returns every policy whatever the status filter
+        mixed = [
+            {"id": f"POL-{s}", "status": s, "endDate": "2030-01-01T00:00:00.000Z"}
+            for s in ("active", "expired", "cancelled")
+        ]
+
+        async def index_of_mixed() -> list[str]:
+            transport = httpx.MockTransport(lambda _: httpx.Response(200, json=mixed))
+            async with AsyncInsuranceClient(
+                self.base_url, transport=transport
+            ) as client:
+                index = await renewals.build_index(client)
+            start = datetime(2029, 1, 1, tzinfo=timezone.utc)
+            return [p["id"] for p in index.expiring(start, start.replace(year=2031))]
+
+        indexed = asyncio.run(index_of_mixed())
+        self.log_test(
+            "renewals.build_index - Indexes only active policies",
+            indexed == ["POL-active"],
+            f"Indexed {indexed}",
+        )
+
     def test_fraud_detection(self):
         """Test Fraud Detection endpoints"""
         print(
@@ -670,7 +768,7 @@ class InsuranceAPITester:
                     "status": "pending",
                     "filedDate": datetime.utcnow().isoformat() + "Z",
                 }
-                response = requests.post(
+                response = self.session.post(
                     f"{self.base_url}/api/claims", headers=self.headers, json=claim_data
                 )
                 if response.status_code == 201:
@@ -681,7 +779,7 @@ class InsuranceAPITester:
             return
 
         # Analyze claim for fraud
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/fraud-detection/analyze",
             headers=self.headers,
             json={"claimId": self.claim_id},
@@ -692,7 +790,7 @@ class InsuranceAPITester:
         )
 
         # Get fraud reports
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/fraud-detection/reports", headers=self.headers
         )
         self.log_test(
@@ -705,7 +803,7 @@ class InsuranceAPITester:
         print(f"\n{Colors.BOLD}{Colors.BLUE}Testing Analytics Endpoints{Colors.RESET}")
 
         # Claims summary
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/analytics/claims-summary", headers=self.headers
         )
         self.log_test(
@@ -714,7 +812,7 @@ class InsuranceAPITester:
         )
 
         # Policies summary
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/analytics/policies-summary", headers=self.headers
         )
         self.log_test(
@@ -723,7 +821,7 @@ class InsuranceAPITester:
         )
 
         # Loss ratio
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/analytics/loss-ratio", headers=self.headers
         )
         self.log_test(
@@ -737,8 +835,11 @@ class InsuranceAPITester:
             f"\n{Colors.BOLD}{Colors.BLUE}Testing Audit Trail Endpoints{Colors.RESET}"
         )
 
-        response = requests.get(
-            f"{self.base_url}/api/audit-trail", headers=self.headers
+        # A one-entry page is enough to check the route; the log only grows
+        response = self.session.get(
+            f"{self.base_url}/api/audit-trail",
+            headers=self.headers,
+            params={"limit": 1},
         )
         self.log_test(
             "GET /api/audit-trail - List audit logs",
@@ -758,7 +859,7 @@ class InsuranceAPITester:
             "message": "Your policy is up for renewal next month.",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/notifications",
             headers=self.headers,
             json=notification_data,
@@ -788,7 +889,7 @@ class InsuranceAPITester:
             "nightDriving": 0.15,
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/telematics",
             headers=self.headers,
             json=telematics_data,
@@ -799,7 +900,7 @@ class InsuranceAPITester:
         )
 
         # Get telematics by policy
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/api/telematics/policy/{self.policy_id}",
             headers=self.headers,
         )
@@ -825,7 +926,7 @@ class InsuranceAPITester:
             "inspector": "Inspector Smith",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/inspections",
             headers=self.headers,
             json=inspection_data,
@@ -841,7 +942,7 @@ class InsuranceAPITester:
 
         # Complete inspection
         if inspection_id:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/inspections/{inspection_id}/complete",
                 headers=self.headers,
                 json={"findings": "Vehicle in good condition", "approved": True},
@@ -868,7 +969,7 @@ class InsuranceAPITester:
             "notes": "Other driver at fault, seeking recovery",
         }
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/subrogation",
             headers=self.headers,
             json=subrogation_data,
@@ -885,7 +986,7 @@ class InsuranceAPITester:
         # Delete created policies
         for policy_id in self.created_resources["policies"]:
             try:
-                response = requests.delete(
+                response = self.session.delete(
                     f"{self.base_url}/api/policies/{policy_id}", headers=self.headers
                 )
                 self.log_test(
@@ -899,7 +1000,7 @@ class InsuranceAPITester:
         # Delete created claims
         for claim_id in self.created_resources["claims"]:
             try:
-                response = requests.delete(
+                response = self.session.delete(
                     f"{self.base_url}/api/claims/{claim_id}", headers=self.headers
                 )
                 self.log_test(
@@ -929,6 +1030,64 @@ class InsuranceAPITester:
 
         return self.test_results["failed"] == 0
 
+    def compare_payload_encodings(self):
+        """
+        Re-fetch a sample URL per endpoint with and without compression
+        Runs before cleanup, while the sampled records still exist
+        """
+
+        def fetch(url: str, encoding: str):
+            headers = {**self.headers, "Accept-Encoding": encoding}
+            start = time.perf_counter()
+            response = requests.get(url, headers=headers)
+            return response.raw.tell(), time.perf_counter() - start
+
+        self.profiler.compare_encodings(
+            fetch, requests.utils.DEFAULT_ACCEPT_ENCODING
+        )
+
+    def print_payload_profile(self, report_path: Optional[str] = None):
+        """Print the per-endpoint payload profile and Accept-Encoding savings"""
+        print(f"\n{Colors.BOLD}{Colors.BLUE}Payload Profile{Colors.RESET}")
+        print(
+            f"Negotiated Accept-Encoding: {requests.utils.DEFAULT_ACCEPT_ENCODING}"
+        )
+        print(self.profiler.report())
+
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(self.profiler.as_dict(), f, indent=2)
+            print(f"\nProfile written to {report_path}")
+
+    def run_suite(self, test, *args):
+        """Run one test_* suite, under cProfile and tracemalloc when enabled"""
+        if not self.suite_profiler:
+            return test(*args)
+        with self.suite_profiler.profile(test.__name__):
+            return test(*args)
+
+    def print_suite_profile(self):
+        """Print where each suite's time went and save the combined breakdown"""
+        print(f"\n{Colors.BOLD}{Colors.BLUE}Suite Profile{Colors.RESET}")
+        print(self.suite_profiler.report())
+        summary_path = self.suite_profiler.output_dir / "suites.json"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(self.suite_profiler.as_dict(), f, indent=2)
+
+    def print_contract_report(self):
+        """Print how many responses broke the OpenAPI contract, and where"""
+        stats = self.validator.stats.as_dict()
+        color = Colors.RED if stats["failed"] else Colors.GREEN
+        print(f"\n{Colors.BOLD}{Colors.BLUE}Response Contract{Colors.RESET}")
+        print(
+            f"{color}{stats['checked']} checked, {stats['failed']} failed{Colors.RESET}"
+            f" ({stats['skipped']} skipped, {stats['unknownEndpoints']} undocumented,"
+            f" {stats['usPerRecord']:.1f} us/response,"
+            f" {stats['compileMs']:.1f} ms compiling schemas)"
+        )
+        for failure in stats["failures"][:20]:
+            print(f"  {failure['endpoint']}: {failure['error']}")
+
     def run_all_tests(self):
         """Run all integration tests"""
         print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}")
@@ -940,57 +1099,60 @@ class InsuranceAPITester:
 
         try:
             # Test authentication
-            self.test_auth_failure()
+            self.run_suite(self.test_auth_failure)
 
             # Test core endpoints
-            policy_id = self.test_policies_crud()
-            self.test_claims_crud(policy_id)
-            self.test_risk_assessment(policy_id)
+            policy_id = self.run_suite(self.test_policies_crud)
+            self.run_suite(self.test_claims_crud, policy_id)
+            self.run_suite(self.test_risk_assessment, policy_id)
 
             # Test validation
-            self.test_validation_errors()
+            self.run_suite(self.test_validation_errors)
 
             # Test customer management
-            self.test_customers()
+            self.run_suite(self.test_customers)
 
             # Test quotes (creates policy_id if needed)
-            self.test_quotes()
+            self.run_suite(self.test_quotes)
 
             # Test payments
-            self.test_payments()
+            self.run_suite(self.test_payments)
 
             # Test agents
-            self.test_agents()
+            self.run_suite(self.test_agents)
 
             # Test beneficiaries
-            self.test_beneficiaries()
+            self.run_suite(self.test_beneficiaries)
 
             # Test documents
-            self.test_documents()
+            self.run_suite(self.test_documents)
 
             # Test renewals
-            self.test_renewals()
+            self.run_suite(self.test_renewals)
 
             # Test fraud detection
-            self.test_fraud_detection()
+            self.run_suite(self.test_fraud_detection)
 
             # Test analytics
-            self.test_analytics()
+            self.run_suite(self.test_analytics)
 
             # Test audit trail
-            self.test_audit_trail()
+            self.run_suite(self.test_audit_trail)
 
             # Test notifications
-            self.test_notifications()
+            self.run_suite(self.test_notifications)
 
             # Test telematics
-            self.test_telematics()
+            self.run_suite(self.test_telematics)
 
             # Test inspections
-            self.test_inspections()
+            self.run_suite(self.test_inspections)
 
             # Test subrogation
-            self.test_subrogation()
+            self.run_suite(self.test_subrogation)
+
+            if self.profiler:
+                self.compare_payload_encodings()
 
             # Cleanup
             self.cleanup()
@@ -998,6 +1160,13 @@ class InsuranceAPITester:
             # Print summary
             success = self.print_summary()
 
+            if self.profiler:
+                self.print_payload_profile(os.getenv("PROFILE_REPORT"))
+            if self.suite_profiler:
+                self.print_suite_profile()
+            if self.validator:
+                self.print_contract_report()
+
             return 0 if success else 1
 
         except requests.exceptions.ConnectionError:
@@ -1017,7 +1186,17 @@ class InsuranceAPITester:
 def main():
     """Main entry point"""
     base_url = os.getenv("API_BASE_URL", "http://localhost:3000")
-    tester = InsuranceAPITester(base_url)
+    profile_payloads = os.getenv("PROFILE_PAYLOADS", "").lower() in ("1", "true", "yes")
+    # PROFILE_SUITES=<dir> writes per-suite pstats and allocation reports there
+    profile_dir = os.getenv("PROFILE_SUITES") or None
+    # VALIDATE_RESPONSES=<rate> checks that share of responses against openapi.yaml
+    validate_rate = float(os.getenv("VALIDATE_RESPONSES") or 0) or None
+    tester = InsuranceAPITester(
+        base_url,
+        profile_payloads=profile_payloads,
+        profile_dir=profile_dir,
+        validate_rate=validate_rate,
+    )
     exit_code = tester.run_all_tests()
     sys.exit(exit_code)
 